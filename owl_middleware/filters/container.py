@@ -50,7 +50,7 @@ async def handle_choose_container_callback(
                 )
             }
 
-        state_service.set_work_container(str(user.tg_id), str(container.id))
+        await state_service.set_work_container(str(user.tg_id), str(container.id))
 
         context = await cen.get(
             "choose_container_filter", container=container, success=True
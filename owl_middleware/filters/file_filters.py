@@ -7,6 +7,7 @@ from fastbot.engine import TemplateEngine
 from fastbot.logger import Logger
 from models import User
 from services import AuthService, FileService, ContainerService, ApiService, State
+from services.pagination import BOT_PAGE_SIZE
 from fastbot.decorators import (
     with_template_engine,
     with_parse_mode,
@@ -66,7 +67,9 @@ async def handle_read_file_callback(
                 "context": await cen.get("read_file", error="Неверный индекс файла")
             }
 
-        file_path = state_service.get_file_path(str(user.tg_id), search_id, file_index)
+        file_path = await state_service.get_file_path(
+            str(user.tg_id), search_id, file_index
+        )
 
         if not file_path:
             return {
@@ -79,7 +82,7 @@ async def handle_read_file_callback(
         if file_path.startswith("/"):
             file_id = file_path[1:]
 
-        container_id = state_service.get_work_container(str(user.tg_id))
+        container_id = await state_service.get_work_container(str(user.tg_id))
 
         if not container_id:
             return {
@@ -245,11 +248,10 @@ async def callback_file_list(
 
     containers = containers_result.unwrap()
 
-    all_files = []
-    for container in containers:
-        files_result = await file_service.get_files_by_container(container.id)
-        if files_result.is_ok():
-            all_files.extend(files_result.unwrap())
+    files_result = await file_service.get_files_by_containers(
+        [container.id for container in containers], BOT_PAGE_SIZE
+    )
+    all_files = files_result.unwrap() if files_result.is_ok() else []
 
     return {"context": await cen.get("file_list", files=all_files)}
 
@@ -268,8 +270,8 @@ async def callback_ocr_file_filter(
     try:
         await callback.answer()
 
-        state = state_service.get_state(str(user.tg_id))
-        ocr_data = state.metadata.get("last_ocr_result")
+        user_key = str(user.tg_id)
+        ocr_data = await state_service.get_metadata(user_key, "last_ocr_result")
 
         if not ocr_data:
             return {
@@ -279,9 +281,9 @@ async def callback_ocr_file_filter(
                 )
             }
 
-        container_id = ocr_data.get("container_id") or state_service.get_work_container(
-            str(user.tg_id)
-        )
+        container_id = ocr_data.get(
+            "container_id"
+        ) or await state_service.get_work_container(user_key)
 
         if not container_id:
             return {
@@ -309,10 +311,8 @@ async def callback_ocr_file_filter(
                 )
             }
 
-        if "last_ocr_result" in state.metadata:
-            del state.metadata["last_ocr_result"]
-        if "last_ocr_photo" in state.metadata:
-            del state.metadata["last_ocr_photo"]
+        await state_service.delete_metadata(user_key, "last_ocr_result")
+        await state_service.delete_metadata(user_key, "last_ocr_photo")
 
         return {
             "context": await cen.get(
@@ -1,4 +1,3 @@
-from datetime import datetime
 from aiogram import types
 from aiogram.enums import ParseMode
 
@@ -35,13 +34,12 @@ async def cmd_register(
     cen: ContextEngine,
 ):
     user = message.from_user
-    result = await auth_service.register_user(
+    result = await auth_service.register_telegram_user(
         {
             "id": user.id,
             "username": user.username,
             "first_name": user.first_name,
             "last_name": user.last_name,
-            "registered_at": datetime.now().isoformat(),
         }
     )
 
@@ -50,4 +48,8 @@ async def cmd_register(
             "context": await cen.get("registration", user=result.unwrap(), success=True)
         }
     else:
-        return {"context": await cen.get("registration_error", error=str(result.err()))}
+        return {
+            "context": await cen.get(
+                "registration_error", error=str(result.unwrap_err())
+            )
+        }
@@ -23,6 +23,9 @@ from fastbot.decorators import (
 )
 
 from aiogram.types import BufferedInputFile
+from services.api.stream import UPLOAD_CHUNK_SIZE
+from services.file import stored_encoding
+from services.pagination import BOT_PAGE_SIZE
 
 import fitz
 import base64
@@ -102,14 +105,12 @@ async def handle_download_file(
                 )
             }
 
-        all_files = []
-        for container in containers:
-            files_result = await file_service.get_files_by_container(container.id)
-            if files_result.is_ok():
-                container_files = files_result.unwrap()
-                for file in container_files:
-                    file.container_name = container.id
-                all_files.extend(container_files)
+        files_result = await file_service.get_files_by_containers(
+            [container.id for container in containers], BOT_PAGE_SIZE
+        )
+        all_files = files_result.unwrap() if files_result.is_ok() else []
+        for file in all_files:
+            file.container_name = file.container_id
 
         if not all_files:
             return {
@@ -127,7 +128,7 @@ async def handle_download_file(
 
     if len(args) >= 1:
         file_id = args[0]
-        container_id = state_service.get_work_container(str(user.tg_id))
+        container_id = await state_service.get_work_container(str(user.tg_id))
 
         Logger.info(f"Downloading file: {file_id} from container: {container_id}")
 
@@ -462,7 +463,7 @@ async def handle_file_upload(
             )
         }
 
-    container = state_service.get_work_container(str(user.tg_id))
+    container = await state_service.get_work_container(str(user.tg_id))
 
     document = message.document
 
@@ -476,10 +477,21 @@ async def handle_file_upload(
 
     try:
         file_info = await message.bot.get_file(document.file_id)
-        file_content = await message.bot.download_file(file_info.file_path)
-        binary_content = file_content.read()
+
+        file_data = {
+            "id": document.file_id,
+            "container_id": container,
+            "name": document.file_name or f"file_{document.file_id}",
+            "size": document.file_size,
+            "user_id": str(user.tg_id),
+            "created_at": datetime.now(),
+            "mime_type": document.mime_type or "application/octet-stream",
+        }
 
         if document.mime_type == "application/pdf":
+            file_content = await message.bot.download_file(file_info.file_path)
+            binary_content = file_content.read()
+
             text_result = await text_service.extract_text_from_pdf(
                 stream=binary_content
             )
@@ -504,24 +516,21 @@ async def handle_file_upload(
                     )
                 }
 
-        elif document.mime_type and document.mime_type.startswith("text/"):
-            content = binary_content.decode("utf-8", errors="ignore")
+            result = await file_service.create_file_with_sync(
+                file_data=file_data, content=content
+            )
         else:
-            content = base64.b64encode(binary_content).decode("ascii")
-
-        file_data = {
-            "id": document.file_id,
-            "container_id": container,
-            "name": document.file_name or f"file_{document.file_id}",
-            "size": document.file_size,
-            "user_id": str(user.tg_id),
-            "created_at": datetime.now(),
-            "mime_type": document.mime_type or "application/octet-stream",
-        }
-
-        result = await file_service.create_file_with_sync(
-            file_data=file_data, content=content
-        )
+            chunks = message.bot.session.stream_content(
+                url=message.bot.session.api.file_url(
+                    message.bot.token, file_info.file_path
+                ),
+                chunk_size=UPLOAD_CHUNK_SIZE,
+            )
+            result = await file_service.create_file_with_sync_stream(
+                file_data=file_data,
+                chunks=chunks,
+                encoding=stored_encoding(document.mime_type),
+            )
 
         if result.is_err():
             error = result.unwrap_err()
@@ -529,7 +538,7 @@ async def handle_file_upload(
 
             error_msg = str(error)
             if "413" in error_msg:
-                error_msg = f"Файл слишком большой ({len(binary_content)} bytes). Попробуйте файл меньшего размера."
+                error_msg = f"Файл слишком большой ({document.file_size} bytes). Попробуйте файл меньшего размера."
             elif "mimetype" in error_msg.lower():
                 error_msg = "Ошибка связи с сервисом хранения. Попробуйте позже."
             elif "already exists" in error_msg.lower():
@@ -580,7 +589,7 @@ async def handle_search(
             )
         }
 
-    container_id = state_service.get_work_container(str(user.tg_id))
+    container_id = await state_service.get_work_container(str(user.tg_id))
 
     container_result = await container_service.get_container(container_id)
 
@@ -618,7 +627,9 @@ async def handle_search(
         if path:
             file_paths.append(path)
 
-    search_id = state_service.add_search_results(str(user.tg_id), query, file_paths)
+    search_id = await state_service.add_search_results(
+        str(user.tg_id), query, file_paths
+    )
 
     file_items = []
     for i, path in enumerate(file_paths):
@@ -680,7 +691,7 @@ async def handle_process_photo(
             )
         }
 
-    container = state_service.get_work_container(str(user.tg_id))
+    container = await state_service.get_work_container(str(user.tg_id))
 
     try:
         photo = message.photo[-1]
@@ -716,18 +727,24 @@ async def handle_process_photo(
         cleaned_text = ocr_service.clean_html_tags(extracted_text)
         Logger.info(f"After HTML cleaning: {len(cleaned_text)} characters")
 
-        state = state_service.get_state(str(user.tg_id))
-        state.metadata["last_ocr_result"] = {
-            "text": cleaned_text,
-            "extracted_text": extracted_text,
-            "container_id": container,
-            "photo_bytes": original_photo_data,
-        }
-        state.metadata["last_ocr_photo"] = {
-            "photo_bytes": original_photo_data,
-            "file_id": photo.file_id,
-            "timestamp": datetime.now(),
-        }
+        user_key = str(user.tg_id)
+        await state_service.set_metadata(
+            user_key,
+            "last_ocr_result",
+            {
+                "text": cleaned_text,
+                "extracted_text": extracted_text,
+                "container_id": container,
+            },
+        )
+        await state_service.set_metadata(
+            user_key,
+            "last_ocr_photo",
+            {
+                "file_id": photo.file_id,
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
 
         file_data = {
             "id": f"photo_ocr_{photo.file_id}",
@@ -861,7 +878,7 @@ async def handle_read_file_impl(
         }
 
     file_id = args[0]
-    container_id = state_service.get_work_container(str(user.tg_id))
+    container_id = await state_service.get_work_container(str(user.tg_id))
 
     content_result = await api_service.files.get_file_content(
         str(file_id), str(container_id)
@@ -1048,8 +1065,8 @@ async def handle_list_files(
     container_service: ContainerService,
     cen: ContextEngine,
 ):
-    container = state_service.get_work_container(str(user.tg_id))
-    files_result = await file_service.get_files_by_container(container)
+    container = await state_service.get_work_container(str(user.tg_id))
+    files_result = await file_service.get_files_page(container, limit=BOT_PAGE_SIZE)
 
     if files_result.is_err():
         error = files_result.unwrap_err()
@@ -1058,7 +1075,7 @@ async def handle_list_files(
             "context": await cen.get("list_files", error=f"Database error: {error}")
         }
 
-    files = files_result.unwrap()
+    files = files_result.unwrap().items
 
     files_info = []
     for file in files:
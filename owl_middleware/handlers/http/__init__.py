@@ -11,8 +11,9 @@ from . import (
     layout,
 )
 from fastapi import APIRouter
+from .responses import CodecJSONResponse
 
-http_router = APIRouter()
+http_router = APIRouter(default_response_class=CodecJSONResponse)
 
 http_router.include_router(auth.router)
 http_router.include_router(chat.router)
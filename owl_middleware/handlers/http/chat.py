@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastbot.decorators import inject
-from .dependencies import get_current_user_from_request
+from .dependencies import get_current_user_from_request, get_owned_container
 from services import ApiService, ContainerService, AuthService, AgentService
 from models import User
 from pampy import match, _
@@ -39,11 +39,7 @@ async def chat_with_bot(
     if not container_id:
         raise HTTPException(status_code=400, detail="Container ID is required")
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
+    container = await get_owned_container(container_service, container_id, current_user)
 
     search_result = await api_service.containers.semantic_search(
         query, current_user, container, limit
@@ -58,11 +54,19 @@ async def chat_with_bot(
     context_parts = []
     used_files = []
 
-    for file_info in reversed(search_data.get("results", [])):
+    search_hits = list(reversed(search_data.get("results", [])))
+    file_ids = [hit.get("path", "").split("/")[-1] for hit in search_hits]
+    contents = {
+        file_id: content_result
+        async for file_id, content_result in api_service.files.get_files_content_bulk(
+            file_ids, container_id
+        )
+    }
+
+    for file_info, file_id in zip(search_hits, file_ids):
         file_path = file_info.get("path", "")
-        file_id = file_path.split("/")[-1] if "/" in file_path else file_path
 
-        content_result = await api_service.files.get_file_content(file_id, container_id)
+        content_result = contents[file_id]
         content_snippet = ""
         if content_result.is_ok():
             content_data, _ = content_result.unwrap()
@@ -3,14 +3,18 @@ from fastbot.decorators import inject
 from fastbot.logger.logger import Logger
 from .dependencies import (
     container_to_response,
-    get_container_stats,
-    get_container_status,
+    container_usage_stats,
+    get_containers_statuses,
     get_current_user_from_request,
+    get_owned_container,
 )
-from services import ContainerService, AuthService, ApiService
+from .responses import CodecJSONResponse
+from services import ContainerService, AuthService, ApiService, FileService
 from models import User, Container, Tariff, Label
 from datetime import datetime
+from typing import Optional
 
+import asyncio
 import traceback
 
 router = APIRouter(prefix="/containers", tags=["containers"])
@@ -20,27 +24,48 @@ router = APIRouter(prefix="/containers", tags=["containers"])
 @inject("container_service")
 @inject("auth_service")
 @inject("api_service")
+@inject("file_service")
 async def list_containers(
     container_service: ContainerService,
     auth_service: AuthService,
     api_service: ApiService,
+    file_service: FileService,
     request: Request,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    containers_result = await container_service.get_containers_by_user_id(
-        str(current_user.tg_id)
+    containers_result = await container_service.get_containers_page(
+        str(current_user.tg_id), after, limit
     )
     if containers_result.is_err():
+        if isinstance(containers_result.unwrap_err(), ValueError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
         raise HTTPException(status_code=500, detail="Error fetching containers")
 
-    containers_data = []
-    for container in containers_result.unwrap():
-        stats = await get_container_stats(container_service, container.id)
-        status = await get_container_status(api_service, current_user.id, container.id)
-        containers_data.append(await container_to_response(container, stats, status))
+    page = containers_result.unwrap()
+    containers = page.items
+    container_ids = [container.id for container in containers]
 
-    return {"data": containers_data}
+    statuses, usage_result = await asyncio.gather(
+        get_containers_statuses(api_service, current_user.id, container_ids),
+        file_service.get_usage_by_containers(container_ids),
+    )
+    usage = usage_result.unwrap() if usage_result.is_ok() else {}
+
+    containers_data = [
+        await container_to_response(
+            container,
+            container_usage_stats(container, usage.get(container.id)),
+            statuses[container.id],
+        )
+        for container in containers
+    ]
+
+    return CodecJSONResponse(
+        {"data": containers_data, "next_cursor": page.next_cursor}
+    )
 
 
 @router.post("")
@@ -180,53 +205,6 @@ async def create_container(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/{container_id}")
-@inject("container_service")
-@inject("auth_service")
-async def get_container(
-    container_id: str,
-    container_service: ContainerService,
-    auth_service: AuthService,
-    request: Request,
-):
-    current_user = await get_current_user_from_request(request, auth_service)
-    container_result = await container_service.get_container(container_id)
-
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-
-    if container.user_id != str(current_user.id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    return {"data": container.dict()}
-
-
-@router.delete("/{container_id}")
-@inject("container_service")
-@inject("auth_service")
-async def delete_container(
-    container_id: str,
-    container_service: ContainerService,
-    auth_service: AuthService,
-    request: Request,
-):
-    current_user = await get_current_user_from_request(request, auth_service)
-
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    delete_result = await container_service.delete_container(
-        current_user.id, container_id
-    )
-    if delete_result.is_err():
-        raise HTTPException(status_code=500, detail="Error deleting container")
-
-    return {"message": "Container deleted successfully"}
-
-
 @router.get("/metrics/{container_id}")
 @inject("container_service")
 @inject("api_service")
@@ -240,13 +218,7 @@ async def get_container_metrics(
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, container_id, current_user)
 
     metrics_result = await api_service.get_container_metrics(container_id)
     if metrics_result.is_err():
@@ -278,7 +250,7 @@ async def get_containers_status(
     containers = containers_result.unwrap()
     container_ids = [container.id for container in containers]
 
-    statuses_result = await api_service.get_containers_status(
+    statuses_result = await api_service.containers.get_containers_status(
         current_user.id, container_ids
     )
     if statuses_result.is_err():
@@ -286,3 +258,40 @@ async def get_containers_status(
 
     statuses = statuses_result.unwrap()
     return {"data": statuses}
+
+
+@router.get("/{container_id}")
+@inject("container_service")
+@inject("auth_service")
+async def get_container(
+    container_id: str,
+    container_service: ContainerService,
+    auth_service: AuthService,
+    request: Request,
+):
+    current_user = await get_current_user_from_request(request, auth_service)
+    container = await get_owned_container(container_service, container_id, current_user)
+
+    return {"data": container.dict()}
+
+
+@router.delete("/{container_id}")
+@inject("container_service")
+@inject("auth_service")
+async def delete_container(
+    container_id: str,
+    container_service: ContainerService,
+    auth_service: AuthService,
+    request: Request,
+):
+    current_user = await get_current_user_from_request(request, auth_service)
+
+    await get_owned_container(container_service, container_id, current_user)
+
+    delete_result = await container_service.delete_container(
+        current_user.id, container_id
+    )
+    if delete_result.is_err():
+        raise HTTPException(status_code=500, detail="Error deleting container")
+
+    return {"message": "Container deleted successfully"}
@@ -1,10 +1,10 @@
 from datetime import datetime
-from typing import Container
+from typing import Dict, List, Optional
 
 from fastapi import HTTPException, Request
 from fastbot.logger import Logger
 from services import AuthService, ApiService, ContainerService
-from models import User
+from models import User, Container
 
 
 async def get_current_user_from_request(
@@ -28,35 +28,65 @@ async def get_current_user_from_request(
     return user_result.unwrap()
 
 
-async def get_container_status(
-    api_service: ApiService, user_id: int, container_id: str
-) -> str:
+def can_access_container(container: Container, user: User) -> bool:
+    return container.user_id == str(user.tg_id) or user.is_admin
+
+
+async def get_owned_container(
+    container_service: ContainerService, container_id: str, current_user: User
+) -> Container:
+    container_result = await container_service.get_cached_container(container_id)
+    if container_result.is_err() or not container_result.unwrap():
+        raise HTTPException(status_code=404, detail="Container not found")
+
+    container = container_result.unwrap()
+    if not can_access_container(container, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return container
+
+
+async def get_containers_statuses(
+    api_service: ApiService, user_id: int, container_ids: List[str]
+) -> Dict[str, str]:
+    statuses = {container_id: "stopped" for container_id in container_ids}
+    if not container_ids:
+        return statuses
+
     status_result = await api_service.containers.get_containers_status(
-        user_id, [container_id]
+        user_id, container_ids
     )
+    if status_result.is_err():
+        Logger.error(f"Error fetching container statuses: {status_result.unwrap_err()}")
+        return statuses
+
     status_data = status_result.unwrap()
 
     try:
         if status_data.get("success") and status_data.get("statuses"):
-            status_value = status_data["statuses"][0]["status"]
-            return "running" if status_value == "1" else "stopped"
-    except (KeyError, IndexError, TypeError) as e:
+            for index, entry in enumerate(status_data["statuses"]):
+                container_id = entry.get("container_id") or (
+                    container_ids[index] if index < len(container_ids) else None
+                )
+                if container_id in statuses:
+                    statuses[container_id] = (
+                        "running" if str(entry["status"]) == "1" else "stopped"
+                    )
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
         Logger.error(f"Error parsing container status: {e}")
 
-    return "stopped"
+    return statuses
 
 
-async def get_container_stats(
-    container_service: ContainerService, container_id: str
-) -> dict:
-    stats_result = await container_service.get_container_stats(container_id)
-    if stats_result.is_ok():
-        stats = stats_result.unwrap()
-        return {
-            "storage_usage_percent": stats["storage_usage_percent"],
-            "total_size": stats["total_size"],
-        }
-    return {"storage_usage_percent": 0, "total_size": 0}
+def container_usage_stats(container: Container, usage: Optional[dict]) -> dict:
+    total_size = (usage or {}).get("total_size", 0)
+    storage_quota = container.tariff.storage_quota
+    return {
+        "storage_usage_percent": (
+            round(total_size / storage_quota * 100, 2) if storage_quota > 0 else 0
+        ),
+        "total_size": total_size,
+    }
 
 
 async def container_to_response(container: Container, stats: dict, status: str) -> dict:
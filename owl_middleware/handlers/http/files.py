@@ -1,13 +1,54 @@
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
 from fastbot.decorators import inject
-from .dependencies import get_current_user_from_request
+from .dependencies import get_current_user_from_request, get_owned_container
+from .responses import CodecJSONResponse
 from services import ContainerService, ApiService, AuthService, FileService, TextService
-from models import User
+from services.api.stream import decode_base64, iter_chunks
+from services.file import stored_encoding
+from services.pagination import clamp_limit, slice_page
+from models import File, User
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
 import base64
+import hashlib
+import os
+import re
 
 router = APIRouter(prefix="/containers/{container_id}/files", tags=["files"])
 
+RAW_CHUNK_SIZE = 3 * 16 * 1024
+_BASE64_RE = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+LISTING_FIELDS = (
+    "id",
+    "name",
+    "path",
+    "content",
+    "size",
+    "category",
+    "is_directory",
+    "exists",
+    "container_id",
+    "user_id",
+    "created_at",
+    "mime_type",
+)
+
+
+def _listing_fields(
+    include_content: bool, fields: Optional[str]
+) -> Optional[Set[str]]:
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        if not include_content:
+            requested.discard("content")
+        return requested
+    if not include_content:
+        return set(LISTING_FIELDS) - {"content"}
+    return None
+
 
 def _detect_mime_type(filename: str) -> str:
     extension = filename.lower().split(".")[-1] if "." in filename else ""
@@ -28,6 +69,100 @@ def _detect_mime_type(filename: str) -> str:
     return mime_map.get(extension, "text/plain")
 
 
+def _is_valid_base64(content: str) -> bool:
+    return len(content) % 4 == 0 and _BASE64_RE.fullmatch(content) is not None
+
+
+def _base64_decoded_size(content: str) -> int:
+    padding = len(content[-2:]) - len(content[-2:].rstrip("="))
+    return len(content) // 4 * 3 - padding
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """None для неподдерживаемых (в т.ч. multi-range) заголовков: отдаем весь файл"""
+    match = _RANGE_RE.fullmatch(header.strip())
+    if not match or not any(match.groups()):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    if end and int(end) < first:
+        # Синтаксически неверный диапазон игнорируется (RFC 9110, 14.2)
+        return None
+    if first >= size:
+        raise ValueError("Range not satisfiable")
+    return first, min(int(end), size - 1) if end else size - 1
+
+
+def _metadata_etag(file: File) -> str:
+    """Содержимое под данным id не перезаписывается: хватает метаданных"""
+    created_at = file.created_at.isoformat() if file.created_at else ""
+    source = f"{file.id}:{file.size}:{file.encoding}:{created_at}"
+    return f'"{hashlib.blake2b(source.encode(), digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _iter_base64_range(content: str, start: int, end: int):
+    aligned = start - start % 3
+    skip = start - aligned
+    remaining = end - start + 1
+    position = aligned // 3 * 4
+    step = RAW_CHUNK_SIZE // 3 * 4
+
+    while remaining > 0:
+        chunk = base64.b64decode(content[position : position + step])
+        position += step
+        if skip:
+            chunk = chunk[skip:]
+            skip = 0
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+
+async def _iter_bytes_range(data: bytes, start: int, end: int):
+    view = memoryview(data)
+    for offset in range(start, end + 1, RAW_CHUNK_SIZE):
+        yield bytes(view[offset : min(offset + RAW_CHUNK_SIZE, end + 1)])
+
+
+async def _iter_stream_range(chunks, start: int, end: int):
+    position = 0
+    async for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(start - position, 0) : end + 1 - position]
+        position = chunk_end
+        if position > end:
+            break
+
+
+async def _iter_encoded(pieces):
+    async for piece in pieces:
+        yield piece.encode("utf-8")
+
+
+async def _upload_size(file_upload) -> int:
+    if getattr(file_upload, "size", None) is not None:
+        return file_upload.size
+    file_upload.file.seek(0, os.SEEK_END)
+    size = file_upload.file.tell()
+    await file_upload.seek(0)
+    return size
+
+
 @router.post("")
 @inject("container_service")
 @inject("api_service")
@@ -46,24 +181,14 @@ async def upload_file_in_container(
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=500, detail="Error accessing container")
-
-    container = container_result.unwrap()
-    if not container:
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    container = await get_owned_container(container_service, container_id, current_user)
 
     form = await request.form()
     file_upload = form.get("file")
     if not file_upload:
         raise HTTPException(status_code=400, detail="No file provided")
 
-    file_content = await file_upload.read()
-    file_size = len(file_content)
+    file_size = await _upload_size(file_upload)
     file_name = (
         file_upload.filename or f"file_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     )
@@ -84,6 +209,7 @@ async def upload_file_in_container(
         "user_id": str(current_user.tg_id),
         "created_at": datetime.now(),
         "mime_type": mime_type,
+        "encoding": stored_encoding(mime_type),
     }
 
     db_result = await file_service.create_file(file_data)
@@ -95,8 +221,8 @@ async def upload_file_in_container(
     file_entity = db_result.unwrap()
 
     try:
-        binary_content = file_content
         if mime_type == "application/pdf":
+            binary_content = await file_upload.read()
             text_result = await text_service.extract_text_from_pdf(
                 stream=binary_content
             )
@@ -118,21 +244,14 @@ async def upload_file_in_container(
                 user_id=str(current_user.id),
                 container_id=container.id,
             )
-        elif mime_type and mime_type.startswith("text/"):
-            content_text = binary_content.decode("utf-8", errors="ignore")
-            api_result = await api_service.files.create_file(
-                path=file_entity.id,
-                content=content_text,
-                user_id=str(current_user.id),
-                container_id=container.id,
-            )
         else:
-            content_base64 = base64.b64encode(binary_content).decode("ascii")
-            api_result = await api_service.files.create_file(
+            await file_upload.seek(0)
+            api_result = await api_service.files.create_file_stream(
                 path=file_entity.id,
-                content=content_base64,
+                chunks=iter_chunks(file_upload.read),
                 user_id=str(current_user.id),
                 container_id=container.id,
+                encoding=file_entity.encoding,
             )
 
         if api_result.is_err():
@@ -182,13 +301,7 @@ async def get_file_content(
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, container_id, current_user)
 
     content_result = await api_service.files.get_file_content(
         str(file_id), str(container_id)
@@ -216,7 +329,139 @@ async def get_file_content(
     if explanation:
         response_data["explanation"] = explanation
 
-    return {"data": response_data}
+    return CodecJSONResponse({"data": response_data})
+
+
+@router.get("/{file_id}/raw")
+@inject("auth_service")
+@inject("container_service")
+@inject("api_service")
+@inject("file_service")
+async def download_raw_file(
+    container_id: str,
+    file_id: str,
+    auth_service: AuthService,
+    container_service: ContainerService,
+    api_service: ApiService,
+    file_service: FileService,
+    request: Request,
+):
+    current_user = await get_current_user_from_request(request, auth_service)
+
+    await get_owned_container(container_service, container_id, current_user)
+
+    file_service_result = await file_service.get_file(file_id)
+    file_metadata = (
+        file_service_result.unwrap() if file_service_result.is_ok() else None
+    )
+    file_name = file_metadata.name if file_metadata else file_id
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(file_name)}",
+    }
+
+    etag = _metadata_etag(file_metadata) if file_metadata else None
+    if etag is not None:
+        headers["ETag"] = etag
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    content = await api_service.files.get_cached_content(
+        str(file_id), str(container_id)
+    )
+    # Кодировка известна из метаданных: тело VFS можно отдавать потоком
+    stream_encoding = None
+    if content is None and file_metadata and file_metadata.encoding == "text":
+        stream_encoding = "text"
+    elif (
+        content is None
+        and file_metadata
+        and file_metadata.encoding == "base64"
+        and file_metadata.size is not None
+    ):
+        stream_encoding = "base64"
+
+    data = None
+    if stream_encoding == "text":
+        size = None
+        mime_type = "text/plain; charset=utf-8"
+    elif stream_encoding == "base64":
+        size = file_metadata.size
+        mime_type = file_metadata.mime_type or "application/octet-stream"
+    else:
+        if content is None:
+            content_result = await api_service.files.get_file_content(
+                str(file_id), str(container_id)
+            )
+            if content_result.is_err():
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Error reading file content: {content_result.unwrap_err()}",
+                )
+            content, _ = content_result.unwrap()
+
+        mime_type = file_metadata.mime_type if file_metadata else None
+        encoding = (
+            file_metadata.encoding or stored_encoding(mime_type)
+            if file_metadata
+            else "text"
+        )
+        if encoding == "base64" and _is_valid_base64(content):
+            size = _base64_decoded_size(content)
+            mime_type = mime_type or "application/octet-stream"
+        else:
+            # PDF и прочее, хранящееся текстом, отдается как текст, а не исходный тип
+            data = content.encode("utf-8")
+            size = len(data)
+            mime_type = "text/plain; charset=utf-8"
+
+    status_code = 200
+    if size is None:
+        headers["Accept-Ranges"] = "none"
+    else:
+        headers["Accept-Ranges"] = "bytes"
+        start, end = 0, size - 1
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if range_header and size > 0 and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "Content-Range": f"bytes */{size}"},
+                )
+            if byte_range is not None:
+                start, end = byte_range
+                status_code = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(max(end - start + 1, 0))
+
+    if stream_encoding is not None:
+        stream_result = await api_service.files.stream_file_content(
+            str(file_id), str(container_id)
+        )
+        if stream_result.is_err():
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error reading file content: {stream_result.unwrap_err()}",
+            )
+        pieces = stream_result.unwrap()
+        body = (
+            _iter_encoded(pieces)
+            if stream_encoding == "text"
+            else _iter_stream_range(decode_base64(pieces), start, end)
+        )
+    elif data is not None:
+        body = _iter_bytes_range(data, start, end)
+    else:
+        body = _iter_base64_range(content, start, end)
+
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=mime_type,
+        headers=headers,
+    )
 
 
 @router.delete("/{file_id}")
@@ -233,9 +478,7 @@ async def delete_file_in_container(
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
+    await get_owned_container(container_service, container_id, current_user)
 
     api_result = await api_service.files.delete_file(
         user_id=str(current_user.id), container_id=container_id, file_id=file_id
@@ -248,6 +491,68 @@ async def delete_file_in_container(
     return {"data": {"success": True}}
 
 
+async def _enrich_files_page(
+    container_id: str,
+    container_files: List[Dict[str, Any]],
+    file_service: FileService,
+    current_user: User,
+    after: Optional[str],
+    limit: Optional[int],
+    fields: Optional[Set[str]] = None,
+) -> CodecJSONResponse:
+    try:
+        page_files, next_cursor = slice_page(
+            container_files, "path", after, clamp_limit(limit)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    needs_db = fields is None or bool(fields & {"id", "created_at", "mime_type"})
+    db_files_map = {}
+    if needs_db:
+        names = [container_file.get("name", "") for container_file in page_files]
+        files_db_result = await file_service.get_files_by_names(container_id, names)
+        db_files = files_db_result.unwrap() if files_db_result.is_ok() else []
+        db_files_map = {file.name: file for file in db_files}
+
+    enriched_files = []
+    for container_file in page_files:
+        file_name = container_file.get("name", "")
+        db_file = db_files_map.get(file_name)
+        row = {
+            "id": db_file.id if db_file else None,
+            "name": file_name,
+            "path": container_file.get("path", ""),
+            "content": container_file.get("content", ""),
+            "size": container_file.get("size", 0),
+            "category": container_file.get("category", "unknown"),
+            "is_directory": container_file.get("is_directory", False),
+            "exists": container_file.get("exists", True),
+            "container_id": container_id,
+            "user_id": current_user.id,
+            "created_at": (
+                db_file.created_at.isoformat()
+                if db_file and db_file.created_at
+                else None
+            ),
+            "mime_type": (
+                db_file.mime_type if db_file else _detect_mime_type(file_name)
+            ),
+        }
+        if fields is not None:
+            row = {key: value for key, value in row.items() if key in fields}
+        enriched_files.append(row)
+
+    return CodecJSONResponse(
+        {
+            "data": enriched_files,
+            "count": len(enriched_files),
+            "container_id": container_id,
+            "next_cursor": next_cursor,
+        }
+    )
+
+
 @router.get("")
 @inject("file_service")
 @inject("container_service")
@@ -260,59 +565,35 @@ async def list_files(
     api_service: ApiService,
     auth_service: AuthService,
     request: Request,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_content: bool = True,
+    fields: Optional[str] = None,
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
+    await get_owned_container(container_service, container_id, current_user)
 
+    listing_fields = _listing_fields(include_content, fields)
     files_api_result = await api_service.containers.get_files_by_container_id(
-        current_user.id, container_id
+        current_user.id,
+        container_id,
+        include_content=listing_fields is None or "content" in listing_fields,
     )
     if files_api_result.is_err():
         raise HTTPException(
             status_code=500, detail="Error fetching files from container"
         )
 
-    container_files = files_api_result.unwrap()
-
-    files_db_result = await file_service.get_files_by_container(container_id)
-    db_files = files_db_result.unwrap() if files_db_result.is_ok() else []
-    db_files_map = {file.name: file for file in db_files}
-
-    enriched_files = []
-    for container_file in container_files:
-        file_name = container_file.get("name", "")
-        db_file = db_files_map.get(file_name)
-        enriched_files.append(
-            {
-                "id": db_file.id if db_file else None,
-                "name": file_name,
-                "path": container_file.get("path", ""),
-                "content": container_file.get("content", ""),
-                "size": container_file.get("size", 0),
-                "category": container_file.get("category", "unknown"),
-                "is_directory": container_file.get("is_directory", False),
-                "exists": container_file.get("exists", True),
-                "container_id": container_id,
-                "user_id": current_user.id,
-                "created_at": (
-                    db_file.created_at.isoformat()
-                    if db_file and db_file.created_at
-                    else None
-                ),
-                "mime_type": (
-                    db_file.mime_type if db_file else _detect_mime_type(file_name)
-                ),
-            }
-        )
-
-    return {
-        "data": enriched_files,
-        "count": len(enriched_files),
-        "container_id": container_id,
-    }
+    return await _enrich_files_page(
+        container_id,
+        files_api_result.unwrap(),
+        file_service,
+        current_user,
+        after,
+        limit,
+        listing_fields,
+    )
 
 
 @router.get("/refresh")
@@ -327,16 +608,21 @@ async def list_files_and_rebuild(
     api_service: ApiService,
     auth_service: AuthService,
     request: Request,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_content: bool = True,
+    fields: Optional[str] = None,
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
+    await get_owned_container(container_service, container_id, current_user)
 
+    listing_fields = _listing_fields(include_content, fields)
     files_api_result = (
         await api_service.containers.get_files_by_container_id_and_rebuild_index(
-            current_user.id, container_id
+            current_user.id,
+            container_id,
+            include_content=listing_fields is None or "content" in listing_fields,
         )
     )
     if files_api_result.is_err():
@@ -344,41 +630,12 @@ async def list_files_and_rebuild(
             status_code=500, detail="Error fetching files from container"
         )
 
-    container_files = files_api_result.unwrap()
-
-    files_db_result = await file_service.get_files_by_container(container_id)
-    db_files = files_db_result.unwrap() if files_db_result.is_ok() else []
-    db_files_map = {file.name: file for file in db_files}
-
-    enriched_files = []
-    for container_file in container_files:
-        file_name = container_file.get("name", "")
-        db_file = db_files_map.get(file_name)
-        enriched_files.append(
-            {
-                "id": db_file.id if db_file else None,
-                "name": file_name,
-                "path": container_file.get("path", ""),
-                "content": container_file.get("content", ""),
-                "size": container_file.get("size", 0),
-                "category": container_file.get("category", "unknown"),
-                "is_directory": container_file.get("is_directory", False),
-                "exists": container_file.get("exists", True),
-                "container_id": container_id,
-                "user_id": current_user.id,
-                "created_at": (
-                    db_file.created_at.isoformat()
-                    if db_file and db_file.created_at
-                    else None
-                ),
-                "mime_type": (
-                    db_file.mime_type if db_file else _detect_mime_type(file_name)
-                ),
-            }
-        )
-
-    return {
-        "data": enriched_files,
-        "count": len(enriched_files),
-        "container_id": container_id,
-    }
+    return await _enrich_files_page(
+        container_id,
+        files_api_result.unwrap(),
+        file_service,
+        current_user,
+        after,
+        limit,
+        listing_fields,
+    )
@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastbot.decorators import inject
 from fastbot.logger.logger import Logger
-from .dependencies import get_current_user_from_request
+from .dependencies import (
+    can_access_container,
+    get_current_user_from_request,
+    get_owned_container,
+)
+from .responses import CodecJSONResponse
 from services import GroupService, AuthService, ContainerService, FileService
+from typing import Optional
 
 import traceback
 
@@ -19,23 +25,23 @@ async def get_container_groups(
     auth_service: AuthService,
     container_service: ContainerService,
     request: Request,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
 ):
     current_user = await get_current_user_from_request(request, auth_service)
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
+    await get_owned_container(container_service, container_id, current_user)
 
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    groups_result = await group_service.get_groups_by_container(container_id)
+    groups_result = await group_service.get_groups_page(container_id, after, limit)
     if groups_result.is_err():
+        if isinstance(groups_result.unwrap_err(), ValueError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
         raise HTTPException(status_code=500, detail="Error fetching groups")
 
-    groups = groups_result.unwrap()
-    return {"data": [group.dict() for group in groups]}
+    page = groups_result.unwrap()
+    return CodecJSONResponse(
+        {"data": page.items, "next_cursor": page.next_cursor}
+    )
 
 
 @router.post("/container/{container_id}")
@@ -53,13 +59,7 @@ async def create_group(
         body = await request.json()
         current_user = await get_current_user_from_request(request, auth_service)
 
-        container_result = await container_service.get_container(container_id)
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await get_owned_container(container_service, container_id, current_user)
 
         name = body.get("name")
         if not name:
@@ -109,13 +109,7 @@ async def get_group(
 
     group = group_result.unwrap()
 
-    container_result = await container_service.get_container(group.container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, group.container_id, current_user)
 
     return {"data": group.dict()}
 
@@ -141,13 +135,7 @@ async def update_group(
 
         group = group_result.unwrap()
 
-        container_result = await container_service.get_container(group.container_id)
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await get_owned_container(container_service, group.container_id, current_user)
 
         description = body.get("description")
         color = body.get("color")
@@ -193,13 +181,7 @@ async def delete_group(
 
     group = group_result.unwrap()
 
-    container_result = await container_service.get_container(group.container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, group.container_id, current_user)
 
     delete_result = await group_service.delete_group(group_id, group.container_id)
     if delete_result.is_err():
@@ -233,13 +215,7 @@ async def add_file_to_group(
 
         group = group_result.unwrap()
 
-        container_result = await container_service.get_container(group.container_id)
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await get_owned_container(container_service, group.container_id, current_user)
 
         add_result = await group_service.add_file_to_group(file_id, group_id)
         if add_result.is_err():
@@ -282,13 +258,7 @@ async def remove_file_from_group(
 
     group = group_result.unwrap()
 
-    container_result = await container_service.get_container(group.container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, group.container_id, current_user)
 
     remove_result = await group_service.remove_file_from_group(file_id, group_id)
     if remove_result.is_err():
@@ -319,13 +289,7 @@ async def get_group_files(
 
     group = group_result.unwrap()
 
-    container_result = await container_service.get_container(group.container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, group.container_id, current_user)
 
     files_result = await group_service.get_files_by_group(group_id)
     if files_result.is_err():
@@ -334,7 +298,15 @@ async def get_group_files(
     files = files_result.unwrap()
     return {
         "data": [
-            {"id": f.id, "name": f.name, "container_id": f.container_id} for f in files
+            {
+                "id": f.id,
+                "name": f.name,
+                "container_id": f.container_id,
+                "size": f.size,
+                "mime_type": f.mime_type,
+                "created_at": f.created_at.isoformat() if f.created_at else None,
+            }
+            for f in files
         ]
     }
 
@@ -359,14 +331,13 @@ async def get_file_groups(
     groups = groups_result.unwrap()
 
     if groups:
-        container_result = await container_service.get_container(groups[0].container_id)
-        if container_result.is_ok():
-            container = container_result.unwrap()
-            if (
-                container.user_id != str(current_user.tg_id)
-                and not current_user.is_admin
-            ):
-                raise HTTPException(status_code=403, detail="Access denied")
+        container_result = await container_service.get_cached_container(
+            groups[0].container_id
+        )
+        if container_result.is_ok() and not can_access_container(
+            container_result.unwrap(), current_user
+        ):
+            raise HTTPException(status_code=403, detail="Access denied")
 
     return {"data": [group.dict() for group in groups]}
 
@@ -396,22 +367,18 @@ async def add_multiple_files_to_group(
 
         group = group_result.unwrap()
 
-        container_result = await container_service.get_container(group.container_id)
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await get_owned_container(container_service, group.container_id, current_user)
 
         add_result = await group_service.add_multiple_files_to_group(file_ids, group_id)
         if add_result.is_err():
             raise HTTPException(status_code=500, detail="Error adding files to group")
 
-        added_files = add_result.unwrap()
+        add_data = add_result.unwrap()
+        added_files = add_data["added"]
         return {
             "message": f"Added {len(added_files)} files to group {group_id}",
             "data": [f.dict() for f in added_files],
+            "results": add_data["outcomes"],
         }
 
     except HTTPException:
@@ -446,13 +413,7 @@ async def remove_multiple_files_from_group(
 
         group = group_result.unwrap()
 
-        container_result = await container_service.get_container(group.container_id)
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await get_owned_container(container_service, group.container_id, current_user)
 
         remove_result = await group_service.remove_multiple_files_from_group(
             file_ids, group_id
@@ -462,8 +423,11 @@ async def remove_multiple_files_from_group(
                 status_code=500, detail="Error removing files from group"
             )
 
-        removed_count = remove_result.unwrap()
-        return {"message": f"Removed {removed_count} files from group {group_id}"}
+        remove_data = remove_result.unwrap()
+        return {
+            "message": f"Removed {remove_data['removed']} files from group {group_id}",
+            "results": remove_data["outcomes"],
+        }
 
     except HTTPException:
         raise
@@ -499,15 +463,9 @@ async def move_file_between_groups(
             raise HTTPException(status_code=404, detail="Source group not found")
 
         from_group = from_group_result.unwrap()
-        container_result = await container_service.get_container(
-            from_group.container_id
+        await get_owned_container(
+            container_service, from_group.container_id, current_user
         )
-        if container_result.is_err():
-            raise HTTPException(status_code=404, detail="Container not found")
-
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-            raise HTTPException(status_code=403, detail="Access denied")
 
         to_group_result = await group_service.get_group(to_group_id)
         if to_group_result.is_err():
@@ -553,15 +511,11 @@ async def get_group_stats(
 
     group = group_result.unwrap()
 
-    container_result = await container_service.get_container(group.container_id)
-    if container_result.is_err():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, group.container_id, current_user)
 
-    stats_result = await group_service.get_group_stats(group_id)
+    stats_result = await group_service.get_group_stats(
+        group_id, current_user.id, group.container_id
+    )
     if stats_result.is_err():
         raise HTTPException(status_code=500, detail="Error fetching group statistics")
 
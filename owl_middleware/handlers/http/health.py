@@ -1,10 +1,27 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastbot.decorators import inject
-from services import ApiService
+from services import (
+    ApiService,
+    AuthService,
+    Connection,
+    ContainerService,
+    GroupService,
+    IndexManager,
+    RedisService,
+    State,
+    WorkerCoordinator,
+)
+from .dependencies import get_current_user_from_request
 
 router = APIRouter(tags=["health"])
 
 
+async def _require_admin(request: Request, auth_service: AuthService) -> None:
+    current_user = await get_current_user_from_request(request, auth_service)
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
 @router.get("/health")
 @inject("api_service")
 async def check_health(
@@ -15,3 +32,79 @@ async def check_health(
     if health_check_result.is_err():
         raise HTTPException(status_code=500, detail="Health check failed")
     return {"status": "healthy", "success": True}
+
+
+@router.get("/metrics")
+@inject("api_service")
+@inject("index_manager")
+@inject("group_service")
+@inject("container_service")
+@inject("auth_service")
+@inject("state_service")
+@inject("coordinator")
+@inject("redis_service")
+@inject("ws_manager")
+async def get_metrics(
+    request: Request,
+    api_service: ApiService,
+    index_manager: IndexManager,
+    group_service: GroupService,
+    container_service: ContainerService,
+    auth_service: AuthService,
+    state_service: State,
+    coordinator: WorkerCoordinator,
+    redis_service: RedisService,
+    ws_manager: Connection,
+):
+    await _require_admin(request, auth_service)
+    return {
+        "data": {
+            "vfs_pool": api_service.pool.stats(),
+            "vfs_coalesced_requests": api_service.client.coalesced_requests,
+            "vfs_breakers": api_service.client.breakers.stats(),
+            "file_content_cache": (
+                api_service.files.cache.stats() if api_service.files.cache else None
+            ),
+            "mongo_indexes": index_manager.stats(),
+            "group_stats_cache": group_service.stats_cache.stats(),
+            "container_cache": {
+                **container_service.cache.stats(),
+                "watch_restarts": container_service.watch_restarts,
+            },
+            "token_cache": auth_service.token_cache.stats(),
+            "user_cache": auth_service.user_cache.stats(),
+            "password_hasher": auth_service.password_hasher.stats(),
+            "bot_state": state_service.stats(),
+            "workers": coordinator.stats(),
+            "redis": redis_service.stats(),
+            "websockets": ws_manager.stats(),
+        }
+    }
+
+
+@router.get("/metrics/indexes")
+@inject("index_manager")
+@inject("auth_service")
+async def get_index_metrics(
+    request: Request,
+    index_manager: IndexManager,
+    auth_service: AuthService,
+):
+    await _require_admin(request, auth_service)
+    return {"data": await index_manager.index_stats()}
+
+
+@router.post("/admin/caches/file-content/clear")
+@inject("api_service")
+@inject("auth_service")
+async def clear_file_content_cache(
+    request: Request,
+    api_service: ApiService,
+    auth_service: AuthService,
+):
+    await _require_admin(request, auth_service)
+    cache = api_service.files.cache
+    if cache is None:
+        return {"data": {"cleared": False}}
+    await cache.clear()
+    return {"data": {"cleared": True}}
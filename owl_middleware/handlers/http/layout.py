@@ -5,6 +5,8 @@ from fastbot.logger.logger import Logger
 from typing import Optional
 import json
 
+from .dependencies import can_access_container
+
 router = APIRouter(tags=["websocket"])
 
 
@@ -48,13 +50,12 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.close(code=1002, reason="container_id required")
             return
 
-        container_result = await container_service.get_container(container_id)
+        container_result = await container_service.get_cached_container(container_id)
         if container_result.is_err() or not container_result.unwrap():
             await websocket.close(code=1003, reason="Container not found")
             return
 
-        container = container_result.unwrap()
-        if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
+        if not can_access_container(container_result.unwrap(), current_user):
             await websocket.close(code=1003, reason="Access denied")
             return
 
@@ -85,18 +86,17 @@ async def websocket_endpoint(websocket: WebSocket):
                 elif action == "subscribe":
                     new_container_id = message.get("container_id")
                     if new_container_id and new_container_id != current_container_id:
-                        new_container_result = await container_service.get_container(
-                            new_container_id
+                        new_container_result = (
+                            await container_service.get_cached_container(
+                                new_container_id
+                            )
                         )
                         if (
                             new_container_result.is_ok()
                             and new_container_result.unwrap()
                         ):
                             new_container = new_container_result.unwrap()
-                            if (
-                                new_container.user_id == str(current_user.tg_id)
-                                or current_user.is_admin
-                            ):
+                            if can_access_container(new_container, current_user):
                                 ws_manager.disconnect(websocket)
                                 await ws_manager.connect(
                                     websocket, new_container_id, str(current_user.tg_id)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastbot.decorators import inject
-from .dependencies import get_current_user_from_request
+from .dependencies import get_current_user_from_request, get_owned_container
 from services import ApiService, ContainerService, AuthService, Ocr
 from models import User
 from datetime import datetime
@@ -38,13 +38,7 @@ async def process_ocr(
     if not file_name:
         raise HTTPException(status_code=400, detail="File name is required")
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, container_id, current_user)
 
     try:
         file_data = base64.b64decode(file_data_base64)
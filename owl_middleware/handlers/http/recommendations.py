@@ -1,10 +1,10 @@
 import asyncio
-import json
 from typing import List
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastbot.decorators import inject
-from services import ApiService, ContainerService, AuthService
+from services import ApiService, ContainerService, AuthService, codec
+from .dependencies import get_owned_container
 from models import User
 import logging
 
@@ -43,13 +43,7 @@ async def recommendations_stream(
     if not container_id:
         raise HTTPException(status_code=400, detail="container_id is required")
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
-    if container.user_id != str(current_user.tg_id) and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
+    await get_owned_container(container_service, container_id, current_user)
 
     async def event_generator():
         stream_id = None
@@ -93,19 +87,20 @@ async def recommendations_stream(
                     f"Failed to create recommendation stream: {result.unwrap_err()}"
                 )
                 logger.error(error_msg)
-                yield f"event: error\ndata: {json.dumps({'error': error_msg})}\n\n"
+                yield f"event: error\ndata: {codec.dumps({'error': error_msg})}\n\n"
                 return
 
             stream_id = result.unwrap()
             logger.info(f"Recommendation stream created: {stream_id}")
-            yield f"event: connected\ndata: {json.dumps({'stream_id': stream_id, 'container_id': container_id})}\n\n"
+            yield f"event: connected\ndata: {codec.dumps({'stream_id': stream_id, 'container_id': container_id})}\n\n"
 
             while True:
                 try:
                     event_type, data = await asyncio.wait_for(queue.get(), timeout=60)
                     if event_type == "data":
-                        logger.info(f"{json.dumps(data)}")
-                        yield f"data: {json.dumps(data)}\n\n"
+                        payload = codec.dumps(data)
+                        logger.info(payload)
+                        yield f"data: {payload}\n\n"
                     elif event_type == "event" and data == "end":
                         yield f"event: end\n\n"
                         break
@@ -115,7 +110,7 @@ async def recommendations_stream(
 
         except Exception as e:
             logger.error(f"Error in recommendations stream: {e}")
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            yield f"event: error\ndata: {codec.dumps({'error': str(e)})}\n\n"
 
     origin = request.headers.get("origin", "http://localhost:3001")
     response = StreamingResponse(
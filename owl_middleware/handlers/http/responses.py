@@ -0,0 +1,10 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from services import codec
+
+
+class CodecJSONResponse(JSONResponse):
+    """Возврат экземпляра из хендлера минует jsonable_encoder FastAPI"""
+
+    def render(self, content: Any) -> bytes:
+        return codec.dumps_bytes(content)
@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException, Request
 from fastbot.decorators import inject
 from fastbot.logger.logger import Logger
 from services import ApiService, ContainerService, AuthService
+from .dependencies import get_owned_container
+from .responses import CodecJSONResponse
 from models import User
 import logging
 
@@ -45,11 +47,7 @@ async def semantic_search(
     if not container_id:
         raise HTTPException(status_code=400, detail="Container ID is required")
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
+    container = await get_owned_container(container_service, container_id, current_user)
 
     search_result = await api_service.containers.semantic_search(
         query, current_user, container, limit=limit
@@ -60,7 +58,7 @@ async def semantic_search(
             status_code=500, detail=f"Search error: {search_result.unwrap_err()}"
         )
 
-    return {"data": search_result.unwrap()}
+    return CodecJSONResponse({"data": search_result.unwrap()})
 
 
 @router.get("/graph")
@@ -93,11 +91,7 @@ async def get_semantic_graph(
     if not container_id:
         raise HTTPException(status_code=400, detail="Container ID is required")
 
-    container_result = await container_service.get_container(container_id)
-    if container_result.is_err() or not container_result.unwrap():
-        raise HTTPException(status_code=404, detail="Container not found")
-
-    container = container_result.unwrap()
+    container = await get_owned_container(container_service, container_id, current_user)
 
     maybe_graph = await api_service.containers.get_semantic_graph(
         current_user, container
@@ -111,4 +105,4 @@ async def get_semantic_graph(
 
     # Logger.info(f"{maybe_graph.unwrap()}")
 
-    return {"data": maybe_graph.unwrap()}
+    return CodecJSONResponse({"data": maybe_graph.unwrap()})
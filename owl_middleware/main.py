@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, F
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from fastapi import WebSocket
 
 from fastbot.engine import ContextEngine
@@ -41,8 +42,6 @@ async def websocket_handler(websocket: WebSocket):
 
 
 async def main() -> None:
-    storage = MemoryStorage()
-
     template_service = TemplateEngine(
         template_dirs=["templates", "owl_middleware/templates"]
     )
@@ -60,21 +59,115 @@ async def main() -> None:
     jwt_secret = getenv("JWT_SECRET", "fallback-secret-change-in-production")
 
     database_service = services.DBService(getenv("MONGO_URI"), getenv("DATABASE_NAME"))
-    api_service = services.ApiService(getenv("VFS_HTTP_PATH"))
-    auth_service = services.AuthService(database_service, jwt_secret)
+    api_pool_config = services.PoolConfig(
+        limit=int(getenv("VFS_POOL_LIMIT", "100")),
+        limit_per_host=int(getenv("VFS_POOL_LIMIT_PER_HOST", "50")),
+        keepalive_timeout=float(getenv("VFS_KEEPALIVE_TIMEOUT", "30")),
+        ttl_dns_cache=int(getenv("VFS_DNS_CACHE_TTL", "300")),
+        total_timeout=float(getenv("VFS_TOTAL_TIMEOUT", "30")),
+        connect_timeout=float(getenv("VFS_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(getenv("VFS_READ_TIMEOUT", "25")),
+    )
+
+    redis_pool_config = services.RedisPoolConfig(
+        max_connections=int(getenv("REDIS_POOL_SIZE", "50")),
+        socket_timeout=float(getenv("REDIS_SOCKET_TIMEOUT", "5")),
+        connect_timeout=float(getenv("REDIS_CONNECT_TIMEOUT", "2")),
+    )
+    redis_service = services.RedisService(
+        getenv("REDIS_HOST"),
+        getenv("REDIS_PORT"),
+        False,
+        pool_config=redis_pool_config,
+        log_commands=getenv("REDIS_LOG_COMMANDS", "").lower() == "true",
+    )
+
+    if getenv("FSM_STORAGE", "memory").lower() == "redis":
+        fsm_ttl = int(getenv("FSM_TTL", str(24 * 3600)))
+        storage = RedisStorage(
+            redis_service.ensure_client(),
+            key_builder=DefaultKeyBuilder(with_bot_id=True),
+            state_ttl=fsm_ttl,
+            data_ttl=fsm_ttl,
+        )
+    else:
+        storage = MemoryStorage()
+
+    # Несколько экземпляров бота: общий Redis для дедупликации апдейтов
+    # и выбора единственного воркера, который опрашивает Telegram
+    multi_worker = getenv("BOT_MULTI_WORKER", "").lower() == "true"
+    coordinator = services.WorkerCoordinator(
+        redis_service,
+        dedup_ttl=int(getenv("UPDATE_DEDUP_TTL", "3600")),
+        lock_ttl=float(getenv("POLLING_LOCK_TTL", "30")),
+        processing_ttl=int(getenv("UPDATE_PROCESSING_TTL", "120")),
+    )
+
+    file_content_cache = services.FileContentCache(
+        max_bytes=int(getenv("FILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        max_entries=int(getenv("FILE_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(getenv("FILE_CACHE_TTL", "300")),
+        redis_service=(
+            redis_service
+            if getenv("FILE_CACHE_REDIS", "").lower() == "true"
+            else None
+        ),
+    )
+
+    api_resilience_config = services.ResilienceConfig(
+        max_attempts=int(getenv("VFS_RETRY_ATTEMPTS", "3")),
+        base_delay=float(getenv("VFS_RETRY_BASE_DELAY", "0.1")),
+        max_delay=float(getenv("VFS_RETRY_MAX_DELAY", "2")),
+        failure_threshold=int(getenv("VFS_BREAKER_THRESHOLD", "5")),
+        recovery_timeout=float(getenv("VFS_BREAKER_RECOVERY", "10")),
+    )
 
-    await auth_service.ensure_indexes()
+    api_service = services.ApiService(
+        getenv("VFS_HTTP_PATH"),
+        api_pool_config,
+        file_content_cache,
+        api_resilience_config,
+    )
+    user_cache = services.UserCache(
+        ttl=float(getenv("USER_CACHE_TTL", "30")),
+        negative_ttl=float(getenv("USER_CACHE_NEGATIVE_TTL", "5")),
+        redis_service=(
+            redis_service if getenv("USER_CACHE_REDIS", "").lower() == "true" else None
+        ),
+    )
+    password_hasher = services.PasswordHasher(
+        iterations=int(getenv("PASSWORD_HASH_ITERATIONS", "600000")),
+        max_workers=int(getenv("PASSWORD_HASH_WORKERS", "4")),
+    )
+    auth_service = services.AuthService(
+        database_service,
+        jwt_secret,
+        user_cache=user_cache,
+        password_hasher=password_hasher,
+    )
+
+    index_manager = services.IndexManager(database_service)
+    index_manager.ensure_in_background()
 
-    file_service = services.FileService(database_service, api_service)
+    file_service = services.FileService(
+        database_service,
+        api_service,
+        track_usage=getenv("CONTAINER_USAGE_COUNTERS", "").lower() == "true",
+    )
+    file_service.start_usage_reconcile(
+        float(getenv("CONTAINER_USAGE_RECONCILE_INTERVAL", "3600"))
+    )
     container_service = services.ContainerService(
         database_service, api_service, file_service
     )
+    if getenv("CONTAINER_CACHE_CHANGE_STREAM", "").lower() == "true":
+        container_service.watch_changes()
     group_service = services.GroupService(
-        database_service, container_service, file_service, api_service
-    )
-
-    redis_service = services.RedisService(
-        getenv("REDIS_HOST"), getenv("REDIS_PORT"), False
+        database_service,
+        container_service,
+        file_service,
+        api_service,
+        index_manager=index_manager,
     )
 
     text_service = services.TextService(getenv("MAX_FILE_SIZE"))
@@ -95,19 +188,36 @@ async def main() -> None:
     ocr_service = services.Ocr(getenv("NOVITA_API_KEY"))
     auth_middleware = middleware.AuthMiddleware(auth_service)
 
-    state_service = services.State()
+    state_ttl = int(getenv("STATE_TTL", str(24 * 3600)))
+    if getenv("STATE_BACKEND", "memory").lower() == "redis":
+        state_backend = services.RedisStateBackend(redis_service, ttl=state_ttl)
+    else:
+        state_backend = services.MemoryStateBackend(
+            max_users=int(getenv("STATE_MAX_USERS", "10000")), ttl=state_ttl
+        )
+    state_service = services.State(state_backend)
+    state_service.start_cleanup()
+
+    ws_manager = services.Connection(
+        redis_service if getenv("WS_PUBSUB", "").lower() == "true" else None
+    )
 
-    ws_manager = services.Connection()
+    dispatcher = Dispatcher(storage=storage)
+    if multi_worker:
+        dispatcher.update.outer_middleware(
+            middleware.UpdateDeduplicationMiddleware(coordinator)
+        )
 
     bot_builder = (
         FastBotBuilder()
         .set_bot(Bot(token=getenv("BOT_TOKEN")))
-        .set_dispatcher(Dispatcher(storage=storage))
+        .set_dispatcher(dispatcher)
         .add_middleware(middleware.error_handling_middleware)
         .add_middleware(middleware.logger_middleware)
     )
 
     bot_builder.add_dependency("db", database_service)
+    bot_builder.add_dependency("index_manager", index_manager)
     bot_builder.add_dependency("auth_service", auth_service)
     bot_builder.add_dependency("auth_middleware", auth_middleware)
     bot_builder.add_dependency("api_service", api_service)
@@ -123,6 +233,7 @@ async def main() -> None:
     bot_builder.add_dependency("ocr_service", ocr_service)
     bot_builder.add_dependency("state_service", state_service)
     bot_builder.add_dependency("ws_manager", ws_manager)
+    bot_builder.add_dependency("coordinator", coordinator)
 
     bot_builder.add_dependency_resolver(models.User, resolvers.resolve_user)
     bot_builder.add_dependency_resolver(models.File, resolvers.resolve_file)
@@ -186,6 +297,7 @@ async def main() -> None:
     bot = bot_builder.build()
 
     bot.app.state.db = database_service
+    bot.app.state.index_manager = index_manager
     bot.app.state.auth_service = auth_service
     bot.app.state.auth_middleware = auth_middleware
     bot.app.state.api_service = api_service
@@ -200,19 +312,29 @@ async def main() -> None:
     bot.app.state.deepseek_agent_service = deepseek_agent_service
     bot.app.state.ocr_service = ocr_service
     bot.app.state.ws_manager = ws_manager
+    bot.app.state.state_service = state_service
+    bot.app.state.coordinator = coordinator
     bot.app.state.user_resolver = resolvers.resolve_user
 
     use_webhook = getenv("USE_WEBHOOK", "").lower() == "true"
 
-    if use_webhook:
-        webhook_url = f"https://{getenv('WEBAPP_DOMAIN')}/webhook"
-        await bot.start_with_webhook(webhook_url)
-    else:
-        tasks = [bot.start_polling()]
-        if bot.app:
-            port = int(getenv("PORT", "8000"))
-            tasks.append(bot.run_web_server(port))
-        await asyncio.gather(*tasks)
+    try:
+        if use_webhook:
+            webhook_url = f"https://{getenv('WEBAPP_DOMAIN')}/webhook"
+            await bot.start_with_webhook(webhook_url)
+        else:
+            if multi_worker:
+                tasks = [coordinator.run_exclusive("polling", bot.start_polling)]
+            else:
+                tasks = [bot.start_polling()]
+            if bot.app:
+                port = int(getenv("PORT", "8000"))
+                tasks.append(bot.run_web_server(port))
+            await asyncio.gather(*tasks)
+    finally:
+        file_service.stop_usage_reconcile()
+        state_service.stop_cleanup()
+        password_hasher.close()
 
 
 if __name__ == "__main__":
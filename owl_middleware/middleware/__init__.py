@@ -1,5 +1,11 @@
 from .auth import AuthMiddleware
+from .dedup import UpdateDeduplicationMiddleware
 from .error import error_handling_middleware
 from .logger import logger_middleware
 
-__all__ = ["AuthMiddleware", "error_handling_middleware", "logger_middleware"]
+__all__ = [
+    "AuthMiddleware",
+    "UpdateDeduplicationMiddleware",
+    "error_handling_middleware",
+    "logger_middleware",
+]
@@ -29,7 +29,8 @@ class AuthMiddleware(BaseMiddleware):
         if not user:
             return await handler(event, data)
 
-        user = await self.auth_service.get_user(event.from_user.id)
+        user_result = await self.auth_service.get_cached_user_by_tg_id(user.id)
+        user = user_result.unwrap() if user_result.is_ok() else None
         if not user:
             if isinstance(event, types.Message):
                 await event.answer(
@@ -0,0 +1,35 @@
+from aiogram import types
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from typing import Callable, Dict, Any
+from fastbot.logger import Logger
+from services import WorkerCoordinator
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """Пропускает апдейты, уже взятые другим воркером или доставленные повторно"""
+
+    def __init__(self, coordinator: WorkerCoordinator):
+        self.coordinator = coordinator
+        super().__init__()
+
+    async def __call__(
+        self,
+        handler: Callable,
+        event: types.TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, types.Update):
+            return await handler(event, data)
+
+        if not await self.coordinator.claim_update(event.update_id):
+            Logger.debug(f"Skipping duplicate update {event.update_id}")
+            return None
+
+        try:
+            result = await handler(event, data)
+        except Exception:
+            await self.coordinator.release_update(event.update_id)
+            raise
+
+        await self.coordinator.complete_update(event.update_id)
+        return result
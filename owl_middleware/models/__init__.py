@@ -6,6 +6,7 @@ from .container import Container
 from .semantic_edge import SemanticEdge
 from .group import Group
 from .file2group import File2Group
+from .page import Page
 
 __all__ = [
     "User",
@@ -18,4 +19,5 @@ __all__ = [
     "SemanticEdge",
     "Group",
     "File2Group",
+    "Page",
 ]
@@ -11,5 +11,6 @@ class File(BaseModel):
     name: str
     size: Optional[int] = None
     mime_type: Optional[str] = None
+    encoding: Optional[str] = None
     created_at: Optional[datetime] = None
     user_id: Optional[str] = None
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+
+
+class Page(BaseModel):
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    limit: Optional[int] = None
@@ -5,8 +5,9 @@ from aiogram.types import Message, CallbackQuery
 from fastbot.logger import Logger
 from models import File
 from services import FileService, AuthService, ContainerService
+from services.pagination import BOT_PAGE_SIZE
 
-from fastbot.core import Result, Ok, Err
+from fastbot.core import Result, Err
 
 
 async def resolve_file(
@@ -22,12 +23,13 @@ async def resolve_file(
     if user.is_err():
         return Err(Exception("User not found"))
 
-    containers = await container_service.get_containers_by_user_id(user.unwrap().id)
-    all_files = []
+    containers_result = await container_service.get_containers_by_user_id(
+        user.unwrap().id
+    )
+    if containers_result.is_err():
+        return containers_result
 
-    for container in containers:
-        files_result = await file_service.get_files_by_container(container.id)
-        if files_result.is_ok():
-            all_files.extend(files_result.unwrap())
-
-    return Ok(all_files)
+    containers = containers_result.unwrap()
+    return await file_service.get_files_by_containers(
+        [container.id for container in containers], BOT_PAGE_SIZE
+    )
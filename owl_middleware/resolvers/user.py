@@ -12,7 +12,7 @@ async def resolve_user(
 ) -> Result[User, Exception]:
     if hasattr(source, "from_user"):
         tg_id = source.from_user.id
-        return await auth_service.get_user_by_tg_id(tg_id)
+        return await auth_service.get_cached_user_by_tg_id(tg_id)
 
     elif isinstance(source, Request):
         auth_header = source.headers.get("Authorization")
@@ -30,6 +30,6 @@ async def resolve_user(
 
         tg_id_header = source.headers.get("X-Telegram-User-ID")
         if tg_id_header and tg_id_header.isdigit():
-            return await auth_service.get_user_by_tg_id(int(tg_id_header))
+            return await auth_service.get_cached_user_by_tg_id(int(tg_id_header))
 
     return Result.Err(Exception("Authentication required"))
@@ -1,32 +1,46 @@
 from .auth import AuthService
+from .password import PasswordHasher
 from .db import DBService
+from .indexes import IndexManager
 from .file import FileService
 from .container import ContainerService
 from .pdf import TextService
 from .valito import HanaValidator
 from .agent import AgentService
 from .groups import GroupService
-from .redis import RedisService
+from .redis import RedisService, RedisPoolConfig
+from .coordination import WorkerCoordinator
+from .user_cache import UserCache
 from .ocr import Ocr
 
-from .api import ApiService
+from .api import ApiService, PoolConfig, FileContentCache, ResilienceConfig
 
-from .state import State
+from .state import State, MemoryStateBackend, RedisStateBackend
 
 from .sockets import Connection
 
 __all__ = [
     "AuthService",
+    "PasswordHasher",
     "DBService",
+    "IndexManager",
     "FileService",
     "ApiService",
+    "PoolConfig",
+    "FileContentCache",
+    "ResilienceConfig",
     "ContainerService",
     "TextService",
     "HanaValidator",
     "AgentService",
     "Ocr",
     "State",
+    "MemoryStateBackend",
+    "RedisStateBackend",
     "GroupService",
     "RedisService",
+    "RedisPoolConfig",
+    "WorkerCoordinator",
+    "UserCache",
     "Connection",
 ]
@@ -1,3 +1,13 @@
 from .init import ApiService
+from .cache import FileContentCache
+from .pool import ConnectionPool, PoolConfig
+from .resilience import CircuitOpenError, ResilienceConfig
 
-__all__ = ["ApiService"]
+__all__ = [
+    "ApiService",
+    "FileContentCache",
+    "ConnectionPool",
+    "PoolConfig",
+    "CircuitOpenError",
+    "ResilienceConfig",
+]
@@ -0,0 +1,146 @@
+import sys
+from typing import Any, Dict, Optional, Tuple
+from fastbot.logger.logger import Logger
+
+from .. import codec
+from ..cache import TTLCache
+from ..redis import RedisService
+
+FileContent = Tuple[str, Optional[str]]
+
+
+def _content_size(value: FileContent) -> int:
+    content, explanation = value
+    return sys.getsizeof(content) + sys.getsizeof(explanation)
+
+
+class FileContentCache:
+    """Кэш содержимого файлов VFS: LRU в памяти процесса и опционально Redis"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 1024,
+        ttl: float = 300.0,
+        redis_service: Optional[RedisService] = None,
+        redis_ttl: Optional[int] = None,
+        prefix: str = "owl:file_content",
+    ):
+        self.local = TTLCache(
+            max_entries=max_entries,
+            ttl=ttl,
+            max_bytes=max_bytes,
+            sizeof=_content_size,
+        )
+        self.redis_service = redis_service
+        self.redis_ttl = redis_ttl or int(ttl)
+        self.prefix = prefix
+        # Версия ключа растет при каждой инвалидации: ответ VFS, запрошенный
+        # до нее, не попадет в кэш после
+        self.generations = TTLCache(max_entries=max_entries * 4, ttl=ttl)
+        self._next_generation = 0
+        self.epoch = 0
+        self.redis_hits = 0
+        self.stale_writes = 0
+        self.decode_errors = 0
+
+    def _redis_key(self, file_id: str, container_id: str) -> str:
+        return f"{self.prefix}:{container_id}:{file_id}"
+
+    def generation(self, file_id: str, container_id: str) -> int:
+        """Снимок версии перед запросом к VFS, передается потом в set"""
+        return self._generation((str(container_id), str(file_id)))
+
+    def _generation(self, key: Tuple[str, str]) -> int:
+        return max(self.generations.get(key, 0), self.epoch)
+
+    async def get(self, file_id: str, container_id: str) -> Optional[FileContent]:
+        key = (str(container_id), str(file_id))
+        value = self.local.get(key)
+        if value is not None or self.redis_service is None:
+            return value
+
+        generation = self._generation(key)
+        result = await self.redis_service.get(self._redis_key(file_id, container_id))
+        if result.is_err():
+            Logger.warning(f"File content cache read failed: {result.unwrap_err()}")
+            return None
+
+        raw = result.unwrap()
+        if raw is None:
+            return None
+
+        try:
+            content, explanation = codec.loads(raw)
+        except (codec.DecodeError, TypeError, ValueError) as e:
+            Logger.warning(f"Skipping undecodable file content cache entry: {e}")
+            self.decode_errors += 1
+            return None
+
+        value = (content, explanation)
+        if generation == self._generation(key):
+            self.local.set(key, value)
+        self.redis_hits += 1
+        return value
+
+    async def set(
+        self,
+        file_id: str,
+        container_id: str,
+        value: FileContent,
+        generation: Optional[int] = None,
+    ) -> None:
+        key = (str(container_id), str(file_id))
+        if generation is not None and generation != self._generation(key):
+            self.stale_writes += 1
+            return
+
+        self.local.set(key, value)
+
+        if self.redis_service is not None:
+            result = await self.redis_service.set(
+                self._redis_key(file_id, container_id),
+                codec.dumps(list(value)),
+                ex=self.redis_ttl,
+            )
+            if result.is_err():
+                Logger.warning(
+                    f"File content cache write failed: {result.unwrap_err()}"
+                )
+
+    async def invalidate(self, file_id: str, container_id: str) -> None:
+        key = (str(container_id), str(file_id))
+        self._next_generation += 1
+        self.generations.set(key, self._next_generation)
+        self.local.pop(key)
+
+        if self.redis_service is not None:
+            result = await self.redis_service.delete(
+                self._redis_key(file_id, container_id)
+            )
+            if result.is_err():
+                Logger.warning(
+                    f"File content cache invalidation failed: {result.unwrap_err()}"
+                )
+
+    async def clear(self) -> None:
+        # clear() сдвигает версию сразу всех ключей
+        self._next_generation += 1
+        self.epoch = self._next_generation
+        self.local.clear()
+
+        if self.redis_service is not None:
+            result = await self.redis_service.delete_by_pattern(f"{self.prefix}:*")
+            if result.is_err():
+                Logger.warning(
+                    f"File content cache clear failed: {result.unwrap_err()}"
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "redis_enabled": self.redis_service is not None,
+            "redis_hits": self.redis_hits,
+            "stale_writes": self.stale_writes,
+            "decode_errors": self.decode_errors,
+        }
@@ -1,14 +1,37 @@
 import aiohttp
+import asyncio
 import json
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 from fastbot.logger.logger import Logger
 from fastbot.core import Result, result_try, Err, Ok
 
+from .. import codec
+from .pool import ConnectionPool
+from .resilience import (
+    IDEMPOTENT_METHODS,
+    READ_ONLY_POST_ENDPOINTS,
+    RETRYABLE_STATUSES,
+    BreakerRegistry,
+    CircuitOpenError,
+    ResilienceConfig,
+)
+
 
 class ApiClient:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        pool: Optional[ConnectionPool] = None,
+        resilience_config: Optional[ResilienceConfig] = None,
+    ):
         self.base_url = base_url
+        self.pool = pool or ConnectionPool(base_url)
+        self._owns_pool = pool is None
+        self.resilience = resilience_config or ResilienceConfig()
+        self.breakers = BreakerRegistry(self.resilience)
         self.session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.coalesced_requests = 0
 
     async def __aenter__(self):
         await self.connect()
@@ -20,17 +43,14 @@ class ApiClient:
     @result_try
     async def connect(self) -> Result[bool, Exception]:
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                base_url=self.base_url,
-                timeout=aiohttp.ClientTimeout(total=30),
-                json_serialize=json.dumps,
-            )
+            self.session = await self.pool.get_session()
         return Ok(True)
 
     @result_try
     async def close(self) -> Result[bool, Exception]:
-        if self.session and not self.session.closed:
-            await self.session.close()
+        if self._owns_pool:
+            await self.pool.close()
+        self.session = None
         return Ok(True)
 
     def _handle_response_status(
@@ -57,14 +77,13 @@ class ApiClient:
             Exception(f"HTTP error {status}: {data.get('error', 'Unknown error')}")
         )
 
-    def _parse_response(
-        self, response_text: str, status: int
-    ) -> Result[Dict, Exception]:
+    def _parse_response(self, body: bytes, status: int) -> Result[Dict, Exception]:
         try:
-            data = json.loads(response_text) if response_text else {}
+            data = codec.loads(body) if body else {}
             return self._handle_response_status(status, data)
-        except json.JSONDecodeError as e:
+        except codec.DecodeError as e:
             Logger.error(f"JSON decode error: {e}")
+            response_text = body.decode("utf-8", errors="replace")
             return Err(Exception(f"Invalid JSON response: {response_text}"))
 
     def _extract_data(self, response_data: Dict) -> Result[Any, Exception]:
@@ -72,6 +91,25 @@ class ApiClient:
             return Ok(response_data["data"])
         return Ok(response_data)
 
+    @staticmethod
+    def _is_read(method: str, endpoint: str) -> bool:
+        method = method.upper()
+        return method == "GET" or (
+            method == "POST" and endpoint in READ_ONLY_POST_ENDPOINTS
+        )
+
+    @staticmethod
+    def _coalesce_key(
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict],
+        params: Optional[Dict],
+    ) -> Tuple[str, str, str]:
+        payload = json.dumps(
+            {"json": json_data, "params": params}, sort_keys=True, default=str
+        )
+        return method.upper(), endpoint, payload
+
     @result_try
     async def _make_request(
         self,
@@ -80,11 +118,142 @@ class ApiClient:
         json_data: Optional[Dict] = None,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        coalesce: bool = False,
+        data: Optional[Any] = None,
+        breaker: bool = True,
+    ) -> Result[Any, Exception]:
+        # Склеиваются только чтения: GET и POST из READ_ONLY_POST_ENDPOINTS
+        if (
+            not coalesce
+            or not self._is_read(method, endpoint)
+            or headers
+            or data is not None
+        ):
+            return await self._send_request(
+                method, endpoint, json_data, params, headers, data, breaker
+            )
+
+        key = self._coalesce_key(method, endpoint, json_data, params)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_requests += 1
+        else:
+            task = asyncio.ensure_future(
+                self._send_request(method, endpoint, json_data, params, breaker=breaker)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Результат общий для всех склеенных вызовов: менять его на месте нельзя,
+        # вызывающий, которому это нужно, копирует сам
+        return await asyncio.shield(task)
+
+    @result_try
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        data: Optional[Any] = None,
+        breaker: bool = True,
     ) -> Result[Any, Exception]:
+        circuit = self.breakers.get(endpoint) if breaker else None
+        if circuit is not None and not await circuit.allow():
+            return Err(CircuitOpenError(f"VFS circuit open for {endpoint}"))
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS or self._is_read(
+            method, endpoint
+        )
+        attempts = self.resilience.max_attempts if idempotent and data is None else 1
+
+        for attempt in range(attempts):
+            result, backend_failed = await self._attempt_request(
+                method, endpoint, json_data, params, headers, data
+            )
+            if not backend_failed or attempt + 1 == attempts:
+                break
+
+            delay = self.resilience.backoff(attempt)
+            Logger.warning(
+                f"Retrying {method} {endpoint} in {delay:.2f}s "
+                f"(attempt {attempt + 2}/{attempts})"
+            )
+            await asyncio.sleep(delay)
+
+        if circuit is not None:
+            if backend_failed:
+                circuit.record_failure()
+            else:
+                circuit.record_success()
+
+        return result
+
+    @result_try
+    async def open_stream(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+    ) -> Result[aiohttp.ClientResponse, Exception]:
+        """Ответ с непрочитанным телом; вызывающий обязан сделать release()"""
+        circuit = self.breakers.get(endpoint)
+        if not await circuit.allow():
+            return Err(CircuitOpenError(f"VFS circuit open for {endpoint}"))
+
         connect_result = await self.connect()
         if connect_result.is_err():
+            circuit.record_failure()
             return connect_result
 
+        try:
+            response = await self.session.request(
+                method=method,
+                url=endpoint,
+                json=json_data,
+                params=params,
+                headers={"Content-Type": "application/json"},
+                timeout=self.pool.download_timeout,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            Logger.error(f"HTTP client error: {e}")
+            circuit.record_failure()
+            return Err(e)
+
+        if response.status == 200:
+            circuit.record_success()
+            return Ok(response)
+
+        try:
+            body = await response.read()
+        finally:
+            response.release()
+
+        if response.status in RETRYABLE_STATUSES:
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+
+        parse_result = self._parse_response(body, response.status)
+        if parse_result.is_err():
+            return parse_result
+        return Err(Exception(f"Unexpected VFS status {response.status}"))
+
+    async def _attempt_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict],
+        params: Optional[Dict],
+        headers: Optional[Dict],
+        data: Optional[Any],
+    ) -> Tuple[Result[Any, Exception], bool]:
+        connect_result = await self.connect()
+        if connect_result.is_err():
+            return connect_result, True
+
         default_headers = {"Content-Type": "application/json"}
         if headers:
             default_headers.update(headers)
@@ -94,20 +263,21 @@ class ApiClient:
                 method=method,
                 url=endpoint,
                 json=json_data,
+                data=data,
                 params=params,
                 headers=default_headers,
             ) as response:
-                response_text = await response.text()
+                body = await response.read()
 
-                parse_result = self._parse_response(response_text, response.status)
+                parse_result = self._parse_response(body, response.status)
                 if parse_result.is_err():
-                    return parse_result
+                    return parse_result, response.status in RETRYABLE_STATUSES
 
-                return self._extract_data(parse_result.unwrap())
+                return self._extract_data(parse_result.unwrap()), False
 
-        except aiohttp.ClientError as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             Logger.error(f"HTTP client error: {e}")
-            return Err(e)
+            return Err(e), True
         except Exception as e:
-            Logger.error(f"Unexpected error in _make_request: {e}")
-            return Err(e)
+            Logger.error(f"Unexpected error in _send_request: {e}")
+            return Err(e), False
@@ -16,11 +16,14 @@ class ContainerHandler:
         self,
         user_id: str,
         container_id: str,
+        include_content: bool = True,
     ) -> Result[List[Dict[str, Any]], Exception]:
         payload = {
             "user_id": str(user_id),
             "container_id": str(container_id),
         }
+        if not include_content:
+            payload["include_content"] = False
 
         result = await self.client._make_request(
             "GET", "/container/files/refresh", json_data=payload
@@ -39,21 +42,24 @@ class ContainerHandler:
         self,
         user_id: str,
         container_id: str,
+        include_content: bool = True,
     ) -> Result[List[Dict[str, Any]], Exception]:
         payload = {
             "user_id": str(user_id),
             "container_id": str(container_id),
         }
+        if not include_content:
+            payload["include_content"] = False
 
         result = await self.client._make_request(
-            "GET", "/container/files", json_data=payload
+            "GET", "/container/files", json_data=payload, coalesce=True
         )
 
         if result.is_ok():
             data = result.unwrap()
             if isinstance(data, dict):
                 if "files" in data:
-                    Logger.info(f"Files data: {data}")
+                    Logger.debug(f"Fetched {len(data['files'])} files")
                     return Ok(data["files"])
                 elif "paths" in data:
                     files_list = [
@@ -128,7 +134,7 @@ class ContainerHandler:
         }
 
         return await self.client._make_request(
-            "POST", "/containers/semantic", json_data=payload
+            "POST", "/containers/semantic", json_data=payload, coalesce=True
         )
 
     @result_try
@@ -146,6 +152,7 @@ class ContainerHandler:
             "POST",
             "/container/semantic/graph",
             json_data=payload,
+            coalesce=True,
         )
 
     @result_try
@@ -160,7 +167,7 @@ class ContainerHandler:
         }
 
         return await self.client._make_request(
-            "GET", "/container/metrics", json_data=payload
+            "GET", "/container/metrics", json_data=payload, coalesce=True
         )
 
     @result_try
@@ -172,5 +179,5 @@ class ContainerHandler:
         Logger.info(payload)
 
         return await self.client._make_request(
-            "POST", "/container/status", json_data=payload
+            "POST", "/container/status", json_data=payload, coalesce=True
         )
@@ -1,16 +1,26 @@
 import aiofiles
+import asyncio
 import os
-from typing import Dict, Any
+from typing import AsyncIterable, AsyncIterator, Dict, Any, Iterable, Optional, Tuple
 from fastbot.core import Result, result_try, Ok, Err
 from fastbot.logger.logger import Logger
 from models import File
 
+from .cache import FileContentCache
 from .client import ApiClient
+from .stream import encode_base64, encode_text, json_body, json_string_field
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
 class FileHandler:
-    def __init__(self, client: ApiClient):
+    def __init__(self, client: ApiClient, cache: Optional[FileContentCache] = None):
         self.client = client
+        self.cache = cache
+
+    async def _invalidate_content(self, file_id: str, container_id: str) -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(file_id, container_id)
 
     @result_try
     async def delete_file(
@@ -21,6 +31,7 @@ class FileHandler:
         result = await self.client._make_request(
             "DELETE", "/files/delete", json_data=payload
         )
+        await self._invalidate_content(file_id, container_id)
 
         if result.is_ok():
             data = result.unwrap()
@@ -33,7 +44,12 @@ class FileHandler:
 
     @result_try
     async def create_file(
-        self, path: str, content: str, user_id: str, container_id: str
+        self,
+        path: str,
+        content: str,
+        user_id: str,
+        container_id: str,
+        file_id: Optional[str] = None,
     ) -> Result[Dict[str, Any], Exception]:
         payload = {
             "path": path,
@@ -42,9 +58,38 @@ class FileHandler:
             "container_id": container_id,
         }
 
-        return await self.client._make_request(
+        result = await self.client._make_request(
             "POST", "/files/create", json_data=payload
         )
+        # Кэш содержимого ключуется id файла, а не именем в VFS ("{id}_{name}")
+        await self._invalidate_content(
+            file_id or os.path.basename(path), container_id
+        )
+        return result
+
+    @result_try
+    async def create_file_stream(
+        self,
+        path: str,
+        chunks: AsyncIterable[bytes],
+        user_id: str,
+        container_id: str,
+        encoding: str = "base64",
+        file_id: Optional[str] = None,
+    ) -> Result[Dict[str, Any], Exception]:
+        encode = encode_text if encoding == "text" else encode_base64
+        body = json_body(
+            {"path": path, "user_id": user_id, "container_id": container_id},
+            "content",
+            encode(chunks),
+        )
+
+        result = await self.client._make_request("POST", "/files/create", data=body)
+        # Кэш содержимого ключуется id файла, а не именем в VFS ("{id}_{name}")
+        await self._invalidate_content(
+            file_id or os.path.basename(path), container_id
+        )
+        return result
 
     @result_try
     async def read_file(self, path: str) -> Result[Dict[str, Any], Exception]:
@@ -55,10 +100,17 @@ class FileHandler:
     async def get_file_content(
         self, file_id: str, container_id: str
     ) -> Result[tuple[str, str | None], Exception]:
+        generation = None
+        if self.cache is not None:
+            cached = await self.cache.get(file_id, container_id)
+            if cached is not None:
+                return Ok(cached)
+            generation = self.cache.generation(file_id, container_id)
+
         payload = {"file_id": str(file_id), "container_id": str(container_id)}
 
         result = await self.client._make_request(
-            "GET", "/files/read", json_data=payload
+            "GET", "/files/read", json_data=payload, coalesce=True
         )
 
         if result.is_ok():
@@ -80,10 +132,72 @@ class FileHandler:
             else:
                 content = str(data)
 
+            if self.cache is not None:
+                await self.cache.set(
+                    file_id, container_id, (content, explanation), generation
+                )
+
             return Ok((content, explanation))
 
         return result
 
+    async def get_cached_content(
+        self, file_id: str, container_id: str
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        if self.cache is None:
+            return None
+        return await self.cache.get(file_id, container_id)
+
+    @result_try
+    async def stream_file_content(
+        self, file_id: str, container_id: str
+    ) -> Result[AsyncIterator[str], Exception]:
+        """Содержимое файла кусками прямо из ответа VFS, без сборки в памяти"""
+        payload = {"file_id": str(file_id), "container_id": str(container_id)}
+
+        response_result = await self.client.open_stream(
+            "GET", "/files/read", json_data=payload
+        )
+        if response_result.is_err():
+            return response_result
+
+        response = response_result.unwrap()
+
+        async def content() -> AsyncIterator[str]:
+            try:
+                async for piece in json_string_field(
+                    response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE),
+                    ("content", "data"),
+                ):
+                    yield piece
+            finally:
+                response.release()
+
+        return Ok(content())
+
+    async def get_files_content_bulk(
+        self,
+        file_ids: Iterable[str],
+        container_id: str,
+        concurrency: int = 8,
+    ) -> AsyncIterator[Tuple[str, Result[tuple[str, str | None], Exception]]]:
+        """Параллельное чтение файлов, результаты отдаются по мере готовности"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(file_id: str):
+            async with semaphore:
+                return file_id, await self.get_file_content(file_id, container_id)
+
+        tasks = [
+            asyncio.ensure_future(fetch(file_id)) for file_id in dict.fromkeys(file_ids)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
     @result_try
     async def upload_file(
         self, local_path: str, remote_path: str, user_id: str, container_id: str
@@ -142,5 +256,19 @@ class FileHandler:
     ) -> Result[Dict[str, Any], Exception]:
         path = f"/{file.id}_{file.name}" if file.name else f"/{file.id}"
         return await self.create_file(
-            path, content, str(int(file.user_id) + 1), file.container_id
+            path, content, str(int(file.user_id) + 1), file.container_id, file.id
+        )
+
+    @result_try
+    async def create_file_stream_from_model(
+        self, file: File, chunks: AsyncIterable[bytes], encoding: str = "base64"
+    ) -> Result[Dict[str, Any], Exception]:
+        path = f"/{file.id}_{file.name}" if file.name else f"/{file.id}"
+        return await self.create_file_stream(
+            path,
+            chunks,
+            str(int(file.user_id) + 1),
+            file.container_id,
+            encoding,
+            file.id,
         )
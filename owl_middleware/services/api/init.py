@@ -1,4 +1,9 @@
+from typing import Optional
+
+from .cache import FileContentCache
 from .client import ApiClient
+from .pool import ConnectionPool, PoolConfig
+from .resilience import ResilienceConfig
 from .container import ContainerHandler
 from .file import FileHandler
 from .system import SystemHandler
@@ -6,12 +11,24 @@ from .recommendations import RecommendationHandler
 
 
 class ApiService:
-    def __init__(self, base_url: str):
-        self.client = ApiClient(base_url)
+    def __init__(
+        self,
+        base_url: str,
+        pool_config: Optional[PoolConfig] = None,
+        content_cache: Optional[FileContentCache] = None,
+        resilience_config: Optional[ResilienceConfig] = None,
+    ):
+        self.pool = ConnectionPool(base_url, pool_config)
+        self.client = ApiClient(base_url, self.pool, resilience_config)
         self.containers = ContainerHandler(self.client)
-        self.files = FileHandler(self.client)
+        self.files = FileHandler(self.client, content_cache)
         self.system = SystemHandler(self.client)
-        self.recommendations = RecommendationHandler(self.client, base_url)
+        self.client.breakers.probe = self._probe_backend
+        self.recommendations = RecommendationHandler(self.client, base_url, self.pool)
+
+    async def _probe_backend(self) -> bool:
+        result = await self.system.health_check()
+        return result.is_ok() and result.unwrap()
 
     async def __aenter__(self):
         await self.client.connect()
@@ -19,4 +36,5 @@ class ApiService:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.client.close()
-        await self.recommendations.stream_manager.close_all()
+        await self.recommendations.stream_manager.close()
+        await self.pool.close()
@@ -0,0 +1,129 @@
+import aiohttp
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from fastbot.logger.logger import Logger
+
+from .. import codec
+
+
+class PoolConfig(BaseModel):
+    limit: int = 100
+    limit_per_host: int = 50
+    keepalive_timeout: float = 30.0
+    ttl_dns_cache: int = 300
+    total_timeout: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 25.0
+
+
+class ConnectionPool:
+    """Общий пул соединений к VFS для ApiClient и SSE-потоков"""
+
+    def __init__(self, base_url: str, config: Optional[PoolConfig] = None):
+        self.base_url = base_url
+        self.config = config or PoolConfig()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.connector: Optional[aiohttp.TCPConnector] = None
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    @property
+    def timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=self.config.total_timeout,
+            sock_connect=self.config.connect_timeout,
+            sock_read=self.config.read_timeout,
+        )
+
+    @property
+    def stream_timeout(self) -> aiohttp.ClientTimeout:
+        """Таймаут для долгоживущих SSE-ответов: ограничено только подключение"""
+        return aiohttp.ClientTimeout(
+            total=None, sock_connect=self.config.connect_timeout, sock_read=None
+        )
+
+    @property
+    def download_timeout(self) -> aiohttp.ClientTimeout:
+        """Таймаут для потоковой отдачи файла: общий не ограничен, чтение — да"""
+        return aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=self.config.connect_timeout,
+            sock_read=self.config.read_timeout,
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.in_flight += 1
+
+        async def on_request_finish(session, ctx, params):
+            self.in_flight -= 1
+
+        async def on_queued_start(session, ctx, params):
+            self.waiting += 1
+
+        async def on_queued_end(session, ctx, params):
+            self.waiting -= 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_finish)
+        trace_config.on_request_exception.append(on_request_finish)
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.connector = aiohttp.TCPConnector(
+                limit=self.config.limit,
+                limit_per_host=self.config.limit_per_host,
+                keepalive_timeout=self.config.keepalive_timeout,
+                ttl_dns_cache=self.config.ttl_dns_cache,
+            )
+            self.session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                connector=self.connector,
+                timeout=self.timeout,
+                json_serialize=codec.dumps,
+                trace_configs=[self._trace_config()],
+            )
+            Logger.info(
+                f"VFS connection pool created: limit={self.config.limit}, "
+                f"limit_per_host={self.config.limit_per_host}"
+            )
+        return self.session
+
+    def _idle_connections(self) -> int:
+        if self.connector is None or self.connector.closed:
+            return 0
+        conns = getattr(self.connector, "_conns", {})
+        return sum(len(items) for items in conns.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_use": self.in_flight,
+            "idle": self._idle_connections(),
+            "waiting": self.waiting,
+            "limit": self.config.limit,
+            "limit_per_host": self.config.limit_per_host,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+        }
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self.connector = None
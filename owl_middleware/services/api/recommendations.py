@@ -3,13 +3,16 @@ from typing import List, Dict, Any, Optional
 from fastbot.core import Result, result_try, Ok, Err
 from fastbot.logger.logger import Logger
 from .client import ApiClient
+from .pool import ConnectionPool
 from .streams.recommendations.recommendations import RecommendationStreamManager
 
 
 class RecommendationHandler:
-    def __init__(self, client: ApiClient, base_url: str):
+    def __init__(
+        self, client: ApiClient, base_url: str, pool: Optional[ConnectionPool] = None
+    ):
         self.client = client
-        self.stream_manager = RecommendationStreamManager(base_url)
+        self.stream_manager = RecommendationStreamManager(base_url, pool)
 
     @result_try
     async def get_recommendations_stream(
@@ -0,0 +1,138 @@
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pydantic import BaseModel
+from fastbot.logger.logger import Logger
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# POST-эндпоинты VFS, которые только читают: тело запроса — это параметры выборки
+READ_ONLY_POST_ENDPOINTS = frozenset(
+    {"/container/status", "/containers/semantic", "/container/semantic/graph"}
+)
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+
+class ResilienceConfig(BaseModel):
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+    failure_threshold: int = 5
+    recovery_timeout: float = 10.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: случайная задержка в пределах экспоненциального окна"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, registry: "BreakerRegistry"):
+        self.name = name
+        self.registry = registry
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        Logger.warning(f"VFS circuit '{self.name}': {self.state} -> {state}")
+        self.registry.record_transition(self.state, state)
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+        elif state == self.CLOSED:
+            self.failures = 0
+
+    async def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == self.OPEN and elapsed < self.registry.config.recovery_timeout:
+            return False
+
+        if self._probing:
+            return False
+
+        self._probing = True
+        self._transition(self.HALF_OPEN)
+
+        probe = self.registry.probe
+        if probe is None:
+            return True
+
+        try:
+            healthy = await probe()
+        except Exception as e:
+            Logger.warning(f"VFS health probe failed: {e}")
+            healthy = False
+        finally:
+            self._probing = False
+
+        if healthy:
+            self._transition(self.CLOSED)
+            return True
+
+        self._transition(self.OPEN)
+        return False
+
+    def record_success(self) -> None:
+        self._probing = False
+        self._transition(self.CLOSED)
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self.failures >= self.registry.config.failure_threshold
+        ):
+            self._transition(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures}
+
+
+class BreakerRegistry:
+    """Circuit breaker на каждый endpoint VFS с общим health-пробником"""
+
+    def __init__(
+        self,
+        config: Optional[ResilienceConfig] = None,
+        probe: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        self.config = config or ResilienceConfig()
+        self.probe = probe
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.transitions: Dict[str, int] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(endpoint, self)
+        return breaker
+
+    def record_transition(self, from_state: str, to_state: str) -> None:
+        key = f"{from_state}->{to_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {
+                name: breaker.stats() for name, breaker in self.breakers.items()
+            },
+            "open": sum(
+                1 for b in self.breakers.values() if b.state != CircuitBreaker.CLOSED
+            ),
+            "transitions": dict(self.transitions),
+        }
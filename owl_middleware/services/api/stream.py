@@ -0,0 +1,158 @@
+import base64
+import codecs
+import re
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+)
+
+from .. import codec
+
+UPLOAD_CHUNK_SIZE = 3 * 16 * 1024
+
+_JSON_STRING = re.compile(rb'"(?:[^"\\]+|\\.)*"')
+# Тело строки до первой незакрытой кавычки или оборванной escape-последовательности
+_JSON_STRING_BODY = re.compile(rb'(?:[^"\\]+|\\u[0-9a-fA-F]{4}|\\[^u])*')
+_HIGH_SURROGATE = re.compile(rb"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+async def iter_chunks(
+    read: Callable[[int], Awaitable[bytes]], chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def encode_base64(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Base64 по кускам, кратным 3 байтам, чтобы склейка совпадала с целым"""
+    remainder = b""
+    async for chunk in chunks:
+        data = remainder + chunk
+        cut = len(data) - len(data) % 3
+        remainder = data[cut:]
+        if cut:
+            yield base64.b64encode(data[:cut]).decode("ascii")
+    if remainder:
+        yield base64.b64encode(remainder).decode("ascii")
+
+
+async def encode_text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def json_body(
+    fields: Dict[str, Any], content_field: str, content: AsyncIterable[str]
+) -> AsyncIterator[bytes]:
+    """JSON-объект, у которого значение content_field отдается потоком"""
+    head = codec.dumps_bytes(fields)[:-1]
+    separator = b"," if fields else b""
+    yield head + separator + codec.dumps_bytes(content_field) + b':"'
+    async for piece in content:
+        yield codec.dumps_bytes(piece)[1:-1]
+    yield b'"}'
+
+
+async def decode_base64(chunks: AsyncIterable[str]) -> AsyncIterator[bytes]:
+    """Обратное к encode_base64: декодирует кусками, кратными 4 символам"""
+    remainder = ""
+    async for chunk in chunks:
+        data = remainder + chunk
+        cut = len(data) - len(data) % 4
+        remainder = data[cut:]
+        if cut:
+            yield base64.b64decode(data[:cut])
+    if remainder:
+        raise ValueError("Truncated base64 stream")
+
+
+def _utf8_complete(data: bytes) -> int:
+    """Длина префикса без оборванной на конце UTF-8 последовательности"""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return len(data)
+        if byte >= 0xC0:
+            needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return len(data) if back >= needed else len(data) - back
+    return len(data)
+
+
+async def json_string_field(
+    chunks: AsyncIterable[bytes], fields: Collection[str]
+) -> AsyncIterator[str]:
+    """Обратное к json_body: значение первого строкового поля из fields потоком"""
+    keys = {codec.dumps_bytes(field) for field in fields}
+    iterator = chunks.__aiter__()
+    buffer = b""
+
+    async def more() -> bool:
+        nonlocal buffer
+        try:
+            buffer += await iterator.__anext__()
+        except StopAsyncIteration:
+            return False
+        return True
+
+    # Строки пропускаются целиком, чтобы не принять текст значения за ключ
+    while True:
+        quote = buffer.find(b'"')
+        if quote < 0:
+            buffer = b""
+            if not await more():
+                return
+            continue
+
+        buffer = buffer[quote:]
+        match = _JSON_STRING.match(buffer)
+        if match is None:
+            if not await more():
+                return
+            continue
+
+        rest = buffer[match.end() :].lstrip()
+        if rest[:1] == b":":
+            value = rest[1:].lstrip()
+            if not value:
+                if not await more():
+                    return
+                continue
+            if match.group() in keys and value[:1] == b'"':
+                buffer = value[1:]
+                break
+        elif not rest:
+            if not await more():
+                return
+            continue
+        buffer = buffer[match.end() :]
+
+    while True:
+        end = _JSON_STRING_BODY.match(buffer).end()
+        closed = buffer[end : end + 1] == b'"'
+        cut = end
+        if not closed:
+            if _HIGH_SURROGATE.search(buffer, 0, cut):
+                cut -= 6
+            cut = _utf8_complete(buffer[:cut])
+
+        if cut:
+            yield codec.loads(b'"' + buffer[:cut] + b'"')
+            buffer = buffer[cut:]
+        if closed:
+            return
+        if not await more():
+            raise ValueError("Unterminated JSON string")
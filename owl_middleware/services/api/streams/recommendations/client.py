@@ -1,17 +1,24 @@
 import aiohttp
 import asyncio
-import json
 from typing import Callable, Dict, Any, Optional, List
 from fastbot.core import Result, Ok, Err
 from fastbot.logger.logger import Logger
+from services import codec
 
 
 class SSEClient:
     """Клиент для обработки Server-Sent Events"""
 
-    def __init__(self, url: str, session: Optional[aiohttp.ClientSession] = None):
+    def __init__(
+        self,
+        url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ):
         self.url = url
         self.session = session or aiohttp.ClientSession()
+        self._owns_session = session is None
+        self.timeout = timeout
         self.event_handlers: Dict[str, List[Callable]] = {
             "message": [],  # для data: события
             "end": [],  # для event: end
@@ -49,7 +56,11 @@ class SSEClient:
 
     async def connect(self, headers: Optional[Dict] = None) -> Result[bool, Exception]:
         try:
-            async with self.session.get(self.url, headers=headers) as response:
+            request_kwargs = {"headers": headers}
+            if self.timeout is not None:
+                request_kwargs["timeout"] = self.timeout
+
+            async with self.session.get(self.url, **request_kwargs) as response:
                 if response.status != 200:
                     return Err(Exception(f"Failed to connect: {response.status}"))
 
@@ -59,23 +70,23 @@ class SSEClient:
                 self.running = True
 
                 async for line in response.content:
-                    line = line.decode("utf-8").rstrip("\n")
+                    line = line.rstrip(b"\r\n")
 
-                    if line.startswith("data:"):
-                        data_str = line[5:].lstrip()
+                    if line.startswith(b"data:"):
+                        data_bytes = line[5:].lstrip()
                         try:
-                            data = json.loads(data_str)
+                            data = codec.loads(data_bytes)
                             self._emit("message", data)
-                        except json.JSONDecodeError:
-                            self._emit("message", data_str)
+                        except codec.DecodeError:
+                            self._emit("message", data_bytes.decode("utf-8"))
 
-                    elif line.startswith("event:"):
+                    elif line.startswith(b"event:"):
                         event_name = line[6:].lstrip()
-                        if event_name == "end":
+                        if event_name == b"end":
                             self._emit("end")
                             break
 
-                    elif line == "":
+                    elif line == b"":
                         continue
 
                 return Ok(True)
@@ -106,7 +117,8 @@ class SSEClient:
     async def close(self):
         """Закрытие клиента"""
         await self.stop()
-        await self.session.close()
+        if self._owns_session:
+            await self.session.close()
 
 
 class SSEConnectionPool:
@@ -6,8 +6,9 @@ from .client import SSEClient
 
 
 class RecommendationStream:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool=None):
         self.base_url = base_url
+        self.pool = pool
         self.client: Optional[SSEClient] = None
         self._paths_handlers: List[Callable] = []
         self._complete_handlers: List[Callable] = []
@@ -52,15 +53,20 @@ class RecommendationStream:
     async def connect(
         self, user_id: str, container_id: str, headers: Optional[Dict] = None
     ):
-        url = f"{self.base_url}/recommendations/stream"
+        path = "/recommendations/stream"
 
         if headers is None:
             headers = {}
 
         params = f"?user_id={user_id}&container_id={container_id}"
-        url_with_params = url + params
 
-        self.client = SSEClient(url_with_params)
+        if self.pool is not None:
+            session = await self.pool.get_session()
+            self.client = SSEClient(
+                path + params, session, timeout=self.pool.stream_timeout
+            )
+        else:
+            self.client = SSEClient(self.base_url + path + params)
 
         Logger.info("CONNECT TO STREAM")
 
@@ -77,8 +83,9 @@ class RecommendationStream:
 
 
 class RecommendationStreamManager:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool=None):
         self.base_url = base_url
+        self.pool = pool
         self.stream: Optional[RecommendationStream] = None
         self.listeners: Dict[str, List[Callable]] = {}
         self.user_container_key: Optional[str] = None
@@ -92,7 +99,7 @@ class RecommendationStreamManager:
             if self.stream:
                 await self.stream.close()
 
-            self.stream = RecommendationStream(self.base_url)
+            self.stream = RecommendationStream(self.base_url, self.pool)
             await self.stream.connect(user_id, container_id)
             self.user_container_key = key
 
@@ -103,6 +110,13 @@ class RecommendationStreamManager:
         self.listeners[listener_id] = {"on_paths": on_paths, "on_complete": on_complete}
         return listener_id
 
+    async def close(self):
+        if self.stream:
+            await self.stream.close()
+            self.stream = None
+        self.user_container_key = None
+        self.listeners.clear()
+
     def _broadcast_paths(self, container_id: str, user_id: str, paths: List[str]):
         """Шлем всем подписанным клиентам"""
         for listener in self.listeners.values():
@@ -10,7 +10,7 @@ class SystemHandler:
 
     @result_try
     async def health_check(self) -> Result[bool, Exception]:
-        result = await self.client._make_request("GET", "/health")
+        result = await self.client._make_request("GET", "/health", breaker=False)
         return Ok(result.is_ok())
 
     @result_try
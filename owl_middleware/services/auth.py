@@ -1,18 +1,36 @@
 import jwt
 import hashlib
+import time
 
 from datetime import datetime, timedelta
-from fastbot.core import Result, result_try
+from typing import Any, Dict, Optional, Set
+from fastbot.core import Result, result_try, Err, Ok
 from fastbot.logger import Logger
 from models import User, UserCreate
+from .cache import TTLCache
+from .password import PasswordHasher
+from .user_cache import UserCache
 
 
 class AuthService:
-    def __init__(self, db_service, jwt_secret: str, algorithm: str = "HS256"):
+    def __init__(
+        self,
+        db_service,
+        jwt_secret: str,
+        algorithm: str = "HS256",
+        token_cache: Optional[TTLCache] = None,
+        user_cache: Optional[UserCache] = None,
+        password_hasher: Optional[PasswordHasher] = None,
+    ):
         self.db_service = db_service
         self.users = self.db_service.db["users"]
         self.jwt_secret = jwt_secret
         self.algorithm = algorithm
+        self.token_cache = token_cache or TTLCache(max_entries=10000, ttl=300.0)
+        self.token_cache.on_remove = self._forget_token
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self.user_cache = user_cache or UserCache()
+        self.password_hasher = password_hasher or PasswordHasher()
 
     async def ensure_indexes(self):
         await self.users.create_index("id", unique=True)
@@ -25,7 +43,6 @@ class AuthService:
 
     @result_try
     async def get_user(self, user_id: int) -> Result[User, Exception]:
-        Logger.error(f"{user_id}")
         user = await self.users.find_one({"id": user_id})
         return User(**user) if user else None
 
@@ -35,6 +52,17 @@ class AuthService:
         Logger.debug(User(**user) if user else None)
         return User(**user) if user else None
 
+    @result_try
+    async def get_cached_user_by_tg_id(self, tg_id: int) -> Result[User, Exception]:
+        found, user = await self.user_cache.get(tg_id)
+        if found:
+            return Ok(user)
+
+        user_result = await self.get_user_by_tg_id(tg_id)
+        if user_result.is_ok():
+            await self.user_cache.set(tg_id, user_result.unwrap())
+        return user_result
+
     @result_try
     async def get_user_by_email(self, email: str) -> Result[User, Exception]:
         user = await self.users.find_one({"email": email})
@@ -52,14 +80,30 @@ class AuthService:
         user_dict = user_data.dict()
         user_dict["id"] = user_id
         user_dict["registered_at"] = datetime.now().isoformat()
-
-        if user_dict.get("password"):
-            user_dict["password_hash"] = self._hash_password(user_dict.pop("password"))
+        password = user_dict.pop("password", None)
 
         user = User(**user_dict)
-        await self.users.insert_one(user.dict())
+        # Хэш есть только в документе Mongo, модель User его не отдает
+        document = user.dict()
+        if password:
+            document["password_hash"] = await self.password_hasher.hash(password)
+        await self.users.insert_one(document)
+        if user.tg_id is not None:
+            await self.user_cache.invalidate(user.tg_id)
         return user
 
+    @result_try
+    async def update_user(
+        self, user_id: int, update_data: dict
+    ) -> Result[bool, Exception]:
+        before = await self.users.find_one_and_update(
+            {"id": user_id}, {"$set": update_data}, projection={"tg_id": 1}
+        )
+        self.invalidate_user(user_id)
+        if before and before.get("tg_id") is not None:
+            await self.user_cache.invalidate(before["tg_id"])
+        return Ok(before is not None)
+
     @result_try
     async def register_telegram_user(
         self, tg_user_data: dict
@@ -86,12 +130,6 @@ class AuthService:
         )
         return await self.create_user(user_create)
 
-    def _hash_password(self, password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def _verify_password(self, password: str, password_hash: str) -> bool:
-        return self._hash_password(password) == password_hash
-
     @result_try
     async def authenticate_email(
         self, email: str, password: str
@@ -100,9 +138,23 @@ class AuthService:
         if not user_data:
             return Result.Err(Exception("User not found"))
 
-        if not self._verify_password(password, user_data.get("password_hash", "")):
+        valid, needs_rehash = await self.password_hasher.verify(
+            password, user_data.get("password_hash", "")
+        )
+        if not valid:
             return Result.Err(Exception("Invalid password"))
 
+        if needs_rehash:
+            password_hash = await self.password_hasher.hash(password)
+            # Через update_user, чтобы сбросить кэши токенов и пользователя
+            update_result = await self.update_user(
+                user_data["id"], {"password_hash": password_hash}
+            )
+            if update_result.is_err():
+                Logger.warning(f"Password rehash failed: {update_result.unwrap_err()}")
+            else:
+                self.password_hasher.rehashed += 1
+
         return Result.Ok(User(**user_data))
 
     def generate_jwt_token(self, user, expires_hours: int = 24) -> str:
@@ -124,11 +176,46 @@ class AuthService:
         except jwt.InvalidTokenError:
             raise Exception("Invalid token")
 
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def invalidate_user(self, user_id: int) -> None:
+        for key in self._tokens_by_user.pop(user_id, set()):
+            self.token_cache.pop(key)
+
+    def _cache_token(self, key: str, payload: dict, user: User) -> None:
+        ttl = min(self.token_cache.ttl, payload["exp"] - time.time())
+        if ttl <= 0:
+            return
+
+        self.token_cache.set(key, (payload, user), ttl=ttl)
+        self._tokens_by_user.setdefault(user.id, set()).add(key)
+
+    def _forget_token(self, key: str, value: Any) -> None:
+        # Индекс живет ровно столько, сколько записи кэша: истечение,
+        # вытеснение и инвалидация убирают ключ и отсюда
+        user_id = value[1].id
+        keys = self._tokens_by_user.get(user_id)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._tokens_by_user[user_id]
+
     @result_try
     async def get_user_by_token(self, token: str) -> Result[User, Exception]:
+        key = self._token_key(token)
+        cached = self.token_cache.get(key)
+        if cached is not None:
+            return Ok(cached[1])
+
         payload_result = self.verify_jwt_token(token)
         if payload_result.is_err():
-            return Result.err(payload_result.unwrap_err())
+            return Err(payload_result.unwrap_err())
 
         payload = payload_result.unwrap()
-        return await self.get_user(payload["user_id"])
+        user_result = await self.get_user(payload["user_id"])
+        if user_result.is_ok() and user_result.unwrap() is not None:
+            self._cache_token(key, payload, user_result.unwrap())
+        return user_result
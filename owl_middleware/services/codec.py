@@ -0,0 +1,63 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    DecodeError = orjson.JSONDecodeError
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    DecodeError = msgspec.DecodeError
+
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+    _decoder = msgspec.json.Decoder()
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def loads(data: bytes | str) -> Any:
+        return _decoder.decode(data)
+
+else:
+    BACKEND = "json"
+    DecodeError = json.JSONDecodeError
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode("utf-8")
@@ -1,20 +1,80 @@
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
 from fastbot.logger import Logger
-from models import User, Tariff, Label, Container
+from models import User, Tariff, Label, Container, Page
 from fastbot.core import Result, result_try, Err, Ok
+from pymongo.errors import PyMongoError
 from .db import DBService
 from .api import ApiService
+from .cache import TTLCache
 from .file import FileService
+from .pagination import clamp_limit, find_page
 
 
 class ContainerService:
     def __init__(
-        self, db_service: DBService, api_service: ApiService, file_service: FileService
+        self,
+        db_service: DBService,
+        api_service: ApiService,
+        file_service: FileService,
+        cache: Optional[TTLCache] = None,
     ):
         self.db_service = db_service
         self.api_service = api_service
         self.containers = self.db_service.db["containers"]
         self.file_service = file_service
+        self.cache = cache or TTLCache(max_entries=4096, ttl=30.0)
+        self.watch_task: Optional[asyncio.Task] = None
+        self.watch_restarts = 0
+
+    def invalidate_container(self, container_id: str) -> None:
+        self.cache.pop(container_id)
+
+    @result_try
+    async def get_cached_container(
+        self, container_id: str
+    ) -> Result[Container, Exception]:
+        container = self.cache.get(container_id)
+        if container is not None:
+            return Ok(container)
+
+        container_result = await self.get_container(container_id)
+        if container_result.is_ok():
+            self.cache.set(container_id, container_result.unwrap())
+        return container_result
+
+    async def _watch_changes(self, max_delay: float = 60.0) -> None:
+        operations = ["update", "replace", "delete"]
+        pipeline = [{"$match": {"operationType": {"$in": operations}}}]
+        delay = 1.0
+        while True:
+            try:
+                async with self.containers.watch(
+                    pipeline, full_document="updateLookup"
+                ) as stream:
+                    # События, пропущенные пока поток был закрыт, не восстановить
+                    self.cache.clear()
+                    delay = 1.0
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if document and "id" in document:
+                            self.invalidate_container(document["id"])
+                        else:
+                            # В событии удаления есть только _id, а кэш ключуется по id
+                            self.cache.clear()
+            except PyMongoError as e:
+                self.watch_restarts += 1
+                Logger.warning(
+                    f"Container change stream stopped: {e}, restarting in {delay:.0f}s"
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    def watch_changes(self) -> asyncio.Task:
+        """Инвалидация кэша по change stream, требует replica set"""
+        if self.watch_task is None or self.watch_task.done():
+            self.watch_task = asyncio.create_task(self._watch_changes())
+        return self.watch_task
 
     @result_try
     async def get_container(self, container_id: str) -> Result[Container, Exception]:
@@ -33,6 +93,22 @@ class ContainerService:
         # Logger.debug([Container(**container) for container in containers])
         return Ok([Container(**container) for container in containers])
 
+    @result_try
+    async def get_containers_page(
+        self, user_id: str, after: Optional[str] = None, limit: Optional[int] = None
+    ) -> Result[Page, Exception]:
+        limit = clamp_limit(limit)
+        documents, next_cursor = await find_page(
+            self.containers, {"user_id": user_id}, after, limit
+        )
+        return Ok(
+            Page(
+                items=[Container(**document) for document in documents],
+                next_cursor=next_cursor,
+                limit=limit,
+            )
+        )
+
     @result_try
     async def get_container_metrics(
         self, container_id: str
@@ -82,47 +158,9 @@ class ContainerService:
     @result_try
     async def delete_container(self, container_id: str) -> Result[bool, Exception]:
         result = await self.containers.delete_one({"id": container_id})
+        self.invalidate_container(container_id)
         return Ok(result.deleted_count > 0)
 
-    @result_try
-    async def check_container_limits(
-        self, container_id: str
-    ) -> Result[Dict[str, Any], Exception]:
-        container_result = await self.get_container(container_id)
-        if container_result.is_err():
-            return container_result
-
-        file_service = FileService(self.db_service, self.api_service)
-        container = container_result.unwrap()
-        files = await file_service.get_files_by_container(container.id)
-
-        total_size = sum(file.size or 0 for file in files)
-
-        limits_status = {
-            "storage": {
-                "used": total_size,
-                "limit": container.tariff.storage_quota,
-                "exceeded": total_size > container.tariff.storage_quota,
-                "usage_percent": (
-                    (total_size / container.tariff.storage_quota * 100)
-                    if container.tariff.storage_quota > 0
-                    else 0
-                ),
-            },
-            "files": {
-                "used": len(files),
-                "limit": container.tariff.file_limit,
-                "exceeded": len(files) > container.tariff.file_limit,
-                "usage_percent": (
-                    (len(files) / container.tariff.file_limit * 100)
-                    if container.tariff.file_limit > 0
-                    else 0
-                ),
-            },
-        }
-
-        return Ok(limits_status)
-
     @result_try
     async def update_container(
         self, container_id: str, update_data: dict
@@ -151,6 +189,7 @@ class ContainerService:
         result = await self.containers.update_one(
             {"id": container_id}, {"$set": update_data}
         )
+        self.invalidate_container(container_id)
         return Ok(result.modified_count > 0)
 
     @result_try
@@ -174,7 +213,9 @@ class ContainerService:
         if api_result.is_err():
             return Err(api_result.unwrap())
 
+        await self.file_service.drop_container_usage(container_id)
         result = await self.containers.delete_one({"id": container_id})
+        self.invalidate_container(container_id)
         return Ok(result.deleted_count > 0)
 
     @result_try
@@ -186,9 +227,13 @@ class ContainerService:
             return container_result
 
         container = container_result.unwrap()
-        files = await self.file_service.get_files_by_container(container.id)
+        usage_result = await self.file_service.get_container_usage(container.id)
+        if usage_result.is_err():
+            return usage_result
 
-        total_size = sum(file.size or 0 for file in files)
+        usage = usage_result.unwrap()
+        total_size = usage["total_size"]
+        total_files = usage["total_files"]
         storage_usage_percent = (
             (total_size / container.tariff.storage_quota * 100)
             if container.tariff.storage_quota > 0
@@ -198,14 +243,14 @@ class ContainerService:
         stats = {
             "container_id": container_id,
             "user_id": container.user_id,
-            "total_files": len(files),
+            "total_files": total_files,
             "total_size": total_size,
             "storage_quota": container.tariff.storage_quota,
             "storage_usage_percent": round(storage_usage_percent, 2),
             "memory_limit": container.tariff.memory_limit,
             "file_limit": container.tariff.file_limit,
             "files_usage_percent": (
-                (len(files) / container.tariff.file_limit * 100)
+                (total_files / container.tariff.file_limit * 100)
                 if container.tariff.file_limit > 0
                 else 0
             ),
@@ -226,22 +271,35 @@ class ContainerService:
         if container_result.is_err():
             return container_result
 
-        file_service = FileService(self.db_service, self.api_service)
         container = container_result.unwrap()
-        files = await file_service.get_files_by_container(container.id)
+        usage_result = await self.file_service.get_container_usage(container.id)
+        if usage_result.is_err():
+            return usage_result
 
-        total_size = sum(file.size or 0 for file in files)
+        usage = usage_result.unwrap()
+        total_size = usage["total_size"]
+        total_files = usage["total_files"]
 
         limits_status = {
             "storage": {
                 "used": total_size,
                 "limit": container.tariff.storage_quota,
                 "exceeded": total_size > container.tariff.storage_quota,
+                "usage_percent": (
+                    (total_size / container.tariff.storage_quota * 100)
+                    if container.tariff.storage_quota > 0
+                    else 0
+                ),
             },
             "files": {
-                "used": len(files),
+                "used": total_files,
                 "limit": container.tariff.file_limit,
-                "exceeded": len(files) > container.tariff.file_limit,
+                "exceeded": total_files > container.tariff.file_limit,
+                "usage_percent": (
+                    (total_files / container.tariff.file_limit * 100)
+                    if container.tariff.file_limit > 0
+                    else 0
+                ),
             },
             "memory": {"limit": container.tariff.memory_limit},
         }
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict
+from fastbot.logger import Logger
+from redis.exceptions import RedisError
+
+from .redis import RedisService
+
+
+class WorkerCoordinator:
+    """Координация нескольких воркеров бота через Redis"""
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        prefix: str = "owl:bot",
+        dedup_ttl: int = 3600,
+        lock_ttl: float = 30.0,
+        processing_ttl: int = 120,
+    ):
+        self.redis_service = redis_service
+        self.prefix = prefix
+        self.dedup_ttl = dedup_ttl
+        self.lock_ttl = lock_ttl
+        self.processing_ttl = processing_ttl
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.claimed = 0
+        self.duplicates = 0
+        self.claim_errors = 0
+        self.released = 0
+        self.leading: Dict[str, bool] = {}
+
+    def _update_key(self, update_id: int) -> str:
+        return f"{self.prefix}:update:{update_id}"
+
+    async def claim_update(self, update_id: int) -> bool:
+        """True, если апдейт еще не обрабатывается и не обработан другим воркером"""
+        # Короткий TTL на время обработки: упавший воркер не заблокирует повтор
+        result = await self.redis_service.set(
+            self._update_key(update_id),
+            self.worker_id,
+            ex=self.processing_ttl,
+            nx=True,
+        )
+        if result.is_err():
+            # Redis недоступен: лучше обработать дважды, чем потерять апдейт
+            Logger.warning(f"Update claim failed: {result.unwrap_err()}")
+            self.claim_errors += 1
+            return True
+
+        if result.unwrap():
+            self.claimed += 1
+            return True
+
+        self.duplicates += 1
+        return False
+
+    async def complete_update(self, update_id: int) -> None:
+        result = await self.redis_service.set(
+            self._update_key(update_id), "done", ex=self.dedup_ttl
+        )
+        if result.is_err():
+            Logger.warning(f"Update completion mark failed: {result.unwrap_err()}")
+
+    async def release_update(self, update_id: int) -> None:
+        """Снимает захват после ошибки обработчика, чтобы повтор Telegram прошел"""
+        result = await self.redis_service.delete(self._update_key(update_id))
+        if result.is_err():
+            Logger.warning(f"Update release failed: {result.unwrap_err()}")
+            return
+        self.released += 1
+
+    async def run_exclusive(
+        self, name: str, start: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Запускает start только на одном воркере, остальные ждут своей очереди"""
+        interval = self.lock_ttl / 3
+
+        while True:
+            lock_result = await self.redis_service.lock(
+                f"{self.prefix}:leader:{name}", timeout=self.lock_ttl
+            )
+            if lock_result.is_err():
+                Logger.warning(
+                    f"Leader lock unavailable: {lock_result.unwrap_err()}"
+                )
+                await asyncio.sleep(interval)
+                continue
+
+            lock = lock_result.unwrap()
+            try:
+                acquired = await lock.acquire(blocking=False)
+            except Exception as e:
+                Logger.warning(f"Leader lock acquire failed: {e}")
+                acquired = False
+
+            if not acquired:
+                await asyncio.sleep(interval)
+                continue
+
+            Logger.info(f"Worker {self.worker_id} is leading '{name}'")
+            self.leading[name] = True
+            task = asyncio.create_task(start())
+            try:
+                while True:
+                    done, _ = await asyncio.wait({task}, timeout=interval)
+                    if done:
+                        return task.result()
+                    try:
+                        await lock.reacquire()
+                    except RedisError as e:
+                        Logger.warning(f"Lost leadership of '{name}': {e}")
+                        task.cancel()
+                        await asyncio.gather(task, return_exceptions=True)
+                        break
+            finally:
+                self.leading[name] = False
+                if not task.done():
+                    task.cancel()
+                try:
+                    await lock.release()
+                except RedisError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "claimed": self.claimed,
+            "duplicates": self.duplicates,
+            "claim_errors": self.claim_errors,
+            "released": self.released,
+            "leading": dict(self.leading),
+        }
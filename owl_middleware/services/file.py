@@ -1,15 +1,41 @@
-from typing import Any, Dict
-from models import File, User, Container
+import asyncio
+from typing import Any, AsyncIterable, Dict, List, Optional
+from models import File, User, Container, Page
 from fastbot.core import Result, result_try, Err, Ok
+from fastbot.logger import Logger
+from pymongo import ReturnDocument
 from .db import DBService
 from .api import ApiService
+from .pagination import clamp_limit, find_page
+
+
+def stored_encoding(mime_type: Optional[str]) -> str:
+    """Как содержимое хранится в VFS: PDF и text/* текстом, остальное base64"""
+    if mime_type and (mime_type.startswith("text/") or mime_type == "application/pdf"):
+        return "text"
+    return "base64"
 
 
 class FileService:
-    def __init__(self, db_service: DBService, api_service: ApiService):
+    def __init__(
+        self, db_service: DBService, api_service: ApiService, track_usage: bool = False
+    ):
         self.db_service = db_service
         self.api_service = api_service
         self.files = self.db_service.db["files"]
+        self.container_stats = self.db_service.db["container_stats"]
+        self.track_usage = track_usage
+        self.reconcile_task: Optional[asyncio.Task] = None
+
+    async def _inc_usage(self, container_id: str, files: int, size: int):
+        # Без upsert: документ создает только засев по коллекции files в
+        # get_container_usage, иначе уже существующие файлы потерялись бы
+        if not self.track_usage or not container_id:
+            return
+        await self.container_stats.update_one(
+            {"container_id": container_id},
+            {"$inc": {"total_files": files, "total_size": size}},
+        )
 
     @result_try
     async def get_file(self, file_id: str) -> Result[File, Exception]:
@@ -26,13 +52,14 @@ class FileService:
 
         file = File(**file_data)
         await self.files.insert_one(file.model_dump())
+        await self._inc_usage(file.container_id, 1, file.size or 0)
         return Ok(file)
 
     @result_try
     async def create_file_with_sync(
         self, file_data: dict, content: str
     ) -> Result[File, Exception]:
-        create_db_result = await self.create_file(file_data)
+        create_db_result = await self.create_file({"encoding": "text", **file_data})
         if create_db_result.is_err():
             return create_db_result
 
@@ -47,6 +74,25 @@ class FileService:
 
         return Ok(file)
 
+    @result_try
+    async def create_file_with_sync_stream(
+        self, file_data: dict, chunks: AsyncIterable[bytes], encoding: str = "base64"
+    ) -> Result[File, Exception]:
+        create_db_result = await self.create_file({**file_data, "encoding": encoding})
+        if create_db_result.is_err():
+            return create_db_result
+
+        file = create_db_result.unwrap()
+
+        create_api_result = await self.api_service.files.create_file_stream_from_model(
+            file, chunks, encoding
+        )
+        if create_api_result.is_err():
+            await self.delete_file(file.id)
+            return create_api_result
+
+        return Ok(file)
+
     @result_try
     async def get_file_with_content(
         self, file_id: str
@@ -77,11 +123,38 @@ class FileService:
     async def update_file(
         self, file_id: str, update_data: dict
     ) -> Result[bool, Exception]:
+        moves_usage = "size" in update_data or "container_id" in update_data
+        if self.track_usage and moves_usage:
+            before = await self.files.find_one_and_update(
+                {"id": file_id},
+                {"$set": update_data},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if before is None:
+                return False
+            old_size = before.get("size") or 0
+            new_size = update_data.get("size", old_size) or 0
+            new_container_id = update_data.get("container_id", before["container_id"])
+            await self._inc_usage(before["container_id"], -1, -old_size)
+            await self._inc_usage(new_container_id, 1, new_size)
+            return True
+
         result = await self.files.update_one({"id": file_id}, {"$set": update_data})
         return result.modified_count > 0
 
     @result_try
     async def delete_file(self, file_id: str) -> Result[bool, Exception]:
+        if self.track_usage:
+            deleted = await self.files.find_one_and_delete(
+                {"id": file_id}, projection={"container_id": 1, "size": 1}
+            )
+            if deleted is None:
+                return False
+            await self._inc_usage(
+                deleted.get("container_id"), -1, -(deleted.get("size") or 0)
+            )
+            return True
+
         result = await self.files.delete_one({"id": file_id})
         return result.deleted_count > 0
 
@@ -91,3 +164,140 @@ class FileService:
     ) -> Result[list[File], Exception]:
         files = await self.files.find({"container_id": container_id}).to_list(None)
         return [File(**file) for file in files]
+
+    @result_try
+    async def get_files_by_containers(
+        self, container_ids: List[str], limit: Optional[int] = None
+    ) -> Result[List[File], Exception]:
+        """Первые limit файлов нескольких контейнеров одним запросом"""
+        limit = clamp_limit(limit)
+        documents = (
+            await self.files.find({"container_id": {"$in": container_ids}})
+            .sort("_id", 1)
+            .limit(limit)
+            .to_list(limit)
+        )
+        return Ok([File(**document) for document in documents])
+
+    @result_try
+    async def get_files_page(
+        self,
+        container_id: str,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Result[Page, Exception]:
+        limit = clamp_limit(limit)
+        documents, next_cursor = await find_page(
+            self.files, {"container_id": container_id}, after, limit
+        )
+        return Ok(
+            Page(
+                items=[File(**document) for document in documents],
+                next_cursor=next_cursor,
+                limit=limit,
+            )
+        )
+
+    @result_try
+    async def get_files_by_names(
+        self, container_id: str, names: List[str]
+    ) -> Result[List[File], Exception]:
+        files = await self.files.find(
+            {"container_id": container_id, "name": {"$in": names}}
+        ).to_list(len(names) or None)
+        return Ok([File(**file) for file in files])
+
+    @result_try
+    async def get_usage_by_containers(
+        self, container_ids: List[str]
+    ) -> Result[Dict[str, Dict[str, int]], Exception]:
+        pipeline = [
+            {"$match": {"container_id": {"$in": container_ids}}},
+            {
+                "$group": {
+                    "_id": "$container_id",
+                    "total_files": {"$sum": 1},
+                    "total_size": {"$sum": {"$ifNull": ["$size", 0]}},
+                }
+            },
+        ]
+        usage = {
+            container_id: {"total_files": 0, "total_size": 0}
+            for container_id in container_ids
+        }
+        async for row in self.files.aggregate(pipeline):
+            usage[row["_id"]] = {
+                "total_files": row["total_files"],
+                "total_size": row["total_size"],
+            }
+        return Ok(usage)
+
+    @result_try
+    async def get_container_usage(
+        self, container_id: str
+    ) -> Result[Dict[str, int], Exception]:
+        if self.track_usage:
+            counters = await self.container_stats.find_one(
+                {"container_id": container_id}, projection={"_id": 0}
+            )
+            if counters is not None:
+                return Ok(
+                    {
+                        "total_files": counters.get("total_files", 0),
+                        "total_size": counters.get("total_size", 0),
+                    }
+                )
+
+        usage_result = await self.get_usage_by_containers([container_id])
+        if usage_result.is_err():
+            return usage_result
+
+        usage = usage_result.unwrap()[container_id]
+        if self.track_usage:
+            await self.container_stats.update_one(
+                {"container_id": container_id}, {"$setOnInsert": usage}, upsert=True
+            )
+        return Ok(usage)
+
+    @result_try
+    async def rebuild_container_usage(
+        self, container_id: str
+    ) -> Result[Dict[str, int], Exception]:
+        """Пересчет счетчиков по коллекции files, если они разошлись"""
+        usage_result = await self.get_usage_by_containers([container_id])
+        if usage_result.is_err():
+            return usage_result
+
+        usage = usage_result.unwrap()[container_id]
+        await self.container_stats.update_one(
+            {"container_id": container_id}, {"$set": usage}, upsert=True
+        )
+        return Ok(usage)
+
+    def start_usage_reconcile(self, interval: float = 3600.0) -> None:
+        if self.track_usage and self.reconcile_task is None:
+            self.reconcile_task = asyncio.create_task(self.reconcile_usage(interval))
+
+    def stop_usage_reconcile(self) -> None:
+        if self.reconcile_task is not None:
+            self.reconcile_task.cancel()
+            self.reconcile_task = None
+
+    async def reconcile_usage(self, interval: float = 3600.0) -> None:
+        """Периодически выравнивает засеянные счетчики с коллекцией files"""
+        while True:
+            await asyncio.sleep(interval)
+            async for row in self.container_stats.find(
+                {}, projection={"_id": 0, "container_id": 1}
+            ):
+                result = await self.rebuild_container_usage(row["container_id"])
+                if result.is_err():
+                    Logger.warning(
+                        f"Usage rebuild for {row['container_id']} failed: "
+                        f"{result.unwrap_err()}"
+                    )
+
+    @result_try
+    async def drop_container_usage(self, container_id: str) -> Result[bool, Exception]:
+        result = await self.container_stats.delete_one({"container_id": container_id})
+        return Ok(result.deleted_count > 0)
@@ -1,12 +1,20 @@
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
 from fastbot.logger import Logger
-from models import File, Group, File2Group
+from models import File, Group, File2Group, Page
 from fastbot.core import Result, result_try, Err, Ok
 from datetime import datetime
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from .db import DBService
 from .file import FileService
 from .container import ContainerService
 from .api import ApiService
+from .cache import TTLCache
+from .indexes import IndexManager
+from .pagination import clamp_limit, find_page
+
+DUPLICATE_KEY_ERROR = 11000
+MEMBERSHIP_INDEX = [("group_id", 1), ("file_id", 1)]
 
 
 class GroupService:
@@ -16,6 +24,8 @@ class GroupService:
         container_service: ContainerService,
         file_service: FileService,
         api_service: ApiService,
+        stats_cache: Optional[TTLCache] = None,
+        index_manager: Optional[IndexManager] = None,
     ):
         self.db_service = db_service
         self.container_service = container_service
@@ -23,10 +33,54 @@ class GroupService:
         self.api_service = api_service
         self.groups = self.db_service.db["groups"]
         self.file2group = self.db_service.db["file2group"]
+        self.stats_cache = stats_cache or TTLCache(max_entries=1024, ttl=60.0)
+        self.index_manager = index_manager
+
+    def _membership_unique(self) -> bool:
+        # Пока уникальный индекс не построен (или не смог построиться),
+        # дубликаты отсекаются явной проверкой перед вставкой
+        return self.index_manager is not None and self.index_manager.has_unique_index(
+            "file2group", MEMBERSHIP_INDEX
+        )
+
+    def _invalidate_stats(self, *group_ids: str) -> None:
+        # id группы уникален только в контейнере: ключ кэша (container_id, group_id)
+        for key in self.stats_cache.keys():
+            if key[1] in group_ids:
+                self.stats_cache.pop(key)
+
+    async def _group_relations(self, group_id: str) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$match": {"group_id": group_id}},
+            {
+                "$lookup": {
+                    "from": "files",
+                    "localField": "file_id",
+                    "foreignField": "id",
+                    "as": "files",
+                }
+            },
+            {"$project": {"_id": 0, "file_id": 1, "files": 1}},
+        ]
+        return await self.file2group.aggregate(pipeline).to_list(None)
+
+    @staticmethod
+    def _relation_file(
+        relation: Dict[str, Any], container_id: str
+    ) -> Optional[Dict[str, Any]]:
+        for file in relation["files"]:
+            if file.get("container_id") == container_id:
+                return file
+        return None
 
     @result_try
-    async def get_group(self, group_id: str) -> Result[Group, Exception]:
-        group = await self.groups.find_one({"id": group_id})
+    async def get_group(
+        self, group_id: str, container_id: Optional[str] = None
+    ) -> Result[Group, Exception]:
+        query = {"id": group_id}
+        if container_id is not None:
+            query["container_id"] = container_id
+        group = await self.groups.find_one(query)
         return (
             Ok(Group(**group))
             if group
@@ -40,6 +94,25 @@ class GroupService:
         groups = await self.groups.find({"container_id": container_id}).to_list(None)
         return Ok([Group(**group) for group in groups])
 
+    @result_try
+    async def get_groups_page(
+        self,
+        container_id: str,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Result[Page, Exception]:
+        limit = clamp_limit(limit)
+        documents, next_cursor = await find_page(
+            self.groups, {"container_id": container_id}, after, limit
+        )
+        return Ok(
+            Page(
+                items=[Group(**document) for document in documents],
+                next_cursor=next_cursor,
+                limit=limit,
+            )
+        )
+
     @result_try
     async def create_group(
         self,
@@ -93,6 +166,7 @@ class GroupService:
                 ValueError(f"Group {group_id} not found in container {container_id}")
             )
 
+        self._invalidate_stats(group_id)
         Logger.info(f"Group {group_id} updated")
         return Ok(result.modified_count > 0)
 
@@ -105,6 +179,7 @@ class GroupService:
         result = await self.groups.delete_one(
             {"id": group_id, "container_id": container_id}
         )
+        self._invalidate_stats(group_id)
 
         if result.deleted_count > 0:
             Logger.info(f"Group {group_id} deleted from container {container_id}")
@@ -114,14 +189,16 @@ class GroupService:
     async def add_file_to_group(
         self, file_id: str, group_id: str
     ) -> Result[File2Group, Exception]:
-        existing = await self.file2group.find_one(
+        file2group = File2Group(file_id=file_id, group_id=group_id)
+        if not self._membership_unique() and await self.file2group.find_one(
             {"file_id": file_id, "group_id": group_id}
-        )
-        if existing:
+        ):
             return Err(ValueError(f"File {file_id} already in group {group_id}"))
-
-        file2group = File2Group(file_id=file_id, group_id=group_id)
-        await self.file2group.insert_one(file2group.dict())
+        try:
+            await self.file2group.insert_one(file2group.dict())
+        except DuplicateKeyError:
+            return Err(ValueError(f"File {file_id} already in group {group_id}"))
+        self._invalidate_stats(group_id)
         Logger.info(f"File {file_id} added to group {group_id}")
         return Ok(file2group)
 
@@ -133,144 +210,293 @@ class GroupService:
             {"file_id": file_id, "group_id": group_id}
         )
         if result.deleted_count > 0:
+            self._invalidate_stats(group_id)
             Logger.info(f"File {file_id} removed from group {group_id}")
         return Ok(result.deleted_count > 0)
 
     @result_try
     async def get_files_by_group(self, group_id: str) -> Result[List[File], Exception]:
-        group_result = await self.get_group(group_id)
+        group_result, relations = await asyncio.gather(
+            self.get_group(group_id), self._group_relations(group_id)
+        )
         if group_result.is_err():
             return group_result
         group = group_result.unwrap()
 
-        file_relations = await self.file2group.find({"group_id": group_id}).to_list(
-            None
-        )
-        if not file_relations:
-            return Ok([])
-
         files = []
-        for rel in file_relations:
+        for rel in relations:
             file_id = rel["file_id"]
-            file_obj = File(
-                id=file_id,
-                name=file_id.split("/")[-1] if "/" in file_id else file_id,
-                container_id=group.container_id,
-                user_id="",
-                created_at=None,
-                mime_type="application/octet-stream",
-                size=0,
+            file = self._relation_file(rel, group.container_id)
+            if file is not None:
+                files.append(File(**file))
+                continue
+
+            files.append(
+                File(
+                    id=file_id,
+                    name=file_id.split("/")[-1] if "/" in file_id else file_id,
+                    container_id=group.container_id,
+                    user_id="",
+                    created_at=None,
+                    mime_type="application/octet-stream",
+                    size=0,
+                )
             )
-            files.append(file_obj)
         return Ok(files)
 
     @result_try
     async def get_groups_by_file(self, file_id: str) -> Result[List[Group], Exception]:
-        file_relations = await self.file2group.find({"file_id": file_id}).to_list(None)
-
-        if not file_relations:
-            return Ok([])
-
-        groups = []
-        for rel in file_relations:
-            group_result = await self.get_group(rel["group_id"])
-            if group_result.is_ok():
-                groups.append(group_result.unwrap())
-
-        return Ok(groups)
+        # Имена групп уникальны только внутри контейнера, поэтому группа
+        # берется из контейнера файла, если файл есть в коллекции files
+        same_container = {
+            "$or": [
+                {"$eq": [{"$size": "$$container_ids"}, 0]},
+                {"$in": ["$container_id", "$$container_ids"]},
+            ]
+        }
+        pipeline = [
+            {"$match": {"file_id": file_id}},
+            {
+                "$lookup": {
+                    "from": "files",
+                    "localField": "file_id",
+                    "foreignField": "id",
+                    "as": "file",
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "groups",
+                    "let": {
+                        "group_id": "$group_id",
+                        "container_ids": "$file.container_id",
+                    },
+                    "pipeline": [
+                        {
+                            "$match": {
+                                "$expr": {
+                                    "$and": [
+                                        {"$eq": ["$id", "$$group_id"]},
+                                        same_container,
+                                    ]
+                                }
+                            }
+                        },
+                        {"$limit": 1},
+                    ],
+                    "as": "group",
+                }
+            },
+            {"$unwind": "$group"},
+            {"$replaceRoot": {"newRoot": "$group"}},
+            {"$project": {"_id": 0}},
+        ]
+        groups = await self.file2group.aggregate(pipeline).to_list(None)
+        return Ok([Group(**group) for group in groups])
 
     @result_try
     async def move_file_between_groups(
         self, file_id: str, from_group_id: str, to_group_id: str
     ) -> Result[bool, Exception]:
-        existing = await self.file2group.find_one(
-            {"file_id": file_id, "group_id": from_group_id}
-        )
-        if not existing:
-            return Err(ValueError(f"File {file_id} not found in group {from_group_id}"))
-
-        await self.remove_file_from_group(file_id, from_group_id)
-
-        await self.add_file_to_group(file_id, to_group_id)
+        try:
+            result = await self.file2group.update_one(
+                {"file_id": file_id, "group_id": from_group_id},
+                {"$set": {"group_id": to_group_id}},
+            )
+        except DuplicateKeyError:
+            # Файл уже в целевой группе: остается только убрать его из исходной
+            result = await self.file2group.delete_one(
+                {"file_id": file_id, "group_id": from_group_id}
+            )
+            if result.deleted_count == 0:
+                return Err(
+                    ValueError(f"File {file_id} not found in group {from_group_id}")
+                )
+        else:
+            if result.matched_count == 0:
+                return Err(
+                    ValueError(f"File {file_id} not found in group {from_group_id}")
+                )
 
+        self._invalidate_stats(from_group_id, to_group_id)
         Logger.info(f"File {file_id} moved from group {from_group_id} to {to_group_id}")
         return Ok(True)
 
     @result_try
     async def add_multiple_files_to_group(
         self, file_ids: List[str], group_id: str
-    ) -> Result[List[File2Group], Exception]:
-        results = []
-        for file_id in file_ids:
-            result = await self.add_file_to_group(file_id, group_id)
-            if result.is_ok():
-                results.append(result.unwrap())
-            else:
-                Logger.warning(
-                    f"Failed to add file {file_id} to group {group_id}: {result.unwrap_err()}"
+    ) -> Result[Dict[str, Any], Exception]:
+        file_ids = list(dict.fromkeys(file_ids))
+        outcomes = {file_id: "added" for file_id in file_ids}
+        if not self._membership_unique():
+            existing = await self.file2group.distinct(
+                "file_id", {"group_id": group_id, "file_id": {"$in": file_ids}}
+            )
+            for file_id in existing:
+                outcomes[file_id] = "duplicate"
+            file_ids = [file_id for file_id in file_ids if outcomes[file_id] == "added"]
+
+        relations = [
+            File2Group(file_id=file_id, group_id=group_id) for file_id in file_ids
+        ]
+        errors: Dict[str, str] = {}
+
+        if relations:
+            try:
+                await self.file2group.insert_many(
+                    [relation.dict() for relation in relations], ordered=False
                 )
-        Logger.info(f"Added {len(results)} files to group {group_id}")
-        return Ok(results)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    file_id = file_ids[error["index"]]
+                    if error.get("code") == DUPLICATE_KEY_ERROR:
+                        outcomes[file_id] = "duplicate"
+                    else:
+                        outcomes[file_id] = "error"
+                        errors[file_id] = error.get("errmsg", "")
+                        Logger.warning(
+                            f"Failed to add file {file_id} to group {group_id}: "
+                            f"{errors[file_id]}"
+                        )
+
+        added = [r for r in relations if outcomes[r.file_id] == "added"]
+        if added:
+            self._invalidate_stats(group_id)
+        Logger.info(f"Added {len(added)} files to group {group_id}")
+        return Ok(
+            {
+                "added": added,
+                "outcomes": [
+                    {"file_id": file_id, "status": status, "error": errors.get(file_id)}
+                    for file_id, status in outcomes.items()
+                ],
+            }
+        )
 
     @result_try
     async def remove_multiple_files_from_group(
         self, file_ids: List[str], group_id: str
-    ) -> Result[int, Exception]:
-        removed_count = 0
-        for file_id in file_ids:
-            result = await self.remove_file_from_group(file_id, group_id)
-            if result.is_ok() and result.unwrap():
-                removed_count += 1
+    ) -> Result[Dict[str, Any], Exception]:
+        file_ids = list(dict.fromkeys(file_ids))
+        query = {"group_id": group_id, "file_id": {"$in": file_ids}}
+
+        present = set(await self.file2group.distinct("file_id", query))
+        result = await self.file2group.delete_many(query)
+        if result.deleted_count:
+            self._invalidate_stats(group_id)
+
+        Logger.info(f"Removed {result.deleted_count} files from group {group_id}")
+        return Ok(
+            {
+                "removed": result.deleted_count,
+                "outcomes": [
+                    {
+                        "file_id": file_id,
+                        "status": "removed" if file_id in present else "not_found",
+                    }
+                    for file_id in file_ids
+                ],
+            }
+        )
 
-        Logger.info(f"Removed {removed_count} files from group {group_id}")
-        return Ok(removed_count)
+    async def _vfs_sizes(
+        self, user_id: str, container_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        listing_result = await self.api_service.containers.get_files_by_container_id(
+            user_id, container_id, include_content=False
+        )
+        if listing_result.is_err():
+            Logger.warning(
+                f"Could not list container {container_id} for group stats: "
+                f"{listing_result.unwrap_err()}"
+            )
+            return {}
+
+        sizes = {}
+        for entry in listing_result.unwrap():
+            for key in (entry.get("path"), entry.get("name")):
+                if key:
+                    sizes[key] = entry
+        return sizes
 
     @result_try
-    async def get_group_stats(self, group_id: str) -> Result[Dict[str, Any], Exception]:
-        group_result = await self.get_group(group_id)
+    async def get_group_stats(
+        self,
+        group_id: str,
+        user_id: Optional[str] = None,
+        container_id: Optional[str] = None,
+    ) -> Result[Dict[str, Any], Exception]:
+        if container_id is not None:
+            cached = self.stats_cache.get((container_id, group_id))
+            if cached is not None:
+                return Ok(cached)
+
+        group_result, relations = await asyncio.gather(
+            self.get_group(group_id, container_id), self._group_relations(group_id)
+        )
         if group_result.is_err():
             return group_result
-
         group = group_result.unwrap()
-        file_relations = await self.file2group.find({"group_id": group_id}).to_list(
-            None
-        )
-        file_ids = [rel["file_id"] for rel in file_relations]
 
-        total_size = 0
+        cache_key = (group.container_id, group_id)
+        if container_id is None:
+            cached = self.stats_cache.get(cache_key)
+            if cached is not None:
+                return Ok(cached)
+
         file_infos = []
-        for file_id in file_ids:
-            content_result = await self.api_service.files.get_file_content(
-                file_id, group.container_id
+        missing = []
+        for rel in relations:
+            file = self._relation_file(rel, group.container_id)
+            if file is None or file.get("size") is None:
+                missing.append(rel["file_id"])
+                continue
+            file_infos.append(
+                {
+                    "id": file["id"],
+                    "name": file.get("name") or file["id"].split("/")[-1],
+                    "size": file["size"],
+                    "created_at": file.get("created_at"),
+                }
             )
-            if content_result.is_ok():
-                content, explanation = content_result.unwrap()
-                size = len(content.encode("utf-8")) if content else 0
-                total_size += size
+
+        complete = not missing
+        if missing and user_id is not None:
+            complete = True
+            vfs_entries = await self._vfs_sizes(user_id, group.container_id)
+            for file_id in missing:
+                entry = vfs_entries.get(file_id) or vfs_entries.get(
+                    file_id.split("/")[-1]
+                )
+                if entry is None:
+                    Logger.warning(f"No size metadata for file {file_id} in stats")
+                    complete = False
+                    continue
                 file_infos.append(
                     {
                         "id": file_id,
                         "name": file_id.split("/")[-1],
-                        "size": size,
+                        "size": entry.get("size", 0),
                         "created_at": None,
                     }
                 )
-            else:
-                Logger.warning(
-                    f"Could not fetch file {file_id} for stats: {content_result.unwrap_err()}"
-                )
 
+        total_files = len(relations)
+        total_size = sum(info["size"] or 0 for info in file_infos)
         stats = {
             "group_id": group.id,
             "container_id": group.container_id,
             "description": group.description,
             "color": group.color,
             "created_at": group.created_at,
-            "total_files": len(file_ids),
+            "total_files": total_files,
             "total_size": total_size,
-            "average_file_size": total_size / len(file_ids) if file_ids else 0,
+            "average_file_size": total_size / total_files if total_files else 0,
             "files": file_infos,
         }
+        # Неполный результат не кэшируется, иначе его получат и следующие вызовы
+        if complete:
+            self.stats_cache.set(cache_key, stats)
         return Ok(stats)
 
     @result_try
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastbot.logger import Logger
+from pydantic import BaseModel
+from pymongo.errors import OperationFailure
+from .db import DBService
+
+
+class IndexSpec(BaseModel):
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    sparse: bool = False
+
+
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "users": [
+        IndexSpec(keys=[("id", 1)], unique=True),
+        IndexSpec(keys=[("tg_id", 1)], unique=True, sparse=True),
+        IndexSpec(keys=[("email", 1)], unique=True, sparse=True),
+    ],
+    "files": [
+        IndexSpec(keys=[("id", 1)], unique=True),
+        IndexSpec(keys=[("container_id", 1), ("size", 1)]),
+        IndexSpec(keys=[("container_id", 1), ("name", 1)]),
+        IndexSpec(keys=[("container_id", 1), ("_id", 1)]),
+    ],
+    "containers": [
+        IndexSpec(keys=[("id", 1)], unique=True),
+        IndexSpec(keys=[("user_id", 1), ("_id", 1)]),
+    ],
+    "container_stats": [
+        IndexSpec(keys=[("container_id", 1)], unique=True),
+    ],
+    "groups": [
+        IndexSpec(keys=[("container_id", 1), ("id", 1)], unique=True),
+        IndexSpec(keys=[("container_id", 1), ("_id", 1)]),
+        IndexSpec(keys=[("id", 1)]),
+    ],
+    "file2group": [
+        IndexSpec(keys=[("group_id", 1), ("file_id", 1)], unique=True),
+        IndexSpec(keys=[("file_id", 1)]),
+    ],
+}
+
+
+class IndexManager:
+    """Декларация индексов всех коллекций и их создание при старте"""
+
+    def __init__(
+        self,
+        db_service: DBService,
+        indexes: Optional[Dict[str, List[IndexSpec]]] = None,
+    ):
+        self.db_service = db_service
+        self.indexes = indexes or INDEXES
+        self.task: Optional[asyncio.Task] = None
+        self.created: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.unique: Set[Tuple[str, Tuple[Tuple[str, int], ...]]] = set()
+
+    async def _existing_keys(self, collection) -> List[List[Tuple[str, int]]]:
+        existing = []
+        async for index in collection.list_indexes():
+            keys = [(field, int(order)) for field, order in index["key"].items()]
+            existing.append(keys)
+            if index.get("unique"):
+                self.unique.add((collection.name, tuple(keys)))
+        return existing
+
+    def has_unique_index(
+        self, collection_name: str, keys: List[Tuple[str, int]]
+    ) -> bool:
+        """Уникальный индекс уже построен, и на него можно полагаться вместо проверок"""
+        return (collection_name, tuple(keys)) in self.unique
+
+    async def ensure_indexes(self) -> List[str]:
+        """Создает только отсутствующие индексы, ошибки одного не мешают остальным"""
+        for collection_name, specs in self.indexes.items():
+            collection = self.db_service.db[collection_name]
+            existing = await self._existing_keys(collection)
+
+            for spec in specs:
+                if spec.keys in existing:
+                    continue
+
+                options = {"unique": spec.unique}
+                if spec.sparse:
+                    options["sparse"] = True
+
+                try:
+                    name = await collection.create_index(spec.keys, **options)
+                except OperationFailure as e:
+                    Logger.error(f"Failed to create index on {collection_name}: {e}")
+                    self.failed[f"{collection_name}.{spec.keys}"] = str(e)
+                    continue
+
+                Logger.info(f"Index {collection_name}.{name} created")
+                self.created.append(f"{collection_name}.{name}")
+                if spec.unique:
+                    self.unique.add((collection_name, tuple(spec.keys)))
+
+        return self.created
+
+    def ensure_in_background(self) -> asyncio.Task:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.ensure_indexes())
+            self.task.add_done_callback(self._log_task_result)
+        return self.task
+
+    @staticmethod
+    def _log_task_result(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            Logger.error(f"Index bootstrap failed: {error}")
+
+    async def index_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        stats = {}
+        for collection_name in self.indexes:
+            collection = self.db_service.db[collection_name]
+            stats[collection_name] = [
+                {
+                    "name": row["name"],
+                    "ops": row["accesses"]["ops"],
+                    "since": row["accesses"]["since"],
+                }
+                async for row in collection.aggregate([{"$indexStats": {}}])
+            ]
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "declared": sum(len(specs) for specs in self.indexes.values()),
+            "created": list(self.created),
+            "failed": dict(self.failed),
+            "bootstrap_done": self.task is not None and self.task.done(),
+        }
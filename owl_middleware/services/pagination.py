@@ -0,0 +1,65 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Списки в боте: сообщение и клавиатура Telegram все равно не вместят больше
+BOT_PAGE_SIZE = 50
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Списки всегда ограничены: остальное клиент дочитывает по next_cursor"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> str:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+async def find_page(
+    collection, query: Dict[str, Any], after: Optional[str], limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Keyset-страница по _id: limit + 1 документ, чтобы узнать о следующей"""
+    if after:
+        try:
+            query = {**query, "_id": {"$gt": ObjectId(decode_cursor(after))}}
+        except InvalidId as e:
+            raise ValueError("Invalid pagination cursor") from e
+
+    documents = (
+        await collection.find(query).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+    )
+    if len(documents) <= limit:
+        return documents, None
+
+    documents = documents[:limit]
+    return documents, encode_cursor(str(documents[-1]["_id"]))
+
+
+def slice_page(
+    items: List[Dict[str, Any]], key: str, after: Optional[str], limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Keyset-страница по уже полученному списку, упорядоченному по key"""
+    ordered = sorted(items, key=lambda item: item.get(key, ""))
+    if after:
+        last = decode_cursor(after)
+        ordered = [item for item in ordered if item.get(key, "") > last]
+
+    if len(ordered) <= limit:
+        return ordered, None
+
+    ordered = ordered[:limit]
+    return ordered, encode_cursor(ordered[-1].get(key, ""))
@@ -0,0 +1,86 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+ALGORITHM = "pbkdf2_sha256"
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class PasswordHasher:
+    """PBKDF2-SHA256 в пуле потоков: event loop не блокируется на KDF"""
+
+    def __init__(
+        self,
+        iterations: int = 600_000,
+        max_workers: int = 4,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.iterations = iterations
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency or max_workers * 2)
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+
+    def _derive(self, password: str, salt: bytes, iterations: int) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+    def _hash_sync(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.iterations)
+        return f"{ALGORITHM}${self.iterations}${_b64(salt)}${_b64(digest)}"
+
+    def _verify_sync(self, password: str, password_hash: str) -> Tuple[bool, bool]:
+        if not password_hash.startswith(f"{ALGORITHM}$"):
+            # Старый формат: hex SHA-256 без соли
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, password_hash), True
+
+        try:
+            _, iterations, salt, digest = password_hash.split("$")
+            iterations = int(iterations)
+            expected = _unb64(digest)
+            actual = self._derive(password, _unb64(salt), iterations)
+        except ValueError:
+            return False, False
+
+        return hmac.compare_digest(actual, expected), iterations != self.iterations
+
+    async def _run(self, func, *args):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        self.hashed += 1
+        return await self._run(self._hash_sync, password)
+
+    async def verify(self, password: str, password_hash: str) -> Tuple[bool, bool]:
+        """(пароль верен, хэш нужно пересчитать с текущими параметрами)"""
+        self.verified += 1
+        return await self._run(self._verify_sync, password, password_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "algorithm": ALGORITHM,
+            "iterations": self.iterations,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
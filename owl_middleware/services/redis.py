@@ -1,222 +1,377 @@
-from typing import Any, Dict, List, Set, Union, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Set, Union, Optional
+from pydantic import BaseModel
 from fastbot.logger import Logger
 from fastbot.core import Result, result_try, Err, Ok
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline, PubSub
+from redis.asyncio.lock import Lock
+
+
+class RedisPoolConfig(BaseModel):
+    max_connections: int = 50
+    socket_timeout: Optional[float] = 5.0
+    connect_timeout: float = 2.0
+    health_check_interval: int = 30
+
+
+def _size(value: Any) -> str:
+    """Размер значения для логов вместо самого значения"""
+    if value is None:
+        return "nil"
+    if isinstance(value, (bytes, str)):
+        return f"{len(value)}b"
+    return type(value).__name__
+
+
+class RedisPipeline:
+    """Команды копятся в буфере и уходят на сервер одним запросом при выходе"""
+
+    def __init__(self, pipe: Pipeline):
+        self.pipe = pipe
+        self.results: List[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pipe, name)
+
+    async def __aenter__(self) -> "RedisPipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None and len(self.pipe):
+                self.results = await self.pipe.execute()
+        finally:
+            await self.pipe.reset()
 
 
 class RedisService:
-    def __init__(self, host: str, port: int, decode: bool):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        decode: bool,
+        pool_config: Optional[RedisPoolConfig] = None,
+        log_commands: bool = False,
+    ):
         self.host = host
         self.port = port
         self.decode = decode
+        self.pool_config = pool_config or RedisPoolConfig()
+        self.log_commands = log_commands
+        self.pool: Optional[redis.ConnectionPool] = None
         self.client: Optional[redis.Redis] = None
 
-    @result_try
-    async def connect(self) -> Result[bool, Exception]:
+    def _log(self, message: str, *args: Any) -> None:
+        # Форматирование только при включенном логировании команд
+        if self.log_commands:
+            Logger.debug(message % args)
+
+    def ensure_client(self) -> redis.Redis:
+        """Клиент поверх общего пула; соединения открываются при первой команде"""
         if self.client is None:
-            self.client = redis.Redis(
+            self.pool = redis.ConnectionPool(
                 host=self.host,
                 port=self.port,
                 decode_responses=self.decode,
+                max_connections=self.pool_config.max_connections,
+                socket_timeout=self.pool_config.socket_timeout,
+                socket_connect_timeout=self.pool_config.connect_timeout,
+                health_check_interval=self.pool_config.health_check_interval,
             )
-            await self.client.ping()
-            Logger.info(f"Connected to Redis at {self.host}:{self.port}")
+            self.client = redis.Redis(connection_pool=self.pool)
+        return self.client
+
+    @result_try
+    async def connect(self) -> Result[bool, Exception]:
+        await self.ensure_client().ping()
+        Logger.info(f"Connected to Redis at {self.host}:{self.port}")
         return Ok(True)
 
     @result_try
     async def close(self) -> Result[bool, Exception]:
         if self.client is not None:
             await self.client.close()
+            await self.pool.disconnect()
             self.client = None
+            self.pool = None
             Logger.info("Redis connection closed")
         return Ok(True)
 
+    def pipeline(self, transaction: bool = False) -> RedisPipeline:
+        """async with redis.pipeline() as p: ... — результаты в p.results"""
+        return RedisPipeline(self.ensure_client().pipeline(transaction=transaction))
+
     @result_try
     async def ping(self) -> Result[bool, Exception]:
-        if self.client is None:
-            await self.connect()
-        res = await self.client.ping()
+        client = self.ensure_client()
+        res = await client.ping()
         return Ok(res)
 
     @result_try
     async def set(
-        self, key: str, value: Any, ex: Optional[int] = None
+        self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False
     ) -> Result[bool, Exception]:
-        if self.client is None:
-            await self.connect()
-        res = await self.client.set(key, value, ex=ex)
-        Logger.debug(f"SET {key} = {value} (ex={ex})")
+        client = self.ensure_client()
+        res = await client.set(key, value, ex=ex, nx=nx)
+        self._log("SET %s <%s> (ex=%s, nx=%s)", key, _size(value), ex, nx)
         return Ok(res is True or res == "OK")
 
+    @result_try
+    async def lock(self, name: str, timeout: float) -> Result[Lock, Exception]:
+        """Распределенная блокировка с истечением через timeout секунд"""
+        client = self.ensure_client()
+        return Ok(client.lock(name, timeout=timeout))
+
     @result_try
     async def get(self, key: str) -> Result[Any, Exception]:
-        if self.client is None:
-            await self.connect()
-        value = await self.client.get(key)
-        Logger.debug(f"GET {key} -> {value}")
+        client = self.ensure_client()
+        value = await client.get(key)
+        self._log("GET %s -> <%s>", key, _size(value))
         return Ok(value)
 
     @result_try
     async def delete(self, *keys: str) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        count = await self.client.delete(*keys)
-        Logger.debug(f"DEL {keys} -> {count} deleted")
+        client = self.ensure_client()
+        count = await client.delete(*keys)
+        self._log("DEL %s -> %s deleted", keys, count)
         return Ok(count)
 
     @result_try
     async def exists(self, *keys: str) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        count = await self.client.exists(*keys)
-        Logger.debug(f"EXISTS {keys} -> {count}")
+        client = self.ensure_client()
+        count = await client.exists(*keys)
+        self._log("EXISTS %s -> %s", keys, count)
         return Ok(count)
 
     @result_try
     async def expire(self, key: str, seconds: int) -> Result[bool, Exception]:
-        if self.client is None:
-            await self.connect()
-        res = await self.client.expire(key, seconds)
-        Logger.debug(f"EXPIRE {key} {seconds}s -> {res}")
+        client = self.ensure_client()
+        res = await client.expire(key, seconds)
+        self._log("EXPIRE %s %ss -> %s", key, seconds, res)
         return Ok(res)
 
     @result_try
-    async def hset(self, name: str, key: str, value: Any) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        count = await self.client.hset(name, key, value)
-        Logger.debug(f"HSET {name} {key} = {value}")
+    async def expire_many(
+        self, keys: Iterable[str], seconds: int
+    ) -> Result[int, Exception]:
+        async with self.pipeline() as p:
+            for key in keys:
+                p.expire(key, seconds)
+        updated = sum(1 for res in p.results if res)
+        self._log("EXPIRE x%s %ss -> %s", len(p.results), seconds, updated)
+        return Ok(updated)
+
+    @result_try
+    async def mget(self, *keys: str) -> Result[List[Any], Exception]:
+        if not keys:
+            return Ok([])
+        client = self.ensure_client()
+        values = await client.mget(*keys)
+        self._log("MGET x%s -> %s found", len(keys), sum(v is not None for v in values))
+        return Ok(values)
+
+    @result_try
+    async def mset(
+        self, mapping: Dict[str, Any], ex: Optional[int] = None
+    ) -> Result[bool, Exception]:
+        """MSET не умеет TTL, поэтому с ex ключи пишутся одним пайплайном"""
+        if not mapping:
+            return Ok(True)
+        if ex is None:
+            res = await self.ensure_client().mset(mapping)
+        else:
+            async with self.pipeline() as p:
+                for key, value in mapping.items():
+                    p.set(key, value, ex=ex)
+            res = all(p.results)
+        self._log("MSET x%s (ex=%s)", len(mapping), ex)
+        return Ok(bool(res))
+
+    @result_try
+    async def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Any = None,
+        mapping: Optional[Dict[str, Any]] = None,
+    ) -> Result[int, Exception]:
+        client = self.ensure_client()
+        count = await client.hset(name, key, value, mapping=mapping)
+        self._log("HSET %s %s", name, key or list(mapping or {}))
         return Ok(count)
 
     @result_try
     async def hget(self, name: str, key: str) -> Result[Any, Exception]:
-        if self.client is None:
-            await self.connect()
-        value = await self.client.hget(name, key)
-        Logger.debug(f"HGET {name} {key} -> {value}")
+        client = self.ensure_client()
+        value = await client.hget(name, key)
+        self._log("HGET %s %s -> <%s>", name, key, _size(value))
         return Ok(value)
 
+    @result_try
+    async def hmget(self, name: str, *keys: str) -> Result[List[Any], Exception]:
+        client = self.ensure_client()
+        values = await client.hmget(name, keys)
+        self._log("HMGET %s x%s", name, len(keys))
+        return Ok(values)
+
     @result_try
     async def hgetall(self, name: str) -> Result[Dict[str, Any], Exception]:
-        if self.client is None:
-            await self.connect()
-        data = await self.client.hgetall(name)
-        Logger.debug(f"HGETALL {name} -> {len(data)} fields")
+        client = self.ensure_client()
+        data = await client.hgetall(name)
+        self._log("HGETALL %s -> %s fields", name, len(data))
         return Ok(data)
 
     @result_try
     async def hdel(self, name: str, *keys: str) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        count = await self.client.hdel(name, *keys)
-        Logger.debug(f"HDEL {name} {keys} -> {count} deleted")
+        client = self.ensure_client()
+        count = await client.hdel(name, *keys)
+        self._log("HDEL %s %s -> %s deleted", name, keys, count)
         return Ok(count)
 
     @result_try
     async def lpush(self, key: str, *values: Any) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        length = await self.client.lpush(key, *values)
-        Logger.debug(f"LPUSH {key} {values} -> new length {length}")
+        client = self.ensure_client()
+        length = await client.lpush(key, *values)
+        self._log("LPUSH %s x%s -> new length %s", key, len(values), length)
         return Ok(length)
 
     @result_try
     async def rpush(self, key: str, *values: Any) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        length = await self.client.rpush(key, *values)
-        Logger.debug(f"RPUSH {key} {values} -> new length {length}")
+        client = self.ensure_client()
+        length = await client.rpush(key, *values)
+        self._log("RPUSH %s x%s -> new length %s", key, len(values), length)
         return Ok(length)
 
     @result_try
     async def lpop(self, key: str) -> Result[Any, Exception]:
-        if self.client is None:
-            await self.connect()
-        value = await self.client.lpop(key)
-        Logger.debug(f"LPOP {key} -> {value}")
+        client = self.ensure_client()
+        value = await client.lpop(key)
+        self._log("LPOP %s -> <%s>", key, _size(value))
         return Ok(value)
 
     @result_try
     async def rpop(self, key: str) -> Result[Any, Exception]:
-        if self.client is None:
-            await self.connect()
-        value = await self.client.rpop(key)
-        Logger.debug(f"RPOP {key} -> {value}")
+        client = self.ensure_client()
+        value = await client.rpop(key)
+        self._log("RPOP %s -> <%s>", key, _size(value))
         return Ok(value)
 
     @result_try
     async def lrange(
         self, key: str, start: int, end: int
     ) -> Result[List[Any], Exception]:
-        if self.client is None:
-            await self.connect()
-        items = await self.client.lrange(key, start, end)
-        Logger.debug(f"LRANGE {key} {start}:{end} -> {len(items)} items")
+        client = self.ensure_client()
+        items = await client.lrange(key, start, end)
+        self._log("LRANGE %s %s:%s -> %s items", key, start, end, len(items))
         return Ok(items)
 
     # --- Set operations ---
 
     @result_try
     async def sadd(self, key: str, *values: Any) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        added = await self.client.sadd(key, *values)
-        Logger.debug(f"SADD {key} {values} -> {added} added")
+        client = self.ensure_client()
+        added = await client.sadd(key, *values)
+        self._log("SADD %s x%s -> %s added", key, len(values), added)
         return Ok(added)
 
     @result_try
     async def srem(self, key: str, *values: Any) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        removed = await self.client.srem(key, *values)
-        Logger.debug(f"SREM {key} {values} -> {removed} removed")
+        client = self.ensure_client()
+        removed = await client.srem(key, *values)
+        self._log("SREM %s x%s -> %s removed", key, len(values), removed)
         return Ok(removed)
 
     @result_try
     async def smembers(self, key: str) -> Result[Set[Any], Exception]:
-        if self.client is None:
-            await self.connect()
-        members = await self.client.smembers(key)
-        Logger.debug(f"SMEMBERS {key} -> {len(members)} members")
+        client = self.ensure_client()
+        members = await client.smembers(key)
+        self._log("SMEMBERS %s -> %s members", key, len(members))
         return Ok(members)
 
     @result_try
     async def incr(self, key: str) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        new_val = await self.client.incr(key)
-        Logger.debug(f"INCR {key} -> {new_val}")
+        client = self.ensure_client()
+        new_val = await client.incr(key)
+        self._log("INCR %s -> %s", key, new_val)
         return Ok(new_val)
 
     @result_try
     async def decr(self, key: str) -> Result[int, Exception]:
-        if self.client is None:
-            await self.connect()
-        new_val = await self.client.decr(key)
-        Logger.debug(f"DECR {key} -> {new_val}")
+        client = self.ensure_client()
+        new_val = await client.decr(key)
+        self._log("DECR %s -> %s", key, new_val)
         return Ok(new_val)
 
     @result_try
     async def flushall(self) -> Result[bool, Exception]:
-        if self.client is None:
-            await self.connect()
-        await self.client.flushall()
+        client = self.ensure_client()
+        await client.flushall()
         Logger.info("FLUSHALL executed")
         return Ok(True)
 
     @result_try
     async def flushdb(self) -> Result[bool, Exception]:
         """Очищает текущую базу данных."""
-        if self.client is None:
-            await self.connect()
-        await self.client.flushdb()
+        client = self.ensure_client()
+        await client.flushdb()
         Logger.info("FLUSHDB executed")
         return Ok(True)
 
+    def stats(self) -> Dict[str, Any]:
+        if self.pool is None:
+            return {"connected": False}
+        return {
+            "connected": True,
+            "max_connections": self.pool_config.max_connections,
+            "created": getattr(self.pool, "_created_connections", 0),
+            "idle": len(getattr(self.pool, "_available_connections", [])),
+            "in_use": len(getattr(self.pool, "_in_use_connections", [])),
+        }
+
+    @result_try
+    async def publish(self, channel: str, message: Any) -> Result[int, Exception]:
+        client = self.ensure_client()
+        receivers = await client.publish(channel, message)
+        self._log("PUBLISH %s <%s> -> %s", channel, _size(message), receivers)
+        return Ok(receivers)
+
+    def pubsub(self) -> PubSub:
+        """Отдельное соединение из пула под подписки"""
+        return self.ensure_client().pubsub(ignore_subscribe_messages=True)
+
+    async def scan_iter(
+        self, pattern: str = "*", count: int = 1000
+    ) -> AsyncIterator[Any]:
+        """Обход ключей курсором SCAN: сервер не блокируется, память не растет"""
+        client = self.ensure_client()
+        cursor = 0
+        while True:
+            cursor, batch = await client.scan(cursor, match=pattern, count=count)
+            for key in batch:
+                yield key
+            if cursor == 0:
+                break
+
+    @result_try
+    async def delete_by_pattern(
+        self, pattern: str, count: int = 1000, batch_size: int = 500
+    ) -> Result[int, Exception]:
+        """UNLINK пачками по мере обхода, освобождение памяти уходит в фон Redis"""
+        client = self.ensure_client()
+        deleted = 0
+        batch: List[Any] = []
+        async for key in self.scan_iter(pattern, count):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await client.unlink(*batch)
+        self._log("DELETE BY PATTERN %s -> %s deleted", pattern, deleted)
+        return Ok(deleted)
+
     @result_try
     async def keys(self, pattern: str = "*") -> Result[List[str], Exception]:
-        if self.client is None:
-            await self.connect()
-        key_list = await self.client.keys(pattern)
-        Logger.debug(f"KEYS {pattern} -> {len(key_list)} keys")
+        key_list = [key async for key in self.scan_iter(pattern)]
+        self._log("SCAN %s -> %s keys", pattern, len(key_list))
         return Ok(key_list)
@@ -1,16 +1,55 @@
+import asyncio
+import uuid
 from fastapi import WebSocket
-from typing import Dict, List, Optional, Tuple
+from fastbot.logger import Logger
+from redis.asyncio.client import PubSub
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
+from .. import codec
+from ..cache import TTLCache
+from ..redis import RedisService
+
 
 class Connection:
-    def __init__(self):
+    """Сокеты воркера; с Redis события контейнера расходятся по всем воркерам"""
+
+    def __init__(
+        self,
+        redis_service: Optional[RedisService] = None,
+        prefix: str = "owl:ws",
+        dedup_size: int = 4096,
+        dedup_ttl: float = 60.0,
+        max_retry_delay: float = 30.0,
+    ):
         self.container_connections: Dict[str, List[WebSocket]] = {}
         self.socket_info: Dict[WebSocket, Tuple[str, str]] = {}
 
+        self.redis_service = redis_service
+        self.prefix = prefix
+        self.worker_id = uuid.uuid4().hex
+        self.seen = TTLCache(max_entries=dedup_size, ttl=dedup_ttl)
+        self.pubsub: Optional[PubSub] = None
+        self.listener: Optional[asyncio.Task] = None
+        self.subscribed: Set[str] = set()
+        self._subscription_lock = asyncio.Lock()
+        self._pending: Set[asyncio.Task] = set()
+        self.max_retry_delay = max_retry_delay
+        self._retrying: Set[str] = set()
+
+        self.published = 0
+        self.received = 0
+        self.duplicates = 0
+        self.publish_errors = 0
+        self.subscription_errors = 0
+
+    def _channel(self, container_id: str) -> str:
+        return f"{self.prefix}:container:{container_id}"
+
     async def connect(self, websocket: WebSocket, container_id: str, user_id: str):
         self.container_connections.setdefault(container_id, []).append(websocket)
         self.socket_info[websocket] = (container_id, user_id)
+        await self._sync_subscription(container_id)
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.socket_info:
@@ -19,6 +58,111 @@ class Connection:
                 self.container_connections[cid].remove(websocket)
                 if not self.container_connections[cid]:
                     del self.container_connections[cid]
+                    if cid in self.subscribed:
+                        self._spawn(self._sync_subscription(cid))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _schedule_retry(self, container_id: str) -> None:
+        """Повтор с экспоненциальной задержкой, пока состояние не сойдется"""
+        if container_id in self._retrying:
+            return
+        self._retrying.add(container_id)
+        delay = 1.0
+
+        async def retry():
+            nonlocal delay
+            while True:
+                await asyncio.sleep(delay)
+                if await self._sync_subscription(container_id, retrying=True):
+                    break
+                delay = min(delay * 2, self.max_retry_delay)
+            self._retrying.discard(container_id)
+
+        self._spawn(retry())
+
+    async def _sync_subscription(
+        self, container_id: str, retrying: bool = False
+    ) -> bool:
+        """Подписка на канал живет, пока у воркера есть сокеты этого контейнера"""
+        if self.redis_service is None:
+            return True
+
+        async with self._subscription_lock:
+            wanted = container_id in self.container_connections
+            if wanted == (container_id in self.subscribed):
+                return True
+
+            channel = self._channel(container_id)
+            try:
+                if wanted:
+                    if self.pubsub is None:
+                        self.pubsub = self.redis_service.pubsub()
+                    await self.pubsub.subscribe(channel)
+                    self.subscribed.add(container_id)
+                else:
+                    await self.pubsub.unsubscribe(channel)
+                    self.subscribed.discard(container_id)
+            except Exception as e:
+                Logger.warning(f"WS subscription change for {channel} failed: {e}")
+                self.subscription_errors += 1
+                if not retrying:
+                    self._schedule_retry(container_id)
+                return False
+
+            if self.subscribed and (self.listener is None or self.listener.done()):
+                self.listener = asyncio.create_task(self._listen())
+            return True
+
+    async def _listen(self) -> None:
+        while True:
+            if not self.subscribed:
+                async with self._subscription_lock:
+                    if not self.subscribed:
+                        pubsub, self.pubsub = self.pubsub, None
+                        self.listener = None
+                        if pubsub is not None:
+                            await pubsub.close()
+                        return
+
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except Exception as e:
+                Logger.warning(f"WS pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message.get("type") != "message":
+                continue
+
+            try:
+                envelope = codec.loads(message["data"])
+            except codec.DecodeError:
+                continue
+            await self._handle_envelope(envelope)
+
+    async def _handle_envelope(self, envelope: Any) -> None:
+        if not isinstance(envelope, dict):
+            return
+        message_id = envelope.get("id")
+        container_id = envelope.get("container_id")
+        message = envelope.get("message")
+        if message_id is None or container_id is None or message is None:
+            Logger.warning("Skipping malformed WS broadcast envelope")
+            return
+
+        if envelope.get("origin") == self.worker_id or message_id in self.seen:
+            self.duplicates += 1
+            return
+
+        self.seen.set(message_id, True)
+        self.received += 1
+        await self._deliver(container_id, message)
 
     async def send_personal(self, websocket: WebSocket, message: dict):
         try:
@@ -26,7 +170,7 @@ class Connection:
         except Exception:
             self.disconnect(websocket)
 
-    async def broadcast_to_container(
+    async def _deliver(
         self, container_id: str, message: dict, exclude: Optional[WebSocket] = None
     ):
         if container_id not in self.container_connections:
@@ -41,3 +185,43 @@ class Connection:
                 disconnected.append(ws)
         for ws in disconnected:
             self.disconnect(ws)
+
+    async def broadcast_to_container(
+        self, container_id: str, message: dict, exclude: Optional[WebSocket] = None
+    ):
+        # Локальные сокеты получают событие сразу, остальные воркеры — через Redis
+        await self._deliver(container_id, message, exclude)
+
+        if self.redis_service is None:
+            return
+
+        message_id = uuid.uuid4().hex
+        self.seen.set(message_id, True)
+        envelope = {
+            "id": message_id,
+            "origin": self.worker_id,
+            "container_id": container_id,
+            "message": message,
+        }
+        result = await self.redis_service.publish(
+            self._channel(container_id), codec.dumps(envelope)
+        )
+        if result.is_err():
+            self.publish_errors += 1
+            Logger.warning(f"WS broadcast publish failed: {result.unwrap_err()}")
+            return
+        self.published += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sockets": len(self.socket_info),
+            "containers": len(self.container_connections),
+            "pubsub_enabled": self.redis_service is not None,
+            "subscriptions": len(self.subscribed),
+            "published": self.published,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "publish_errors": self.publish_errors,
+            "subscription_errors": self.subscription_errors,
+            "retrying": len(self._retrying),
+        }
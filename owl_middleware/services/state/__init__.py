@@ -1,3 +1,4 @@
 from .state import State
+from .backends import StateBackend, MemoryStateBackend, RedisStateBackend
 
-__all__ = ["State"]
+__all__ = ["State", "StateBackend", "MemoryStateBackend", "RedisStateBackend"]
@@ -0,0 +1,120 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+from fastbot.logger import Logger
+from redis.exceptions import RedisError
+
+from .. import codec
+from ..cache import TTLCache
+from ..redis import RedisService
+
+
+class StateBackend(ABC):
+    """Хранилище состояния пользователя как плоского набора полей"""
+
+    @abstractmethod
+    async def load(self, user_id: str) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def get_field(self, user_id: str, field: str) -> Any: ...
+
+    @abstractmethod
+    async def set_fields(self, user_id: str, fields: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    async def delete_fields(self, user_id: str, *fields: str) -> None: ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]: ...
+
+
+class MemoryStateBackend(StateBackend):
+    def __init__(self, max_users: int = 10000, ttl: float = 24 * 3600):
+        self.states = TTLCache(max_entries=max_users, ttl=ttl)
+
+    def _fields(self, user_id: str) -> Dict[str, Any]:
+        return self.states.get(user_id) or {}
+
+    async def load(self, user_id: str) -> Dict[str, Any]:
+        return dict(self._fields(user_id))
+
+    async def get_field(self, user_id: str, field: str) -> Any:
+        return self._fields(user_id).get(field)
+
+    async def set_fields(self, user_id: str, fields: Dict[str, Any]) -> None:
+        # Повторная запись продлевает TTL и поднимает пользователя в LRU
+        self.states.set(user_id, {**self._fields(user_id), **fields})
+
+    async def delete_fields(self, user_id: str, *fields: str) -> None:
+        current = self._fields(user_id)
+        self.states.set(
+            user_id, {key: value for key, value in current.items() if key not in fields}
+        )
+
+    def purge_expired(self) -> int:
+        return self.states.purge_expired()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "states": self.states.stats(),
+        }
+
+
+class RedisStateBackend(StateBackend):
+    def __init__(
+        self,
+        redis_service: RedisService,
+        ttl: int = 24 * 3600,
+        prefix: str = "owl:state",
+    ):
+        self.redis_service = redis_service
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def _unwrap(self, result, default: Any = None) -> Any:
+        if result.is_err():
+            self.errors += 1
+            Logger.warning(f"State backend error: {result.unwrap_err()}")
+            return default
+        return result.unwrap()
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def load(self, user_id: str) -> Dict[str, Any]:
+        raw = self._unwrap(await self.redis_service.hgetall(self._key(user_id)), {})
+        return {self._text(key): codec.loads(value) for key, value in raw.items()}
+
+    async def get_field(self, user_id: str, field: str) -> Any:
+        raw = self._unwrap(await self.redis_service.hget(self._key(user_id), field))
+        return codec.loads(raw) if raw is not None else None
+
+    async def set_fields(self, user_id: str, fields: Dict[str, Any]) -> None:
+        key = self._key(user_id)
+        mapping = {field: codec.dumps(value) for field, value in fields.items()}
+        try:
+            async with self.redis_service.pipeline(transaction=True) as p:
+                p.hset(key, mapping=mapping)
+                p.expire(key, self.ttl)
+        except RedisError as e:
+            self.errors += 1
+            Logger.warning(f"State backend error: {e}")
+
+    async def delete_fields(self, user_id: str, *fields: str) -> None:
+        if fields:
+            self._unwrap(await self.redis_service.hdel(self._key(user_id), *fields))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "errors": self.errors,
+        }
@@ -1,8 +1,15 @@
 from typing import Optional, Any, Dict, List
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
 import uuid
 
+from .backends import MemoryStateBackend, StateBackend
+
+SEARCH_PREFIX = "search:"
+META_PREFIX = "meta:"
+MAX_SEARCH_RESULTS = 20
+
 
 class SearchResult(BaseModel):
     query: str
@@ -19,65 +26,97 @@ class StateConfig(BaseModel):
 
 
 class State:
-    def __init__(self):
-        self._state_configs: Dict[str, StateConfig] = {}
-
-    def get_state(self, user_id: str) -> StateConfig:
-        if user_id not in self._state_configs:
-            self._state_configs[user_id] = StateConfig(user_id=user_id)
-        return self._state_configs[user_id]
-
-    def set_work_container(self, user_id: str, container_id: str) -> None:
-        state = self.get_state(user_id)
-        state.work_container_id = container_id
-        state.last_activity = datetime.now()
-
-    def get_work_container(self, user_id: str) -> Optional[str]:
-        state = self.get_state(user_id)
-        return state.work_container_id
-
-    def clear_work_container(self, user_id: str) -> None:
-        state = self.get_state(user_id)
-        state.work_container_id = None
-        state.last_activity = datetime.now()
-
-    def add_search_results(self, user_id: str, query: str, paths: List[str]) -> str:
-        state = self.get_state(user_id)
+    def __init__(self, backend: Optional[StateBackend] = None):
+        self.backend = backend or MemoryStateBackend()
+        self.cleanup_task: Optional[asyncio.Task] = None
+
+    async def _touch(self, user_id: str, fields: Dict[str, Any]) -> None:
+        await self.backend.set_fields(
+            user_id, {**fields, "last_activity": datetime.now().isoformat()}
+        )
+
+    async def get_state(self, user_id: str) -> StateConfig:
+        fields = await self.backend.load(user_id)
+        state = StateConfig(user_id=user_id)
+        for field, value in fields.items():
+            if field.startswith(SEARCH_PREFIX):
+                search_id = field[len(SEARCH_PREFIX) :]
+                state.search_results[search_id] = SearchResult(**value)
+            elif field.startswith(META_PREFIX):
+                state.metadata[field[len(META_PREFIX) :]] = value
+            elif field == "work_container_id":
+                state.work_container_id = value
+            elif field == "last_activity":
+                state.last_activity = datetime.fromisoformat(value)
+        return state
+
+    async def set_work_container(self, user_id: str, container_id: str) -> None:
+        await self._touch(user_id, {"work_container_id": container_id})
+
+    async def get_work_container(self, user_id: str) -> Optional[str]:
+        return await self.backend.get_field(user_id, "work_container_id")
+
+    async def clear_work_container(self, user_id: str) -> None:
+        await self._touch(user_id, {"work_container_id": None})
+
+    async def add_search_results(
+        self, user_id: str, query: str, paths: List[str]
+    ) -> str:
         search_id = str(uuid.uuid4())[:8]
+        result = SearchResult(query=query, paths=paths, timestamp=datetime.now())
+        await self._touch(
+            user_id, {f"{SEARCH_PREFIX}{search_id}": result.model_dump(mode="json")}
+        )
 
-        state.search_results[search_id] = SearchResult(
-            query=query, paths=paths, timestamp=datetime.now()
+        state = await self.get_state(user_id)
+        stale = sorted(
+            state.search_results, key=lambda sid: state.search_results[sid].timestamp
+        )[:-MAX_SEARCH_RESULTS]
+        await self.backend.delete_fields(
+            user_id, *(f"{SEARCH_PREFIX}{sid}" for sid in stale)
         )
-        state.last_activity = datetime.now()
 
         return search_id
 
-    def get_search_result(self, user_id: str, search_id: str) -> Optional[SearchResult]:
-        state = self.get_state(user_id)
-        return state.search_results.get(search_id)
+    async def get_search_result(
+        self, user_id: str, search_id: str
+    ) -> Optional[SearchResult]:
+        value = await self.backend.get_field(user_id, f"{SEARCH_PREFIX}{search_id}")
+        return SearchResult(**value) if value is not None else None
 
-    def get_file_path(
+    async def get_file_path(
         self, user_id: str, search_id: str, file_index: int
     ) -> Optional[str]:
-        result = self.get_search_result(user_id, search_id)
+        result = await self.get_search_result(user_id, search_id)
         if result and 0 <= file_index < len(result.paths):
             return result.paths[file_index]
         return None
 
-    def set_metadata(self, user_id: str, key: str, value: Any) -> None:
-        state = self.get_state(user_id)
-        state.metadata[key] = value
-        state.last_activity = datetime.now()
+    async def set_metadata(self, user_id: str, key: str, value: Any) -> None:
+        await self._touch(user_id, {f"{META_PREFIX}{key}": value})
+
+    async def get_metadata(self, user_id: str, key: str) -> Any:
+        return await self.backend.get_field(user_id, f"{META_PREFIX}{key}")
+
+    async def delete_metadata(self, user_id: str, key: str) -> None:
+        await self.backend.delete_fields(user_id, f"{META_PREFIX}{key}")
+
+    def cleanup_old_states(self) -> int:
+        return self.backend.purge_expired()
+
+    async def run_cleanup(self, interval: float = 600.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.cleanup_old_states()
 
-    def get_metadata(self, user_id: str, key: str) -> Any:
-        state = self.get_state(user_id)
-        return state.metadata.get(key)
+    def start_cleanup(self, interval: float = 600.0) -> None:
+        if self.cleanup_task is None:
+            self.cleanup_task = asyncio.create_task(self.run_cleanup(interval))
 
-    def delete_metadata(self, user_id: str, key: str) -> None:
-        state = self.get_state(user_id)
-        if key in state.metadata:
-            del state.metadata[key]
-            state.last_activity = datetime.now()
+    def stop_cleanup(self) -> None:
+        if self.cleanup_task is not None:
+            self.cleanup_task.cancel()
+            self.cleanup_task = None
 
-    def cleanup_old_states(self, hours: int = 24) -> None:
-        self._state_configs.clear()
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
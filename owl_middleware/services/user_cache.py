@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional, Tuple
+from fastbot.logger import Logger
+from models import User
+
+from . import codec
+from .cache import TTLCache
+from .redis import RedisService
+
+_MISSING = "__missing__"
+
+
+class UserCache:
+    """Кэш пользователей по tg_id с отрицательным кэшированием: в памяти или в Redis"""
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        negative_ttl: float = 5.0,
+        max_entries: int = 10000,
+        redis_service: Optional[RedisService] = None,
+        prefix: str = "owl:user:tg",
+    ):
+        self.local = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.negative_ttl = negative_ttl
+        self.redis_service = redis_service
+        self.prefix = prefix
+        self.redis_hits = 0
+
+    def _redis_key(self, tg_id: int) -> str:
+        return f"{self.prefix}:{tg_id}"
+
+    async def get(self, tg_id: int) -> Tuple[bool, Optional[User]]:
+        """(найдено в кэше, пользователь или None для незарегистрированного)"""
+        if self.redis_service is None:
+            value = self.local.get(tg_id)
+            if value is None:
+                return False, None
+            return True, None if value == _MISSING else value
+
+        # С Redis локальный слой не ведется: он прятал бы инвалидацию
+        # с других воркеров до истечения TTL
+        result = await self.redis_service.get(self._redis_key(tg_id))
+        if result.is_err():
+            Logger.warning(f"User cache read failed: {result.unwrap_err()}")
+            return False, None
+
+        raw = result.unwrap()
+        if raw is None:
+            return False, None
+
+        data = codec.loads(raw)
+        self.redis_hits += 1
+        return True, User(**data) if data is not None else None
+
+    async def set(self, tg_id: int, user: Optional[User]) -> None:
+        ttl = self.local.ttl if user is not None else self.negative_ttl
+        if self.redis_service is None:
+            self.local.set(tg_id, user if user is not None else _MISSING, ttl=ttl)
+            return
+
+        payload = user.model_dump(mode="json") if user is not None else None
+        result = await self.redis_service.set(
+            self._redis_key(tg_id), codec.dumps(payload), ex=max(1, int(ttl))
+        )
+        if result.is_err():
+            Logger.warning(f"User cache write failed: {result.unwrap_err()}")
+
+    async def invalidate(self, tg_id: int) -> None:
+        if self.redis_service is None:
+            self.local.pop(tg_id)
+            return
+
+        result = await self.redis_service.delete(self._redis_key(tg_id))
+        if result.is_err():
+            Logger.warning(f"User cache invalidation failed: {result.unwrap_err()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "redis_enabled": self.redis_service is not None,
+            "redis_hits": self.redis_hits,
+        }
@@ -0,0 +1,140 @@
+"""Членство в группах: $lookup против запроса на строку, с индексами и без.
+
+Нужен настоящий MongoDB: скрипт создает временную базу, засевает ее и в конце
+удаляет. Каждый вариант меряется дважды — на голых коллекциях и после
+IndexManager.ensure_indexes().
+
+    MONGO_URI=mongodb://localhost:27017 python scripts/bench_group_queries.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "owl_middleware"))
+
+
+async def _seed(db, containers: int, groups: int, files: int, groups_per_file: int):
+    file_docs, group_docs, relations = [], [], []
+    for c in range(containers):
+        container_id = f"c{c}"
+        group_docs += [
+            {"id": f"g{g}", "container_id": container_id, "created_at": datetime.now()}
+            for g in range(groups)
+        ]
+        for f in range(files):
+            file_id = f"{container_id}_f{f}"
+            file_docs.append(
+                {
+                    "id": file_id,
+                    "container_id": container_id,
+                    "name": f"f{f}.txt",
+                    "size": 1024 + f,
+                    "mime_type": "text/plain",
+                    "created_at": datetime.now(),
+                }
+            )
+            relations += [
+                {"file_id": file_id, "group_id": f"g{(f + k) % groups}"}
+                for k in range(groups_per_file)
+            ]
+
+    await db["files"].insert_many(file_docs)
+    await db["groups"].insert_many(group_docs)
+    await db["file2group"].insert_many(relations)
+
+
+async def _per_row_files_by_group(db, group_id: str) -> list:
+    """Прежняя схема: связи одним запросом, затем по запросу на каждый файл"""
+    relations = await db["file2group"].find({"group_id": group_id}).to_list(None)
+    return [await db["files"].find_one({"id": rel["file_id"]}) for rel in relations]
+
+
+async def _per_row_groups_by_file(db, file_id: str) -> list:
+    relations = await db["file2group"].find({"file_id": file_id}).to_list(None)
+    return [await db["groups"].find_one({"id": rel["group_id"]}) for rel in relations]
+
+
+async def _time(call: Callable[[], Awaitable], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await call()
+        samples.append((time.perf_counter() - started) * 1000)
+        # Сервисные методы возвращают Result: ошибка не должна сойти за быстрый ответ
+        if hasattr(result, "is_err") and result.is_err():
+            raise result.unwrap_err()
+    return {"mean": statistics.mean(samples), "p95": _p95(samples)}
+
+
+def _p95(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+async def _run(args) -> None:
+    from services.db import DBService
+    from services.groups import GroupService
+    from services.indexes import IndexManager
+
+    db_service = DBService(args.mongo_uri, f"owl_bench_{uuid.uuid4().hex[:8]}")
+    db = db_service.db
+    group_service = GroupService(db_service, None, None, None)
+
+    try:
+        await _seed(
+            db, args.containers, args.groups, args.files, args.groups_per_file
+        )
+        group_id, file_id = "g0", "c0_f0"
+        variants = {
+            "files_by_group  $lookup": lambda: group_service.get_files_by_group(
+                group_id
+            ),
+            "files_by_group  per-row": lambda: _per_row_files_by_group(db, group_id),
+            "groups_by_file  $lookup": lambda: group_service.get_groups_by_file(
+                file_id
+            ),
+            "groups_by_file  per-row": lambda: _per_row_groups_by_file(db, file_id),
+        }
+
+        relations = args.containers * args.files * args.groups_per_file
+        print(
+            f"files: {args.containers * args.files}, "
+            f"groups: {args.containers * args.groups}, relations: {relations}"
+        )
+        for label in ("no indexes", "with indexes"):
+            if label == "with indexes":
+                await IndexManager(db_service).ensure_indexes()
+            print(f"\n{label}:")
+            for name, call in variants.items():
+                timing = await _time(call, args.repeat)
+                print(
+                    f"  {name}: mean {timing['mean']:8.2f} ms, "
+                    f"p95 {timing['p95']:8.2f} ms"
+                )
+    finally:
+        await db_service.client.drop_database(db_service.db_name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    )
+    parser.add_argument("--containers", type=int, default=20)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--groups-per-file", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Цена хэширования паролей: время PBKDF2 и задержка event loop под нагрузкой.
+
+Для каждого числа итераций меряется один хэш, затем пачка параллельных verify
+через PasswordHasher (пул потоков) и те же verify прямо в event loop. Рядом
+крутится тикер: его максимальное опоздание показывает, насколько KDF
+задерживает остальные запросы воркера.
+
+    python scripts/bench_password_hash.py --iterations 100000 600000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "owl_middleware"))
+
+TICK = 0.005
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - started - TICK) * 1000)
+
+
+async def _under_load(run: Callable[[], Awaitable]) -> tuple:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return elapsed, max(lags)
+
+
+async def _run(args) -> None:
+    from services.password import PasswordHasher
+
+    for iterations in args.iterations:
+        hasher = PasswordHasher(iterations=iterations, max_workers=args.workers)
+        try:
+            password_hash = await hasher.hash("correct horse battery staple")
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                await hasher.hash("correct horse battery staple")
+                samples.append((time.perf_counter() - started) * 1000)
+
+            async def pooled():
+                await asyncio.gather(
+                    *(
+                        hasher.verify("correct horse battery staple", password_hash)
+                        for _ in range(args.concurrency)
+                    )
+                )
+
+            async def inline():
+                # Как до пула потоков: KDF прямо в event loop
+                for _ in range(args.concurrency):
+                    hasher._verify_sync("correct horse battery staple", password_hash)
+
+            print(
+                f"iterations {iterations}: hash mean "
+                f"{statistics.mean(samples):7.1f} ms"
+            )
+            for label, run in (("pooled", pooled), ("inline", inline)):
+                elapsed, lag = await _under_load(run)
+                print(
+                    f"  {args.concurrency} verify {label:>6}: {elapsed:6.2f}s, "
+                    f"max loop lag {lag:8.1f} ms"
+                )
+        finally:
+            hasher.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--iterations", type=int, nargs="+", default=[100_000, 300_000, 600_000]
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
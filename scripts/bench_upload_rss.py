@@ -0,0 +1,128 @@
+"""Пиковый RSS при загрузке файла в VFS: потоковая отправка против буферизации.
+
+Каждый режим запускается в отдельном процессе (ru_maxrss — максимум за всю
+жизнь процесса). VFS заменен локальным aiohttp-сервером, который читает тело
+кусками и выбрасывает его, так что в замер попадает только память клиента.
+
+    python scripts/bench_upload_rss.py --size-mb 50
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "owl_middleware"))
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _rss_mb() -> float:
+    # На Linux ru_maxrss в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _serve():
+    from aiohttp import web
+
+    async def create(request: web.Request) -> web.Response:
+        received = 0
+        async for chunk in request.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+        return web.json_response({"data": {"received": received}})
+
+    app = web.Application(client_max_size=1024**3)
+    app.router.add_post("/files/create", create)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _upload(mode: str, path: str) -> float:
+    from services.api.client import ApiClient
+    from services.api.file import FileHandler
+    from services.api.stream import iter_chunks
+
+    runner, base_url = await _serve()
+    client = ApiClient(base_url)
+    files = FileHandler(client)
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as source:
+            if mode == "stream":
+
+                async def read(size: int) -> bytes:
+                    return source.read(size)
+
+                result = await files.create_file_stream(
+                    "bench.bin", iter_chunks(read), "1", "bench"
+                )
+            else:
+                # Как до потоковой загрузки: файл целиком, base64 и JSON в памяти
+                content = base64.b64encode(source.read()).decode("ascii")
+                result = await files.create_file("bench.bin", content, "1", "bench")
+        result.unwrap()
+    finally:
+        await client.close()
+        await runner.cleanup()
+    return time.perf_counter() - started
+
+
+def _child(mode: str, path: str) -> None:
+    asyncio.run(_upload("buffered", _warmup_file()))
+    baseline = _rss_mb()
+    elapsed = asyncio.run(_upload(mode, path))
+    print(f"{baseline:.1f} {_rss_mb():.1f} {elapsed:.3f}")
+
+
+def _warmup_file() -> str:
+    # Прогрев импортов и пула соединений, чтобы baseline их уже учитывал
+    path = os.path.join(tempfile.gettempdir(), "owl_bench_warmup.bin")
+    if not os.path.exists(path):
+        with open(path, "wb") as target:
+            target.write(b"\0" * 1024)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--mode", choices=["stream", "buffered"])
+    parser.add_argument("--path")
+    args = parser.parse_args()
+
+    if args.mode:
+        _child(args.mode, args.path)
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".bin") as upload:
+        for _ in range(args.size_mb):
+            upload.write(os.urandom(1024 * 1024))
+        upload.flush()
+
+        print(f"upload size: {args.size_mb} MiB")
+        for mode in ("buffered", "stream"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--path", upload.name],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            baseline, peak, elapsed = map(float, output[-3:])
+            print(
+                f"{mode:>9}: peak RSS {peak:8.1f} MiB "
+                f"(+{peak - baseline:7.1f} MiB over baseline), {elapsed:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
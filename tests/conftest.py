@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Модули пакета импортируются от корня owl_middleware, как в main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "owl_middleware"))
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("jwt")
+pytest.importorskip("email_validator")
+
+from models import UserCreate
+from services.auth import AuthService
+from services.password import PasswordHasher
+
+
+class FakeUsers:
+    """Минимальная коллекция Mongo для AuthService"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _match(self, doc, query):
+        return all(doc.get(key) == value for key, value in query.items())
+
+    async def find_one(self, query, sort=None, projection=None):
+        docs = [doc for doc in self.docs if self._match(doc, query)]
+        if sort:
+            key, direction = sort[0]
+            docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return dict(docs[0]) if docs else None
+
+    async def insert_one(self, document):
+        self.docs.append(dict(document))
+
+    async def find_one_and_update(self, query, update, projection=None):
+        for doc in self.docs:
+            if self._match(doc, query):
+                before = dict(doc)
+                doc.update(update["$set"])
+                return before
+        return None
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.db = {"users": FakeUsers()}
+
+
+def _auth_service() -> AuthService:
+    return AuthService(
+        FakeDatabase(), "secret", password_hasher=PasswordHasher(iterations=1000)
+    )
+
+
+def test_create_user_persists_password_hash():
+    auth_service = _auth_service()
+    user = asyncio.run(
+        auth_service.create_user(
+            UserCreate(email="a@example.com", password="pw", auth_method="email")
+        )
+    ).unwrap()
+
+    stored = auth_service.users.docs[0]
+    assert stored["password_hash"].startswith("pbkdf2_sha256$1000$")
+    assert "password" not in stored
+    assert "password_hash" not in user.dict()
+
+    authenticated = asyncio.run(auth_service.authenticate_email("a@example.com", "pw"))
+    assert authenticated.unwrap().id == user.id
+    wrong = asyncio.run(auth_service.authenticate_email("a@example.com", "nope"))
+    assert wrong.is_err()
+    auth_service.password_hasher.close()
+
+
+def test_login_rehash_goes_through_update_user():
+    old = PasswordHasher(iterations=500)
+    password_hash = asyncio.run(old.hash("pw"))
+    old.close()
+
+    auth_service = _auth_service()
+    auth_service.users.docs.append(
+        {"id": 1, "email": "a@example.com", "password_hash": password_hash}
+    )
+    updated = []
+    update_user = auth_service.update_user
+
+    async def tracking_update(user_id, update_data):
+        updated.append((user_id, set(update_data)))
+        return await update_user(user_id, update_data)
+
+    auth_service.update_user = tracking_update
+    asyncio.run(auth_service.authenticate_email("a@example.com", "pw")).unwrap()
+
+    assert updated == [(1, {"password_hash"})]
+    stored = auth_service.users.docs[0]["password_hash"]
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert auth_service.password_hasher.stats()["rehashed"] == 1
+    auth_service.password_hasher.close()
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+
+from fastbot.core import Ok
+
+from services import cache
+from services.api.cache import FileContentCache
+from services.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache(ttl=10.0)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=30.0)
+
+    clock.now += 10.0
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.get("b") == 2
+    assert ttl_cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    ttl_cache = TTLCache(max_entries=2)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.keys() == ["a", "c"]
+    assert ttl_cache.stats()["evictions"] == 1
+
+
+def test_byte_budget(clock):
+    ttl_cache = TTLCache(max_bytes=10, sizeof=len)
+    assert ttl_cache.set("a", "x" * 6)
+    assert ttl_cache.set("b", "x" * 6)
+    assert ttl_cache.keys() == ["b"]
+    assert ttl_cache.current_bytes == 6
+
+    assert not ttl_cache.set("b", "x" * 11)
+    assert "b" not in ttl_cache
+    assert ttl_cache.current_bytes == 0
+
+
+def test_on_remove_sees_every_removal(clock):
+    removed = []
+    ttl_cache = TTLCache(max_entries=1, on_remove=lambda k, v: removed.append(k))
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.pop("b")
+    ttl_cache.set("c", 3)
+    ttl_cache.clear()
+
+    assert removed == ["a", "b", "c"]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return Ok(self.data.get(key))
+
+    async def set(self, key, value, ex=None, nx=False):
+        self.data[key] = value
+        return Ok(True)
+
+    async def delete(self, *keys):
+        return Ok(sum(self.data.pop(key, None) is not None for key in keys))
+
+
+def test_invalidate_drops_in_flight_fetch():
+    content_cache = FileContentCache()
+
+    async def scenario():
+        generation = content_cache.generation("f", "c")
+        await content_cache.invalidate("f", "c")
+        await content_cache.set("f", "c", ("old", None), generation)
+        assert await content_cache.get("f", "c") is None
+
+        generation = content_cache.generation("f", "c")
+        await content_cache.set("f", "c", ("new", None), generation)
+        assert await content_cache.get("f", "c") == ("new", None)
+
+    asyncio.run(scenario())
+    assert content_cache.stats()["stale_writes"] == 1
+
+
+def test_clear_drops_in_flight_fetch():
+    content_cache = FileContentCache()
+
+    async def scenario():
+        generation = content_cache.generation("f", "c")
+        await content_cache.clear()
+        await content_cache.set("f", "c", ("old", None), generation)
+        return await content_cache.get("f", "c")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_undecodable_redis_entry_is_a_miss():
+    redis = FakeRedis()
+    content_cache = FileContentCache(redis_service=redis)
+    redis.data["owl:file_content:c:f"] = b"\xff not json"
+    redis.data["owl:file_content:c:g"] = b'"just a string"'
+
+    assert asyncio.run(content_cache.get("f", "c")) is None
+    assert asyncio.run(content_cache.get("g", "c")) is None
+    assert content_cache.stats()["decode_errors"] == 2
+
+
+def test_redis_tier_round_trip():
+    redis = FakeRedis()
+    writer = FileContentCache(redis_service=redis)
+    reader = FileContentCache(redis_service=redis)
+
+    asyncio.run(writer.set("f", "c", ("text", "why")))
+    assert asyncio.run(reader.get("f", "c")) == ("text", "why")
+    assert reader.stats()["redis_hits"] == 1
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("aiohttp")
+
+from services import codec
+from services.api.client import ApiClient
+from services.api.resilience import ResilienceConfig
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    """Отвечает после release(), чтобы запросы успели пересечься"""
+
+    closed = False
+
+    def __init__(self, statuses=None):
+        self.requests = []
+        self.gate = asyncio.Event()
+        self.statuses = list(statuses or [])
+
+    def request(self, method, url, json=None, data=None, params=None, headers=None):
+        self.requests.append((method, url, json))
+        return self._respond(url, json)
+
+    def _respond(self, url, payload):
+        session = self
+
+        class Pending:
+            async def __aenter__(self):
+                await session.gate.wait()
+                status = session.statuses.pop(0) if session.statuses else 200
+                body = codec.dumps_bytes({"data": {"url": url, "payload": payload}})
+                return FakeResponse(status, body)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Pending()
+
+
+def _client(session) -> ApiClient:
+    client = ApiClient(
+        "http://vfs", resilience_config=ResilienceConfig(base_delay=0, max_delay=0)
+    )
+    client.session = session
+    return client
+
+
+async def _concurrently(client, session, calls):
+    tasks = [
+        asyncio.ensure_future(client._make_request(*args, **kwargs))
+        for args, kwargs in calls
+    ]
+    await asyncio.sleep(0)
+    session.gate.set()
+    return await asyncio.gather(*tasks)
+
+
+@pytest.mark.parametrize(
+    "method, endpoint",
+    [("GET", "/files/read"), ("POST", "/container/status")],
+)
+def test_identical_reads_share_one_request(method, endpoint):
+    async def scenario():
+        session = FakeSession()
+        client = _client(session)
+        call = ((method, endpoint), {"json_data": {"id": 1}, "coalesce": True})
+        results = await _concurrently(client, session, [call] * 5)
+        return session, client, results
+
+    session, client, results = asyncio.run(scenario())
+    assert len(session.requests) == 1
+    assert client.coalesced_requests == 4
+    assert all(result.unwrap() is results[0].unwrap() for result in results)
+    assert client._inflight == {}
+
+
+def test_writes_and_different_payloads_are_not_coalesced():
+    async def scenario():
+        session = FakeSession()
+        client = _client(session)
+        calls = [
+            (("POST", "/files/create"), {"json_data": {"id": 1}, "coalesce": True}),
+            (("POST", "/files/create"), {"json_data": {"id": 1}, "coalesce": True}),
+            (("GET", "/files/read"), {"json_data": {"id": 1}, "coalesce": True}),
+            (("GET", "/files/read"), {"json_data": {"id": 2}, "coalesce": True}),
+            (("GET", "/files/read"), {"json_data": {"id": 2}}),
+        ]
+        await _concurrently(client, session, calls)
+        return session
+
+    assert len(asyncio.run(scenario()).requests) == 5
+
+
+@pytest.mark.parametrize(
+    "method, endpoint, attempts",
+    [("POST", "/container/status", 3), ("POST", "/files/create", 1)],
+)
+def test_only_reads_are_retried(method, endpoint, attempts):
+    async def scenario():
+        session = FakeSession(statuses=[503, 503])
+        session.gate.set()
+        result = await _client(session)._make_request(method, endpoint, json_data={})
+        return session, result
+
+    session, result = asyncio.run(scenario())
+    assert len(session.requests) == attempts
+    assert result.is_ok() == (attempts == 3)
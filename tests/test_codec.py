@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("fastapi")
+
+from pydantic import BaseModel
+
+from handlers.http.responses import CodecJSONResponse
+from services import codec
+
+
+class Item(BaseModel):
+    name: str
+    created_at: datetime
+
+
+def test_round_trip():
+    data = {"a": [1, 2.5, None, True], "b": {"c": "юникод"}}
+    assert codec.loads(codec.dumps(data)) == data
+    assert codec.loads(codec.dumps_bytes(data)) == data
+
+
+def test_decode_error():
+    with pytest.raises(codec.DecodeError):
+        codec.loads(b"{not json")
+
+
+def test_response_renders_models_without_jsonable_encoder():
+    created_at = datetime(2024, 5, 1, 12, 30)
+    response = CodecJSONResponse(
+        {"data": [Item(name="x", created_at=created_at)], "tags": {"t"}}
+    )
+
+    assert response.media_type == "application/json"
+    assert codec.loads(response.body) == {
+        "data": [{"name": "x", "created_at": "2024-05-01T12:30:00"}],
+        "tags": ["t"],
+    }
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("fastapi")
+
+from fastbot.core import Ok
+
+from handlers.http.containers import router
+from handlers.http.dependencies import get_containers_statuses
+from services.file import FileService
+
+
+class FakeContainersApi:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_containers_status(self, user_id, container_ids):
+        self.calls += 1
+        return Ok(
+            {
+                "success": True,
+                "statuses": [
+                    {"container_id": container_id, "status": index % 2}
+                    for index, container_id in enumerate(container_ids)
+                ],
+            }
+        )
+
+
+class FakeApiService:
+    def __init__(self):
+        self.containers = FakeContainersApi()
+
+
+class FakeFiles:
+    def __init__(self, documents):
+        self.documents = documents
+        self.aggregations = 0
+
+    async def aggregate(self, pipeline):
+        self.aggregations += 1
+        wanted = set(pipeline[0]["$match"]["container_id"]["$in"])
+        totals = {}
+        for doc in self.documents:
+            if doc["container_id"] in wanted:
+                row = totals.setdefault(
+                    doc["container_id"],
+                    {"_id": doc["container_id"], "total_files": 0, "total_size": 0},
+                )
+                row["total_files"] += 1
+                row["total_size"] += doc.get("size") or 0
+        for row in totals.values():
+            yield row
+
+
+class FakeDatabase:
+    def __init__(self, files):
+        self.db = {"files": files, "container_stats": None}
+
+
+def test_static_routes_precede_container_id():
+    paths = [route.path for route in router.routes]
+    catch_all = paths.index("/containers/{container_id}")
+    assert paths.index("/containers/statuses") < catch_all
+    assert paths.index("/containers/metrics/{container_id}") < catch_all
+
+
+def test_container_listing_round_trips_do_not_grow_with_page_size():
+    container_ids = [f"c{i}" for i in range(50)]
+    api_service = FakeApiService()
+    files = FakeFiles(
+        [{"container_id": cid, "size": 10} for cid in container_ids for _ in range(3)]
+    )
+    file_service = FileService(FakeDatabase(files), api_service)
+
+    async def listing():
+        return await asyncio.gather(
+            get_containers_statuses(api_service, 1, container_ids),
+            file_service.get_usage_by_containers(container_ids),
+        )
+
+    statuses, usage_result = asyncio.run(listing())
+
+    assert api_service.containers.calls == 1
+    assert files.aggregations == 1
+    assert statuses["c0"] == "stopped" and statuses["c1"] == "running"
+    assert usage_result.unwrap()["c49"] == {"total_files": 3, "total_size": 30}
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("redis")
+types = pytest.importorskip("aiogram.types")
+
+from fastbot.core import Err, Ok
+
+from middleware.dedup import UpdateDeduplicationMiddleware
+from services.coordination import WorkerCoordinator
+
+
+class FakeRedis:
+    """SET NX/EX и DEL поверх словаря"""
+
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.ttl = {}
+        self.fail = fail
+
+    async def set(self, key, value, ex=None, nx=False):
+        if self.fail:
+            return Err(ConnectionError("redis down"))
+        if nx and key in self.data:
+            return Ok(False)
+        self.data[key] = value
+        self.ttl[key] = ex
+        return Ok(True)
+
+    async def delete(self, *keys):
+        return Ok(sum(self.data.pop(key, None) is not None for key in keys))
+
+
+def _coordinator(redis=None) -> WorkerCoordinator:
+    return WorkerCoordinator(
+        redis or FakeRedis(), dedup_ttl=3600, processing_ttl=120
+    )
+
+
+def test_claim_is_exclusive_and_short_lived():
+    redis = FakeRedis()
+    coordinator = _coordinator(redis)
+
+    assert asyncio.run(coordinator.claim_update(1)) is True
+    assert asyncio.run(coordinator.claim_update(1)) is False
+    assert redis.ttl["owl:bot:update:1"] == 120
+    assert coordinator.stats()["duplicates"] == 1
+
+
+def test_claim_fails_open_without_redis():
+    coordinator = _coordinator(FakeRedis(fail=True))
+
+    assert asyncio.run(coordinator.claim_update(1)) is True
+    assert coordinator.stats()["claim_errors"] == 1
+
+
+def test_middleware_marks_done_after_success():
+    redis = FakeRedis()
+    middleware = UpdateDeduplicationMiddleware(_coordinator(redis))
+    update = types.Update(update_id=7)
+    calls = []
+
+    async def handler(event, data):
+        calls.append(event.update_id)
+        return "handled"
+
+    assert asyncio.run(middleware(handler, update, {})) == "handled"
+    assert asyncio.run(middleware(handler, update, {})) is None
+    assert calls == [7]
+    assert redis.data["owl:bot:update:7"] == "done"
+    assert redis.ttl["owl:bot:update:7"] == 3600
+
+
+def test_middleware_releases_claim_when_handler_fails():
+    redis = FakeRedis()
+    coordinator = _coordinator(redis)
+    middleware = UpdateDeduplicationMiddleware(coordinator)
+    update = types.Update(update_id=8)
+
+    async def failing(event, data):
+        raise RuntimeError("boom")
+
+    async def handler(event, data):
+        return "retried"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(middleware(failing, update, {}))
+    assert "owl:bot:update:8" not in redis.data
+    assert coordinator.stats()["released"] == 1
+
+    assert asyncio.run(middleware(handler, update, {})) == "retried"
@@ -0,0 +1,129 @@
+import asyncio
+import base64
+import json
+import os
+import random
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("fastapi")
+
+from fastbot.core import Ok
+
+from handlers.http.files import _iter_stream_range, _parse_range
+from services.api.file import FileHandler
+from services.api.stream import decode_base64, encode_base64, json_string_field
+
+
+async def _split(data, seed=0, max_size=7):
+    rnd = random.Random(seed)
+    position = 0
+    while position < len(data):
+        size = rnd.randint(1, max_size)
+        yield data[position : position + size]
+        position += size
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=5-", (5, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-1000", (0, 99)),
+        ("bytes=90-1000", (90, 99)),
+        (" bytes=1-1 ", (1, 1)),
+    ],
+)
+def test_parse_range(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize(
+    "header", ["bytes=5-3", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b"]
+)
+def test_parse_range_ignores_invalid_syntax(header):
+    assert _parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, 100)
+
+
+DOCUMENTS = [
+    lambda text: {"success": True, "data": {"note": '"content": 1', "content": text}},
+    lambda text: {"content": text, "explanation": None},
+    lambda text: {"data": text},
+    lambda text: {"meta": [1, {"name": "content"}], "content": text},
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("text", ["", 'q"uo\\te\n\t', "юникод 😀 <&>", "x" * 500])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_json_string_field_streams_content(document, text, ensure_ascii):
+    raw = json.dumps(document(text), ensure_ascii=ensure_ascii).encode()
+    for seed in range(3):
+        pieces = asyncio.run(
+            _collect(json_string_field(_split(raw, seed), ("content", "data")))
+        )
+        assert "".join(pieces) == text
+
+
+def test_json_string_field_without_string_value():
+    raw = b'{"content": null, "other": "x"}'
+    assert asyncio.run(_collect(json_string_field(_split(raw), ("content",)))) == []
+
+
+def test_base64_round_trip_and_range():
+    data = os.urandom(5000)
+
+    async def decoded(start, end):
+        chunks = decode_base64(encode_base64(_split(data, max_size=300)))
+        return b"".join(await _collect(_iter_stream_range(chunks, start, end)))
+
+    assert asyncio.run(decoded(0, len(data) - 1)) == data
+    assert asyncio.run(decoded(1234, 4321)) == data[1234:4322]
+    assert asyncio.run(decoded(4999, 4999)) == data[4999:]
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+        self.released = False
+        self.content = self
+
+    def iter_chunked(self, size):
+        return _split(self.body, max_size=size)
+
+    def release(self):
+        self.released = True
+
+
+class FakeClient:
+    def __init__(self, response):
+        self.response = response
+
+    async def open_stream(self, method, endpoint, json_data=None, params=None):
+        return Ok(self.response)
+
+
+def test_stream_file_content_releases_response():
+    data = os.urandom(1000)
+    encoded = base64.b64encode(data).decode()
+    response = FakeResponse(json.dumps({"data": {"content": encoded}}).encode())
+    files = FileHandler(FakeClient(response))
+
+    async def download():
+        pieces = (await files.stream_file_content("f", "c")).unwrap()
+        return b"".join(await _collect(decode_base64(pieces)))
+
+    assert asyncio.run(download()) == data
+    assert response.released
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("bson")
+
+from bson import ObjectId
+
+from services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    find_page,
+    slice_page,
+)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return list(self.documents)
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query):
+        after = query.get("_id", {}).get("$gt")
+        return FakeCursor(
+            [doc for doc in self.documents if after is None or doc["_id"] > after]
+        )
+
+
+def test_clamp_limit_always_bounds_the_page():
+    assert clamp_limit(None) == DEFAULT_PAGE_SIZE
+    assert clamp_limit(0) == 1
+    assert clamp_limit(-5) == 1
+    assert clamp_limit(10) == 10
+    assert clamp_limit(10**6) == MAX_PAGE_SIZE
+
+
+def test_cursor_round_trip():
+    for value in ["", "docs/a b.txt", "папка/файл.pdf", "65f0c0ffee"]:
+        token = encode_cursor(value)
+        assert "=" not in token
+        assert decode_cursor(token) == value
+
+
+@pytest.mark.parametrize("token", ["a", "_w", "_-8"])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_slice_page_walks_all_items():
+    items = [{"path": f"f{i:02d}"} for i in reversed(range(5))]
+    seen, after = [], None
+    while True:
+        page, after = slice_page(items, "path", after, 2)
+        seen += [item["path"] for item in page]
+        if after is None:
+            break
+    assert seen == [f"f{i:02d}" for i in range(5)]
+
+
+def test_find_page_walks_all_documents():
+    documents = [{"_id": ObjectId()} for _ in range(5)]
+    collection = FakeCollection(documents)
+    seen, after = [], None
+    while True:
+        page, after = asyncio.run(find_page(collection, {}, after, 2))
+        assert len(page) <= 2
+        seen += [doc["_id"] for doc in page]
+        if after is None:
+            break
+    assert seen == [doc["_id"] for doc in documents]
+
+
+def test_find_page_rejects_foreign_cursor():
+    with pytest.raises(ValueError):
+        asyncio.run(find_page(FakeCollection([]), {}, encode_cursor("nope"), 2))
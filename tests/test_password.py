@@ -0,0 +1,48 @@
+import asyncio
+import hashlib
+
+import pytest
+
+pytest.importorskip("fastbot")
+
+from services.password import PasswordHasher
+
+
+def _verify(hasher: PasswordHasher, password: str, password_hash: str):
+    return asyncio.run(hasher.verify(password, password_hash))
+
+
+def test_hash_roundtrip_uses_salt():
+    hasher = PasswordHasher(iterations=1000)
+    first = asyncio.run(hasher.hash("pw"))
+    second = asyncio.run(hasher.hash("pw"))
+
+    assert first.startswith("pbkdf2_sha256$1000$")
+    assert first != second
+    assert _verify(hasher, "pw", first) == (True, False)
+    assert _verify(hasher, "wrong", first) == (False, False)
+    assert hasher.stats()["hashed"] == 2
+    hasher.close()
+
+
+def test_rehash_on_changed_iterations_and_legacy_hash():
+    old = PasswordHasher(iterations=1000)
+    password_hash = asyncio.run(old.hash("pw"))
+    old.close()
+
+    hasher = PasswordHasher(iterations=2000)
+    assert _verify(hasher, "pw", password_hash) == (True, True)
+
+    # Старый формат: hex SHA-256 без соли
+    legacy = hashlib.sha256(b"pw").hexdigest()
+    assert _verify(hasher, "pw", legacy) == (True, True)
+    assert _verify(hasher, "wrong", legacy) == (False, True)
+    hasher.close()
+
+
+def test_malformed_hash_is_rejected():
+    hasher = PasswordHasher(iterations=1000)
+    assert _verify(hasher, "pw", "pbkdf2_sha256$x$salt$digest") == (False, False)
+    assert _verify(hasher, "pw", "pbkdf2_sha256$1000") == (False, False)
+    assert _verify(hasher, "pw", "") == (False, True)
+    hasher.close()
@@ -0,0 +1,63 @@
+import asyncio
+import fnmatch
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("redis")
+
+from services.redis import RedisService
+
+
+class FakeClient:
+    """SCAN постранично и UNLINK; KEYS вызывать нельзя"""
+
+    def __init__(self, keys):
+        self.data = dict.fromkeys(keys, b"1")
+        self.scans = 0
+        self.unlinked = []
+
+    async def scan(self, cursor, match="*", count=10):
+        self.scans += 1
+        # Курсор — позиция в исходном наборе, удаления обход не сдвигают
+        if cursor == 0:
+            self.snapshot = sorted(self.data)
+        keys = self.snapshot
+        page = keys[cursor : cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        return next_cursor, [key for key in page if fnmatch.fnmatch(key, match)]
+
+    async def unlink(self, *keys):
+        self.unlinked.append(len(keys))
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def keys(self, pattern="*"):
+        raise AssertionError("KEYS blocks the server")
+
+
+def _service(client: FakeClient) -> RedisService:
+    service = RedisService("localhost", 6379, decode=True)
+    service.client = client
+    return service
+
+
+def test_delete_by_pattern_scans_and_unlinks_in_batches():
+    keys = [f"owl:files:{i:03}" for i in range(25)] + ["owl:users:1", "other"]
+    client = FakeClient(keys)
+    service = _service(client)
+
+    deleted = asyncio.run(
+        service.delete_by_pattern("owl:files:*", count=10, batch_size=10)
+    )
+
+    assert deleted.unwrap() == 25
+    assert client.unlinked == [10, 10, 5]
+    assert client.scans == 3
+    assert sorted(client.data) == ["other", "owl:users:1"]
+
+
+def test_keys_uses_scan():
+    client = FakeClient(["a:1", "a:2", "b:1"])
+    service = _service(client)
+
+    assert sorted(asyncio.run(service.keys("a:*")).unwrap()) == ["a:1", "a:2"]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+
+from services.api import resilience
+from services.api.resilience import BreakerRegistry, CircuitBreaker, ResilienceConfig
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def _registry(probe=None) -> BreakerRegistry:
+    config = ResilienceConfig(failure_threshold=3, recovery_timeout=10.0)
+    return BreakerRegistry(config, probe)
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = _registry().get("/files")
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert asyncio.run(breaker.allow()) is False
+
+
+def test_success_resets_failure_count(clock):
+    breaker = _registry().get("/files")
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_request_through(clock):
+    registry = _registry()
+    breaker = registry.get("/files")
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 10.0
+    assert asyncio.run(breaker.allow()) is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert asyncio.run(breaker.allow()) is False
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 10.0
+    assert asyncio.run(breaker.allow()) is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert registry.stats()["transitions"] == {
+        "closed->open": 1,
+        "open->half_open": 2,
+        "half_open->open": 1,
+        "half_open->closed": 1,
+    }
+
+
+@pytest.mark.parametrize("healthy, state", [(True, "closed"), (False, "open")])
+def test_probe_decides_recovery(clock, healthy, state):
+    async def probe():
+        return healthy
+
+    breaker = _registry(probe).get("/files")
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 10.0
+    assert asyncio.run(breaker.allow()) is healthy
+    assert breaker.state == state
+
+
+def test_breakers_are_per_endpoint(clock):
+    registry = _registry()
+    for _ in range(3):
+        registry.get("/files").record_failure()
+
+    assert asyncio.run(registry.get("/containers").allow()) is True
+    assert registry.stats()["open"] == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastbot")
+pytest.importorskip("redis")
+
+from fastbot.core import Ok
+
+from models import User
+from services.user_cache import UserCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return Ok(self.data.get(key))
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        return Ok(True)
+
+    async def delete(self, *keys):
+        return Ok(sum(self.data.pop(key, None) is not None for key in keys))
+
+
+def test_invalidation_is_seen_by_other_workers():
+    redis = FakeRedis()
+    first, second = UserCache(redis_service=redis), UserCache(redis_service=redis)
+
+    async def scenario():
+        await first.set(1, User(id=7, tg_id=1))
+        assert (await second.get(1))[1].id == 7
+
+        await first.invalidate(1)
+        assert await second.get(1) == (False, None)
+
+        await second.set(2, None)
+        assert await first.get(2) == (True, None)
+
+    asyncio.run(scenario())
+
+
+def test_local_tier_without_redis():
+    cache = UserCache()
+
+    async def scenario():
+        assert await cache.get(1) == (False, None)
+        await cache.set(1, User(id=7, tg_id=1))
+        await cache.set(2, None)
+        assert (await cache.get(1))[1].id == 7
+        assert await cache.get(2) == (True, None)
+        await cache.invalidate(1)
+        assert await cache.get(1) == (False, None)
+
+    asyncio.run(scenario())